@@ -6,6 +6,7 @@ from typing import Optional
 import secrets
 
 security = HTTPBasic()
+optional_security = HTTPBasic(auto_error=False)
 
 # Base de données des utilisateurs (en production: utiliser une vraie DB)
 USERS_DB = {
@@ -58,7 +59,11 @@ def require_admin(user: dict = Depends(verify_credentials)):
         )
     return user
 
-def get_current_user_optional() -> Optional[dict]:
+def get_current_user_optional(
+    credentials: Optional[HTTPBasicCredentials] = Depends(optional_security)
+) -> Optional[dict]:
     """Retourne l'utilisateur courant ou None si non authentifié."""
-    # Pour les endpoints publics
-    return None
+    # Pour les endpoints publics: des identifiants fournis doivent rester valides
+    if credentials is None:
+        return None
+    return verify_credentials(credentials)
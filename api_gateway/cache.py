@@ -0,0 +1,126 @@
+"""Cache en mémoire avec TTL et stale-while-revalidate pour la Gateway."""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Cache par clé avec durée de fraîcheur (ttl) et fenêtre de péremption (max_stale).
+
+    - entrée fraîche: servie directement (hit)
+    - entrée périmée mais dans la fenêtre max_stale: servie immédiatement et
+      rafraîchie en tâche de fond (stale hit)
+    - entrée absente ou trop ancienne: chargée avant de répondre (miss)
+
+    Un seul rafraîchissement est en cours par clé: les appels concurrents
+    attendent le même chargement au lieu d'appeler l'API plusieurs fois.
+    Les valeurs sont partagées entre appelants et ne doivent pas être modifiées.
+
+    Un échec de chargement est mémorisé pendant error_ttl secondes: pendant une
+    panne, les appels suivants relèvent la même erreur (ou servent la valeur
+    périmée) sans rappeler l'API (failure_hits).
+    """
+
+    def __init__(self, ttl: float, max_stale: float = 0.0, error_ttl: float = 0.0):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.error_ttl = error_ttl
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._failures: Dict[Hashable, Tuple[float, Exception]] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.failure_hits = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Retourne la valeur de la clé, en la (re)chargeant via loader si nécessaire."""
+        failure = self._recent_failure(key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl:
+                self.hits += 1
+                return entry[1]
+            if age < self.ttl + self.max_stale:
+                self.stale_hits += 1
+                if failure is None:
+                    self._refresh(key, loader)
+                return entry[1]
+
+        if failure is not None:
+            self.failure_hits += 1
+            raise failure
+        self.misses += 1
+        # shield: l'annulation d'un appelant n'annule pas le chargement partagé
+        return await asyncio.shield(self._refresh(key, loader))
+
+    def _recent_failure(self, key: Hashable) -> Optional[Exception]:
+        """Erreur du dernier chargement de la clé s'il a échoué il y a moins de error_ttl."""
+        failure = self._failures.get(key)
+        if failure is None:
+            return None
+        if time.monotonic() - failure[0] < self.error_ttl:
+            return failure[1]
+        del self._failures[key]
+        return None
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Lance (ou réutilise) l'unique rafraîchissement en cours pour la clé."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return task
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        """Libère la clé; l'erreur d'un rafraîchissement de fond est déjà comptée."""
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Charge la valeur et la stocke; en cas d'erreur l'ancienne valeur est conservée."""
+        self.refreshes += 1
+        try:
+            value = await loader()
+        except Exception as e:
+            self.errors += 1
+            if self.error_ttl > 0:
+                self._failures[key] = (time.monotonic(), e)
+            raise
+        self._failures.pop(key, None)
+        self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self, key: Hashable = None):
+        """Supprime une clé (ou tout le cache)."""
+        if key is None:
+            self._entries.clear()
+            self._failures.clear()
+        else:
+            self._entries.pop(key, None)
+            self._failures.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs d'utilisation du cache."""
+        lookups = self.hits + self.stale_hits + self.misses + self.failure_hits
+        return {
+            "ttl_seconds": self.ttl,
+            "max_stale_seconds": self.max_stale,
+            "error_ttl_seconds": self.error_ttl,
+            "entries": len(self._entries),
+            "failed_keys": len(self._failures),
+            "refreshing": len(self._inflight),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "failure_hits": self.failure_hits,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+        }
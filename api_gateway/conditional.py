@@ -0,0 +1,70 @@
+"""Requêtes conditionnelles (ETag / Last-Modified) vers les services amont."""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import httpx
+
+
+class ConditionalCache:
+    """
+    Mémorise la dernière réponse 200 porteuse d'un validateur (ETag ou
+    Last-Modified) pour chaque requête GET. L'appel suivant envoie
+    If-None-Match / If-Modified-Since: si le service répond 304, la réponse
+    mémorisée (corps et en-têtes, ex: X-Next-Cursor) est réutilisée sans
+    retransférer ni décoder le corps côté service.
+
+    Les entrées les moins récemment utilisées sont évincées au-delà de max_entries.
+    Les réponses sont partagées entre appelants et ne doivent pas être modifiées.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, httpx.Response]" = OrderedDict()
+        self.requests = 0
+        self.not_modified = 0
+        self.stored = 0
+        self.by_service: Dict[str, Dict[str, int]] = {}
+
+    def headers_for(self, key: Hashable) -> Dict[str, str]:
+        """En-têtes conditionnels à envoyer pour la clé (vides si rien n'est mémorisé)."""
+        cached: Optional[httpx.Response] = self._entries.get(key)
+        if cached is None:
+            return {}
+        headers = {}
+        if "etag" in cached.headers:
+            headers["If-None-Match"] = cached.headers["etag"]
+        if "last-modified" in cached.headers:
+            headers["If-Modified-Since"] = cached.headers["last-modified"]
+        return headers
+
+    def resolve(self, key: Hashable, response: httpx.Response, service: str = "default") -> httpx.Response:
+        """Retourne la réponse à utiliser: la copie mémorisée sur 304, sinon `response` (mémorisée si validable)."""
+        self.requests += 1
+        stats = self.by_service.setdefault(service, {"requests": 0, "not_modified": 0})
+        stats["requests"] += 1
+        cached = self._entries.get(key)
+        if response.status_code == 304 and cached is not None:
+            self.not_modified += 1
+            stats["not_modified"] += 1
+            self._entries.move_to_end(key)
+            return cached
+        if response.status_code == 200 and ("etag" in response.headers or "last-modified" in response.headers):
+            self.stored += 1
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        elif response.status_code != 304:
+            self._entries.pop(key, None)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs de revalidation."""
+        return {
+            "entries": len(self._entries),
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "stored": self.stored,
+            "hit_ratio": round(self.not_modified / self.requests, 3) if self.requests else 0.0,
+            "by_service": self.by_service,
+        }
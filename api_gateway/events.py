@@ -0,0 +1,167 @@
+"""Diffusion d'événements temps réel (Server-Sent Events) vers les clients Web."""
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """Formate un événement au format text/event-stream."""
+    message = ""
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    message += f"event: {event}\n"
+    message += f"data: {json.dumps(data, default=str)}\n\n"
+    return message
+
+
+class EventBroadcaster:
+    """
+    Multiplexe chaque événement publié vers tous les abonnés connectés.
+
+    Chaque abonné dispose de sa propre file bornée: un client lent perd ses
+    événements les plus anciens au lieu de ralentir les autres.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.last_id = 0
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Enregistre un nouvel abonné et retourne sa file d'événements."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Retire un abonné (déconnexion du client)."""
+        self._subscribers.discard(queue)
+
+    def publish(self, event: str, data: Any) -> int:
+        """Envoie un événement à tous les abonnés; retourne son identifiant."""
+        self.last_id += 1
+        self.published += 1
+        message: Tuple[int, str, Any] = (self.last_id, event, data)
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(message)
+        return self.last_id
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs de diffusion."""
+        return {
+            "subscribers": self.subscribers,
+            "published": self.published,
+            "dropped": self.dropped,
+            "last_event_id": self.last_id,
+        }
+
+
+class FleetWatcher:
+    """
+    Surveille la flotte d'urgence et publie les changements.
+
+    Le service gRPC n'expose pas de flux: un seul appel (véhicules + interventions)
+    est fait par intervalle, quel que soit le nombre d'abonnés, et seulement
+    lorsqu'au moins un client est connecté. Seules les différences sont publiées:
+    - vehicle_status: un véhicule a changé de statut (ou est apparu)
+    - intervention: nouvelle intervention active (ou intervention modifiée)
+    - intervention_closed: intervention qui n'est plus active
+    """
+
+    def __init__(self, client, broadcaster: EventBroadcaster, interval: float):
+        self.client = client
+        self.broadcaster = broadcaster
+        self.interval = interval
+        self.vehicles: Dict[int, Dict] = {}
+        self.interventions: Dict[int, Dict] = {}
+        self.ready = False
+        self.polls = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def state(self) -> Dict[str, List[Dict]]:
+        """État courant de la flotte (envoyé à la connexion d'un client)."""
+        if not self.ready:
+            await self.poll()
+        return {
+            "vehicles": list(self.vehicles.values()),
+            "interventions": list(self.interventions.values()),
+        }
+
+    async def poll(self):
+        """Interroge le service gRPC une fois et publie les différences."""
+        async with self._lock:
+            vehicles, interventions = await asyncio.gather(
+                self.client.get_all_vehicles(),
+                self.client.get_active_interventions()
+            )
+            self.polls += 1
+            self._apply(vehicles, interventions)
+
+    def _apply(self, vehicles: List[Dict], interventions: List[Dict]):
+        """Compare avec l'état précédent, publie les différences et mémorise le nouvel état."""
+        vehicles = {v['id']: v for v in vehicles}
+        interventions = {i['id']: i for i in interventions}
+
+        if self.ready:
+            for vehicle_id, vehicle in vehicles.items():
+                previous = self.vehicles.get(vehicle_id)
+                if previous is None or previous['status'] != vehicle['status']:
+                    self.broadcaster.publish("vehicle_status", {
+                        "vehicle": vehicle,
+                        "previous_status": previous['status'] if previous else None
+                    })
+            for intervention_id, intervention in interventions.items():
+                if self.interventions.get(intervention_id) != intervention:
+                    self.broadcaster.publish("intervention", {"intervention": intervention})
+            for intervention_id in self.interventions.keys() - interventions.keys():
+                self.broadcaster.publish("intervention_closed", {"id": intervention_id})
+
+        self.vehicles = vehicles
+        self.interventions = interventions
+        self.ready = True
+
+    async def _run(self):
+        """Boucle de surveillance (inactive sans abonné)."""
+        while True:
+            if self.broadcaster.subscribers:
+                try:
+                    await self.poll()
+                except Exception as e:
+                    self.errors += 1
+                    # Une seule trace par panne, pas une par intervalle
+                    if self.last_error is None:
+                        print(f"⚠️ Erreur surveillance flotte: {e}")
+                    self.last_error = str(e)
+                else:
+                    self.last_error = None
+            else:
+                # Sans abonné l'état n'est plus suivi: il sera relu à la prochaine connexion
+                self.ready = False
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Démarre la surveillance (appelé au démarrage de la Gateway)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête la surveillance."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,22 +1,57 @@
 ﻿"""API Gateway - Centralise l'acc├¿s aux 4 microservices."""
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import asyncio
-from zeep import Client
+import time
 from zeep.exceptions import Fault
-from grpc_client import EmergencyClient
-from auth import verify_credentials, require_admin
+from grpc_client import AsyncEmergencyClient
+from soap_client import AirQualitySoapClient
+from auth import verify_credentials, require_admin, get_current_user_optional
+from upstream import upstream
+from cache import TTLCache
+from snapshot import SnapshotStore
+from events import EventBroadcaster, FleetWatcher, format_sse
+from metrics import MetricsMiddleware, render_metrics
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+import os
+import sys
+
+# Module partag├® common/ (racine du d├®p├┤t en local, /app dans le conteneur)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common import fastjson
+from common.aqi import aqi_for, from_ugm3, status_label, to_ugm3
 
 # Charger les variables d'environnement
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Ouvre les pools de connexions partag├®s au d├®marrage et les ferme ├á l'arr├¬t."""
+    await upstream.start()
+    await soap_air.start(upstream.get("air_quality"))
+    emergency.connect()
+    dashboard_snapshot.start()
+    fleet_watcher.start()
+    yield
+    await fleet_watcher.stop()
+    await dashboard_snapshot.stop()
+    await emergency.close()
+    await soap_air.close()
+    await upstream.close()
+
+
 app = FastAPI(
     title="­ƒîÉ API Gateway - TuniLink",
     description="L'exp├®rience urbaine r├®invent├®e - Point d'entr├®e centralis├® pour tous les microservices de la Grande Tunis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configuration CORS pour permettre l'acc├¿s depuis le client Web
@@ -28,6 +63,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latence, erreurs et requ├¬tes en cours par route (export├®es sur /metrics)
+app.add_middleware(MetricsMiddleware)
+
 # URLs des microservices (dans Docker network)
 SERVICES = {
     "transport": "http://service-rest:8000",
@@ -36,12 +74,24 @@ SERVICES = {
     "emergency": "service-grpc:50051"  # gRPC
 }
 
+# Client SOAP unique (WSDL mis en cache, appels async sur le pool partag├®)
+soap_air = AirQualitySoapClient(f"{SERVICES['air_quality']}/?wsdl")
+
+# Canal gRPC asyncio unique (keepalive, reconnexion automatique, d├®lai par appel)
+emergency = AsyncEmergencyClient(SERVICES['emergency'])
+
 # Configuration API externe pour donn├®es m├®t├®o/qualit├® d'air en temps r├®el
 # OpenWeatherMap Air Pollution API (gratuite - 1000 appels/jour)
 # Inscription: https://openweathermap.org/api/air-pollution
-import os
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "YOUR_API_KEY_HERE")
 OPENWEATHER_AIR_API = "http://api.openweathermap.org/data/2.5/air_pollution"
+# Valeurs d'exemple (d├®faut du code, .env.example, anciens README): ├®quivalent ├á "pas de cl├®"
+OPENWEATHER_PLACEHOLDER_KEYS = {"", "your_api_key_here", "votre_cle_api_ici"}
+
+
+def openweather_configured() -> bool:
+    """True si une vraie cl├® OpenWeather est configur├®e."""
+    return (OPENWEATHER_API_KEY or "").strip().lower() not in OPENWEATHER_PLACEHOLDER_KEYS
 
 # Coordonn├®es GPS des zones de Tunis
 TUNIS_ZONES_GPS = {
@@ -57,131 +107,182 @@ TUNIS_ZONES_GPS = {
     "Hammam-Lif": {"lat": 36.7292, "lon": 10.3439}
 }
 
+# Cache par zone: l'AQI ├®volue ├á l'├®chelle de dizaines de minutes.
+# Au-del├á du TTL la valeur p├®rim├®e est servie pendant qu'elle est rafra├«chie en fond.
+# Un ├®chec OpenWeather est m├®moris├® AIR_QUALITY_CACHE_ERROR_TTL secondes (pas d'appel par requ├¬te en panne).
+air_quality_cache = TTLCache(
+    ttl=float(os.getenv("AIR_QUALITY_CACHE_TTL", "600")),
+    max_stale=float(os.getenv("AIR_QUALITY_CACHE_MAX_STALE", "3600")),
+    error_ttl=float(os.getenv("AIR_QUALITY_CACHE_ERROR_TTL", "30"))
+)
+
+
+async def get_real_time_air_quality_many(zones) -> Dict[str, Dict[str, Any]]:
+    """
+    Qualit├® d'air en temps r├®el de plusieurs zones, {zone: donn├®es}, servie
+    depuis le cache par zone. Voir fetch_real_time_air_quality pour le format.
+
+    Seules les r├®ponses OpenWeather sont mises en cache: sans cl├® API ou en cas
+    d'├®chec, le repli SOAP (ou les valeurs par d├®faut) est servi sans ├¬tre
+    stock├®, pour ne pas figer des donn├®es d├®grad├®es pendant TTL + max_stale.
+    Un rafra├«chissement en ├®chec conserve la derni├¿re valeur OpenWeather, et
+    l'├®chec est m├®moris├® (error_ttl): pendant une panne, OpenWeather n'est pas
+    rappel├® ├á chaque requ├¬te. Les zones sans donn├®e OpenWeather partagent une
+    seule enveloppe SOAP (GetLatestMeasures).
+    """
+    zones = list(dict.fromkeys(zones))
+    results = {}
+    if openweather_configured():
+        fetched = await asyncio.gather(
+            *(air_quality_cache.get(zone, lambda zone=zone: fetch_real_time_air_quality(zone)) for zone in zones),
+            return_exceptions=True
+        )
+        for zone, data in zip(zones, fetched):
+            if isinstance(data, Exception):
+                print(f"ÔÜá´©Å Erreur lors de l'appel OpenWeather API ({zone}): {data}, fallback SOAP")
+            else:
+                results[zone] = data
+
+    missing = [zone for zone in zones if zone not in results]
+    if missing:
+        results.update(await get_soap_air_quality_many(missing))
+    return {zone: results[zone] for zone in zones}
+
 
 async def get_real_time_air_quality(zone: str) -> Dict[str, Any]:
+    """Qualit├® d'air en temps r├®el d'une zone (voir get_real_time_air_quality_many)."""
+    return (await get_real_time_air_quality_many([zone]))[zone]
+
+
+class OpenWeatherUnavailable(Exception):
+    """R├®ponse OpenWeather inexploitable (jamais mise en cache)."""
+
+
+async def fetch_real_time_air_quality(zone: str) -> Dict[str, Any]:
     """
     R├®cup├¿re les donn├®es de qualit├® d'air en temps r├®el via OpenWeatherMap API.
     
     Retourne:
-    - aqi: Air Quality Index (1-5 selon OpenWeather, converti en 0-500 US EPA)
+    - aqi: Air Quality Index US EPA (0-500), calcul├® sur tous les polluants (common/aqi.py)
     - status: Description textuelle
+    - dominant_pollutant: polluant qui fixe l'AQI
     - components: PM2.5, PM10, O3, NO2, CO, etc.
-    - source: "OpenWeatherMap API" ou "SOAP fallback"
+    - source: "OpenWeatherMap API"
+
+    L├¿ve une exception si OpenWeather est injoignable ou r├®pond en erreur
+    (le repli SOAP est fait par get_real_time_air_quality_many, hors cache).
     """
     # R├®cup├®rer les coordonn├®es GPS de la zone
     coords = TUNIS_ZONES_GPS.get(zone, TUNIS_ZONES_GPS["Tunis Centre-Ville"])
     
-    # Si pas de cl├® API configur├®e, utiliser le service SOAP local
-    if not OPENWEATHER_API_KEY or OPENWEATHER_API_KEY == "votre_cle_api_ici":
-        print(f"ÔÜá´©Å Pas de cl├® OpenWeather configur├®e, utilisation du service SOAP local")
-        return await get_soap_air_quality(zone)
+    client = upstream.get("openweather")
+    response = await client.get(
+        OPENWEATHER_AIR_API,
+        params={
+            "lat": coords["lat"],
+            "lon": coords["lon"],
+            "appid": OPENWEATHER_API_KEY
+        }
+    )
     
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(
-                OPENWEATHER_AIR_API,
-                params={
-                    "lat": coords["lat"],
-                    "lon": coords["lon"],
-                    "appid": OPENWEATHER_API_KEY
-                }
-            )
-            
-            if response.status_code != 200:
-                print(f"ÔÜá´©Å Erreur API OpenWeather (code {response.status_code}), fallback SOAP")
-                return await get_soap_air_quality(zone)
-            
-            data = response.json()
-            
-            # Extraire les donn├®es de pollution
-            aqi_index = data["list"][0]["main"]["aqi"]  # 1-5 selon OpenWeather
-            components = data["list"][0]["components"]
-            
-            # Convertir l'index OpenWeather (1-5) en AQI US EPA (0-500)
-            # 1=Good, 2=Fair, 3=Moderate, 4=Poor, 5=Very Poor
-            aqi_conversion = {1: 25, 2: 60, 3: 90, 4: 130, 5: 200}
-            aqi_value = aqi_conversion.get(aqi_index, 75)
-            
-            # Calculer un AQI plus pr├®cis bas├® sur PM2.5 (norme US EPA)
-            pm25 = components.get("pm2_5", 0)
-            if pm25 <= 12.0:
-                aqi_from_pm25 = (50 / 12.0) * pm25
-            elif pm25 <= 35.4:
-                aqi_from_pm25 = 50 + ((100 - 50) / (35.4 - 12.1)) * (pm25 - 12.1)
-            elif pm25 <= 55.4:
-                aqi_from_pm25 = 100 + ((150 - 100) / (55.4 - 35.5)) * (pm25 - 35.5)
-            elif pm25 <= 150.4:
-                aqi_from_pm25 = 150 + ((200 - 150) / (150.4 - 55.5)) * (pm25 - 55.5)
-            else:
-                aqi_from_pm25 = 200 + ((300 - 200) / (250.4 - 150.5)) * min(pm25 - 150.5, 100)
-            
-            # Utiliser la valeur la plus ├®lev├®e entre l'index OpenWeather et le calcul PM2.5
-            final_aqi = int(max(aqi_value, aqi_from_pm25))
-            
-            # D├®terminer le statut
-            if final_aqi <= 50:
-                status = "Bon"
-            elif final_aqi <= 100:
-                status = "Mod├®r├®"
-            elif final_aqi <= 150:
-                status = "Mauvais pour groupes sensibles"
-            elif final_aqi <= 200:
-                status = "Mauvais"
-            else:
-                status = "Tr├¿s mauvais"
-            
-            return {
-                "aqi": final_aqi,
-                "status": status,
-                "components": {
-                    "pm2_5": components.get("pm2_5", 0),
-                    "pm10": components.get("pm10", 0),
-                    "o3": components.get("o3", 0),
-                    "no2": components.get("no2", 0),
-                    "co": components.get("co", 0)
-                },
-                "source": "OpenWeatherMap API (temps r├®el)",
-                "coordinates": coords
-            }
-            
-    except Exception as e:
-        print(f"ÔÜá´©Å Erreur lors de l'appel OpenWeather API: {e}")
-        return await get_soap_air_quality(zone)
+    if response.status_code != 200:
+        raise OpenWeatherUnavailable(f"code {response.status_code}")
+    
+    data = response.json()
+    
+    # Extraire les donn├®es de pollution
+    aqi_index = data["list"][0]["main"]["aqi"]  # 1-5 selon OpenWeather
+    components = data["list"][0]["components"]
+    
+    # AQI US EPA multi-polluants (composants OpenWeather en ┬Ág/m┬│)
+    final_aqi, dominant, status = aqi_for(**from_ugm3({
+        "pm25": components.get("pm2_5"),
+        "pm10": components.get("pm10"),
+        "o3": components.get("o3"),
+        "no2": components.get("no2"),
+        "co": components.get("co")
+    }))
+    if final_aqi < 0:
+        # Aucun composant: conversion de l'index OpenWeather (1-5) en AQI US EPA (0-500)
+        # 1=Good, 2=Fair, 3=Moderate, 4=Poor, 5=Very Poor
+        aqi_conversion = {1: 25, 2: 60, 3: 90, 4: 130, 5: 200}
+        final_aqi = aqi_conversion.get(aqi_index, 75)
+        status = status_label(final_aqi)
+    
+    return {
+        "aqi": final_aqi,
+        "status": status,
+        "dominant_pollutant": dominant,
+        "components": {
+            "pm2_5": components.get("pm2_5", 0),
+            "pm10": components.get("pm10", 0),
+            "o3": components.get("o3", 0),
+            "no2": components.get("no2", 0),
+            "co": components.get("co", 0)
+        },
+        "source": "OpenWeatherMap API (temps r├®el)",
+        "coordinates": coords
+    }
+
+
+def station_for_zone(zone: str) -> str:
+    """Nom exact de la station SOAP d'une zone (ex: "Centre-Ville" -> "Tunis Centre-Ville")."""
+    if zone in TUNIS_ZONES_GPS:
+        return zone
+    needle = zone.lower()
+    return next((name for name in TUNIS_ZONES_GPS if needle in name.lower()), zone)
+
+
+def soap_components(measure) -> Dict[str, Optional[float]]:
+    """
+    Polluants d'une mesure SOAP au format OpenWeatherMap, en ┬Ág/m┬│ comme le reste
+    de la Gateway (le service SOAP stocke O3 et NO2 en ppb, CO en ppm).
+    """
+    components = to_ugm3({
+        "pm2_5": measure.pm25, "pm10": measure.pm10,
+        "o3": measure.o3, "no2": measure.no2, "co": measure.co,
+    })
+    return {name: (round(float(value), 2) if value is not None else None) for name, value in components.items()}
+
+
+async def get_latest_station_measures(zones) -> Dict[str, Any]:
+    """Derni├¿re mesure SOAP de chaque zone (GetLatestMeasures), index├®e par zone demand├®e."""
+    stations = {zone: station_for_zone(zone) for zone in zones}
+    latest = await soap_air.get_latest_measures(dict.fromkeys(stations.values()))
+    return {zone: latest[station] for zone, station in stations.items() if station in latest}
 
 
-async def get_soap_air_quality(zone: str) -> Dict[str, Any]:
+async def get_soap_air_quality_many(zones) -> Dict[str, Dict[str, Any]]:
     """
-    Fallback: utilise le service SOAP local si l'API externe ├®choue.
+    Fallback: utilise le service SOAP local si l'API externe ├®choue, une seule
+    enveloppe pour toutes les zones. Zone sans mesure: donn├®es par d├®faut.
     """
     try:
-        wsdl_url = f"{SERVICES['air_quality']}/?wsdl"
-        soap_client = Client(wsdl_url)
-        measures = soap_client.service.GetMeasuresByStation(zone)
-        
-        if measures and len(measures) > 0:
-            measure = measures[0]
-            return {
+        latest = await get_latest_station_measures(zones)
+    except Exception as e:
+        print(f"ÔÜá´©Å Erreur SOAP: {e}")
+        latest = {}
+
+    results = {}
+    for zone in zones:
+        measure = latest.get(zone)
+        if measure is not None:
+            results[zone] = {
                 "aqi": measure.aqi,
                 "status": measure.status,
-                "components": {
-                    "pm2_5": float(measure.pm25) if measure.pm25 else 0,
-                    "pm10": float(measure.pm10) if measure.pm10 else 0,
-                    "o3": float(measure.o3) if measure.o3 else 0,
-                    "no2": float(measure.no2) if measure.no2 else 0,
-                    "co": float(measure.co) if measure.co else 0
-                },
+                "components": {name: value or 0 for name, value in soap_components(measure).items()},
                 "source": "Service SOAP local"
             }
-    except Exception as e:
-        print(f"ÔÜá´©Å Erreur SOAP: {e}")
-    
-    # Derni├¿re option: donn├®es par d├®faut
-    return {
-        "aqi": 75,
-        "status": "Donn├®es non disponibles",
-        "components": {"pm2_5": 0, "pm10": 0, "o3": 0, "no2": 0, "co": 0},
-        "source": "Donn├®es par d├®faut"
-    }
+        else:
+            # Derni├¿re option: donn├®es par d├®faut
+            results[zone] = {
+                "aqi": 75,
+                "status": "Donn├®es non disponibles",
+                "components": {"pm2_5": 0, "pm10": 0, "o3": 0, "no2": 0, "co": 0},
+                "source": "Donn├®es par d├®faut"
+            }
+    return results
+
 
 
 @app.get("/")
@@ -207,32 +308,38 @@ def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """M├®triques Prometheus: latence, erreurs et appels en cours par service amont et par route."""
+    body, content_type = render_metrics()
+    return Response(content=body, headers={"Content-Type": content_type})
+
+
 @app.get("/health")
 async def health_check():
     """V├®rifie la sant├® de tous les services."""
     health_status = {}
     
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        # Check REST service
-        try:
-            response = await client.get(f"{SERVICES['transport']}/health")
-            health_status["transport"] = "healthy" if response.status_code == 200 else "unhealthy"
-        except Exception as e:
-            health_status["transport"] = f"unavailable: {str(e)}"
-        
-        # Check GraphQL service
-        try:
-            response = await client.get(f"{SERVICES['tourism']}/health")
-            health_status["tourism"] = "healthy" if response.status_code == 200 else "unhealthy"
-        except Exception as e:
-            health_status["tourism"] = f"unavailable: {str(e)}"
-        
-        # Check SOAP service
-        try:
-            response = await client.get(f"{SERVICES['air_quality']}/?wsdl")
-            health_status["air_quality"] = "healthy" if response.status_code == 200 else "unhealthy"
-        except Exception as e:
-            health_status["air_quality"] = f"unavailable: {str(e)}"
+    # Check REST service
+    try:
+        response = await upstream.get("transport").get(f"{SERVICES['transport']}/health")
+        health_status["transport"] = "healthy" if response.status_code == 200 else "unhealthy"
+    except Exception as e:
+        health_status["transport"] = f"unavailable: {str(e)}"
+    
+    # Check GraphQL service
+    try:
+        response = await upstream.get("tourism").get(f"{SERVICES['tourism']}/health")
+        health_status["tourism"] = "healthy" if response.status_code == 200 else "unhealthy"
+    except Exception as e:
+        health_status["tourism"] = f"unavailable: {str(e)}"
+    
+    # Check SOAP service
+    try:
+        response = await upstream.get("air_quality").get(f"{SERVICES['air_quality']}/?wsdl")
+        health_status["air_quality"] = "healthy" if response.status_code == 200 else "unhealthy"
+    except Exception as e:
+        health_status["air_quality"] = f"unavailable: {str(e)}"
     
     health_status["emergency"] = "gRPC - use client to check"
     
@@ -262,71 +369,242 @@ async def get_current_user(user: dict = Depends(verify_credentials)):
 # ROUTES POUR LE SERVICE TRANSPORT (REST)
 # ============================================
 
+# Taille des pages demand├®es au service transport (pagination par curseur)
+TRANSPORT_PAGE_SIZE = int(os.getenv("TRANSPORT_PAGE_SIZE", "500"))
+
+# Les lots (import nocturne) peuvent d├®passer le d├®lai des appels unitaires
+TRANSPORT_BULK_TIMEOUT = float(os.getenv("TRANSPORT_BULK_TIMEOUT", "60"))
+
+# Attente maximale d'un appel en long-polling sur le flux de modifications
+TRANSPORT_CHANGES_MAX_WAIT = float(os.getenv("TRANSPORT_CHANGES_MAX_WAIT", "30"))
+
+
+def upstream_error_detail(response: httpx.Response) -> Any:
+    """D├®tail d'une r├®ponse d'erreur amont (JSON FastAPI, sinon corps texte: proxy, 502 vide...)."""
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    if isinstance(body, dict) and "detail" in body:
+        return body["detail"]
+    return response.text or f"Erreur du service amont ({response.status_code})"
+
+
+async def iter_transport_pages(
+    status: Optional[str] = None,
+    modes: Optional[List[str]] = None,
+    zones: Optional[List[str]] = None
+):
+    """
+    Parcourt les pages du service transport en suivant le curseur X-Next-Cursor
+    (le service ne renvoie qu'une page par appel) et produit le corps brut de
+    chaque page. Les filtres (status, modes, zones) sont appliqu├®s en SQL par le service.
+    """
+    filters = {"status": status, "mode": modes, "zone": zones}
+    filters = {key: value for key, value in filters.items() if value}
+    params = {"limit": TRANSPORT_PAGE_SIZE, **filters}
+    while True:
+        response = await upstream.request(
+            "transport", "GET", f"{SERVICES['transport']}/transports/", params=params,
+            coalesce=True, conditional=True
+        )
+        response.raise_for_status()
+        yield response.content
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            return
+        params = {"limit": TRANSPORT_PAGE_SIZE, "cursor": next_cursor, **filters}
+
+
+async def fetch_all_transports(
+    status: Optional[str] = None,
+    modes: Optional[List[str]] = None,
+    zones: Optional[List[str]] = None
+) -> list:
+    """R├®cup├¿re tous les transports (toutes les pages) d├®cod├®s."""
+    transports = []
+    async for page in iter_transport_pages(status, modes, zones):
+        transports.extend(fastjson.loads(page))
+    return transports
+
+
+async def fetch_all_transports_raw(
+    status: Optional[str] = None,
+    modes: Optional[List[str]] = None,
+    zones: Optional[List[str]] = None
+) -> bytes:
+    """Tous les transports en un tableau JSON, pages concat├®n├®es sans d├®codage."""
+    return fastjson.merge_json_arrays([page async for page in iter_transport_pages(status, modes, zones)])
+
+
 @app.get("/api/transport/transports")
-async def get_transports():
-    """Liste tous les transports."""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{SERVICES['transport']}/transports/")
-            return response.json()
-        except Exception as e:
-            raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
+async def get_transports(
+    status: Optional[str] = None,
+    mode: Optional[List[str]] = Query(None),
+    zone: Optional[List[str]] = Query(None)
+):
+    """Liste tous les transports (filtres optionnels status, mode, zone transmis au service)."""
+    try:
+        if fastjson.FAST_JSON:
+            # Relais sans d├®codage ni r├®-encodage des pages du service
+            return Response(
+                content=await fetch_all_transports_raw(status=status, modes=mode, zones=zone),
+                media_type="application/json"
+            )
+        return await fetch_all_transports(status=status, modes=mode, zones=zone)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
+
+
+@app.get("/api/transport/zones")
+async def get_transport_zones():
+    """Zones desservies et nombre de lignes par zone."""
+    try:
+        response = await upstream.request(
+            "transport", "GET", f"{SERVICES['transport']}/zones", coalesce=True, conditional=True
+        )
+        return response.json()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
+
+
+@app.get("/api/transport/transports/export")
+async def export_transports():
+    """Export NDJSON du catalogue, relay├® en flux depuis le service transport."""
+    client = upstream.get("transport")
+    try:
+        response = await client.send(
+            client.build_request("GET", f"{SERVICES['transport']}/transports/export"),
+            stream=True
+        )
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
+    if response.status_code != 200:
+        await response.aclose()
+        raise HTTPException(status_code=response.status_code, detail="Export indisponible")
+    return StreamingResponse(
+        response.aiter_raw(),
+        media_type="application/x-ndjson",
+        headers={name: response.headers[name] for name in ("X-Change-Cursor", "ETag") if name in response.headers},
+        background=BackgroundTask(response.aclose)
+    )
+
+
+@app.get("/api/transport/transports/changes")
+async def get_transport_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    wait: float = Query(0, ge=0, le=TRANSPORT_CHANGES_MAX_WAIT)
+):
+    """
+    Flux des modifications du catalogue depuis un curseur (voir /transports/changes
+    du service transport). Avec `wait`, long-polling jusqu'├á la prochaine modification.
+    """
+    client = upstream.get("transport")
+    try:
+        response = await client.get(
+            f"{SERVICES['transport']}/transports/changes",
+            params={"since": since, "limit": limit, "wait": wait},
+            timeout=wait + upstream.config["transport"]["timeout"]
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
+    if response.status_code >= 400:
+        raise HTTPException(status_code=response.status_code, detail=upstream_error_detail(response))
+    return response.json()
 
 
 @app.get("/api/transport/transports/{transport_id}")
 async def get_transport(transport_id: int):
     """R├®cup├¿re un transport par ID."""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{SERVICES['transport']}/transports/{transport_id}")
-            if response.status_code == 404:
-                raise HTTPException(status_code=404, detail="Transport non trouv├®")
-            return response.json()
-        except httpx.HTTPError as e:
-            raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
+    try:
+        response = await upstream.request(
+            "transport", "GET", f"{SERVICES['transport']}/transports/{transport_id}",
+            coalesce=True, conditional=True
+        )
+        if response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Transport non trouv├®")
+        return response.json()
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
 
 
 @app.post("/api/transport/transports")
 async def create_transport(data: Dict[str, Any], admin: dict = Depends(require_admin)):
     """Cr├®e un nouveau transport. [ADMIN ONLY]"""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{SERVICES['transport']}/transports/",
-                json=data
-            )
-            return response.json()
-        except Exception as e:
-            raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
+    client = upstream.get("transport")
+    try:
+        response = await client.post(
+            f"{SERVICES['transport']}/transports/",
+            json=data
+        )
+        return response.json()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
+
+
+@app.post("/api/transport/transports/bulk")
+async def bulk_create_transports(data: List[Dict[str, Any]], admin: dict = Depends(require_admin)):
+    """Cr├®e plusieurs transports en une seule transaction c├┤t├® service. [ADMIN ONLY]"""
+    return await proxy_transport_bulk("POST", data)
+
+
+@app.put("/api/transport/transports/bulk")
+async def bulk_update_transports(data: List[Dict[str, Any]], admin: dict = Depends(require_admin)):
+    """Met ├á jour plusieurs transports (chaque ├®l├®ment contient son id). [ADMIN ONLY]"""
+    return await proxy_transport_bulk("PUT", data)
+
+
+@app.delete("/api/transport/transports/bulk")
+async def bulk_delete_transports(ids: List[int], admin: dict = Depends(require_admin)):
+    """Supprime plusieurs transports par id. [ADMIN ONLY]"""
+    return await proxy_transport_bulk("DELETE", ids)
+
+
+async def proxy_transport_bulk(method: str, payload: list) -> Dict[str, Any]:
+    """Relaie une op├®ration group├®e au service transport (r├®sultat par ├®l├®ment)."""
+    client = upstream.get("transport")
+    try:
+        response = await client.request(
+            method,
+            f"{SERVICES['transport']}/transports/bulk",
+            json=payload,
+            timeout=TRANSPORT_BULK_TIMEOUT
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
+    if response.status_code >= 400:
+        raise HTTPException(status_code=response.status_code, detail=upstream_error_detail(response))
+    return response.json()
 
 
 @app.put("/api/transport/transports/{transport_id}")
 async def update_transport(transport_id: int, data: Dict[str, Any], admin: dict = Depends(require_admin)):
     """Met ├á jour un transport. [ADMIN ONLY]"""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.put(
-                f"{SERVICES['transport']}/transports/{transport_id}",
-                json=data
-            )
-            if response.status_code == 404:
-                raise HTTPException(status_code=404, detail="Transport non trouv├®")
-            return response.json()
-        except httpx.HTTPError as e:
-            raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
+    client = upstream.get("transport")
+    try:
+        response = await client.put(
+            f"{SERVICES['transport']}/transports/{transport_id}",
+            json=data
+        )
+        if response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Transport non trouv├®")
+        return response.json()
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
 
 
 @app.delete("/api/transport/transports/{transport_id}")
 async def delete_transport(transport_id: int, admin: dict = Depends(require_admin)):
     """Supprime un transport. [ADMIN ONLY]"""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.delete(f"{SERVICES['transport']}/transports/{transport_id}")
-            if response.status_code == 404:
-                raise HTTPException(status_code=404, detail="Transport non trouv├®")
-            return {"message": "Transport supprim├® avec succ├¿s"}
-        except httpx.HTTPError as e:
-            raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
+    client = upstream.get("transport")
+    try:
+        response = await client.delete(f"{SERVICES['transport']}/transports/{transport_id}")
+        if response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Transport non trouv├®")
+        return {"message": "Transport supprim├® avec succ├¿s"}
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=503, detail=f"Service transport indisponible: {str(e)}")
 
 
 # ============================================
@@ -336,15 +614,15 @@ async def delete_transport(transport_id: int, admin: dict = Depends(require_admi
 @app.post("/api/tourism/graphql")
 async def tourism_graphql(query_data: Dict[str, Any]):
     """Proxy pour les requ├¬tes GraphQL."""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{SERVICES['tourism']}/graphql",
-                json=query_data
-            )
-            return response.json()
-        except Exception as e:
-            raise HTTPException(status_code=503, detail=f"Service tourisme indisponible: {str(e)}")
+    client = upstream.get("tourism")
+    try:
+        response = await client.post(
+            f"{SERVICES['tourism']}/graphql",
+            json=query_data
+        )
+        return response.json()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Service tourisme indisponible: {str(e)}")
 
 
 @app.get("/api/tourism/attractions")
@@ -368,18 +646,17 @@ async def get_attractions():
         }
     }
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{SERVICES['tourism']}/graphql",
-                json={"query": query}
-            )
-            result = response.json()
-            if "data" in result:
-                return result["data"]["attractions"]
-            return result
-        except Exception as e:
-            raise HTTPException(status_code=503, detail=f"Service tourisme indisponible: {str(e)}")
+    try:
+        response = await upstream.request(
+            "tourism", "POST", f"{SERVICES['tourism']}/graphql",
+            json_body={"query": query}, coalesce=True
+        )
+        result = response.json()
+        if "data" in result:
+            return result["data"]["attractions"]
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Service tourisme indisponible: {str(e)}")
 
 
 # ============================================
@@ -389,54 +666,30 @@ async def get_attractions():
 @app.get("/api/air-quality/measures")
 async def get_air_quality_measures():
     """
-    Liste toutes les mesures de qualit├® de l'air EN TEMPS R├ëEL pour les 10 zones de Tunis.
-    Utilise l'API OpenWeatherMap pour chaque zone avec fallback SOAP.
+    Liste toutes les mesures de qualité de l'air EN TEMPS RÉEL pour les 10 zones de Tunis.
+    Utilise l'API OpenWeatherMap pour chaque zone avec fallback SOAP (une seule
+    enveloppe pour toutes les zones sans donnée OpenWeather).
     """
-    measures = []
+    zone_names = list(TUNIS_ZONES_GPS.keys())
+    results = await get_real_time_air_quality_many(zone_names)
     
-    # R├®cup├®rer les donn├®es en temps r├®el pour chaque zone
-    for zone_name, coords in TUNIS_ZONES_GPS.items():
-        try:
-            # Utiliser l'API temps r├®el pour chaque zone
-            air_data = await get_real_time_air_quality(zone_name)
-            
-            measures.append({
-                "id": len(measures) + 1,
-                "station": zone_name,
-                "location": f"GPS: {coords['lat']}, {coords['lon']}",
-                "pm25": air_data["components"].get("pm2_5", 0),
-                "pm10": air_data["components"].get("pm10", 0),
-                "o3": air_data["components"].get("o3", 0),
-                "no2": air_data["components"].get("no2", 0),
-                "co": air_data["components"].get("co", 0),
-                "aqi": air_data["aqi"],
-                "quality": air_data["status"],
-                "source": air_data.get("source", "Unknown")
-            })
-        except Exception as e:
-            print(f"ÔÜá´©Å Erreur pour zone {zone_name}: {e}")
-            # En cas d'erreur, utiliser le fallback SOAP
-            try:
-                wsdl_url = f"{SERVICES['air_quality']}/?wsdl"
-                soap_client = Client(wsdl_url)
-                response = soap_client.service.GetMeasuresByStation(zone_name)
-                if response and len(response) > 0:
-                    measure = response[0]
-                    measures.append({
-                        "id": len(measures) + 1,
-                        "station": measure.station_name,
-                        "location": measure.location,
-                        "pm25": float(measure.pm25),
-                        "pm10": float(measure.pm10),
-                        "o3": float(measure.o3) if measure.o3 else None,
-                        "no2": float(measure.no2) if measure.no2 else None,
-                        "co": float(measure.co) if measure.co else None,
-                        "aqi": measure.aqi,
-                        "quality": measure.status,
-                        "source": "Service SOAP local (fallback)"
-                    })
-            except Exception as soap_error:
-                print(f"ÔÜá´©Å Erreur SOAP fallback pour {zone_name}: {soap_error}")
+    measures = []
+    for zone_name in zone_names:
+        air_data = results[zone_name]
+        coords = TUNIS_ZONES_GPS[zone_name]
+        measures.append({
+            "id": len(measures) + 1,
+            "station": zone_name,
+            "location": f"GPS: {coords['lat']}, {coords['lon']}",
+            "pm25": air_data["components"].get("pm2_5", 0),
+            "pm10": air_data["components"].get("pm10", 0),
+            "o3": air_data["components"].get("o3", 0),
+            "no2": air_data["components"].get("no2", 0),
+            "co": air_data["components"].get("co", 0),
+            "aqi": air_data["aqi"],
+            "quality": air_data["status"],
+            "source": air_data.get("source", "Unknown")
+        })
     
     return measures
 
@@ -449,9 +702,7 @@ async def get_air_quality_measures():
 async def get_all_vehicles():
     """R├®cup├¿re tous les v├®hicules d'urgence via gRPC."""
     try:
-        client = EmergencyClient(SERVICES['emergency'])
-        vehicles = client.get_all_vehicles()
-        client.close()
+        vehicles = await emergency.get_all_vehicles()
         return {"vehicles": vehicles, "count": len(vehicles)}
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Service gRPC indisponible: {str(e)}")
@@ -461,9 +712,7 @@ async def get_all_vehicles():
 async def get_available_vehicles(vehicle_type: str = None):
     """R├®cup├¿re les v├®hicules disponibles via gRPC."""
     try:
-        client = EmergencyClient(SERVICES['emergency'])
-        vehicles = client.get_available_vehicles(vehicle_type)
-        client.close()
+        vehicles = await emergency.get_available_vehicles(vehicle_type)
         return {
             "vehicles": vehicles,
             "count": len(vehicles),
@@ -477,9 +726,7 @@ async def get_available_vehicles(vehicle_type: str = None):
 async def get_active_interventions():
     """R├®cup├¿re les interventions actives via gRPC."""
     try:
-        client = EmergencyClient(SERVICES['emergency'])
-        interventions = client.get_active_interventions()
-        client.close()
+        interventions = await emergency.get_active_interventions()
         return {"interventions": interventions, "count": len(interventions)}
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Service gRPC indisponible: {str(e)}")
@@ -489,10 +736,10 @@ async def get_active_interventions():
 async def get_emergency_info():
     """Informations et statistiques du service gRPC d'urgences."""
     try:
-        client = EmergencyClient(SERVICES['emergency'])
-        vehicles = client.get_all_vehicles()
-        interventions = client.get_active_interventions()
-        client.close()
+        vehicles, interventions = await asyncio.gather(
+            emergency.get_all_vehicles(),
+            emergency.get_active_interventions()
+        )
         
         # Statistiques
         available = len([v for v in vehicles if v['status'] == 'available'])
@@ -586,60 +833,33 @@ async def plan_trip(zone: str = "Tunis Centre-Ville"):
         )
     
     # ├ëtape 3 : R├®cup├®ration des transports disponibles (service REST)
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{SERVICES['transport']}/transports/")
-            all_transports = response.json()
-            
-            # Filtrer uniquement les transports op├®rationnels
-            available_transports = [
-                t for t in all_transports 
-                if t.get("status") == "operationnel"
-            ]
-            
-            # Filtrer strictement par zone g├®ographique
-            # Extraire les mots-cl├®s significatifs de la zone (enlever les mots g├®n├®riques)
-            generic_words = ['tunis', 'centre', 'ville']
-            zone_words = zone.lower().split()
-            zone_keywords = [w for w in zone_words if w not in generic_words]
-            
-            # Si tous les mots sont g├®n├®riques, garder au moins "centre-ville" complet
-            if not zone_keywords and 'centre' in zone_words:
-                zone_keywords = ['centre-ville', 'centre']
-            elif not zone_keywords:
-                zone_keywords = zone_words
-            
-            zone_transports = []
-            
-            for t in available_transports:
-                route_lower = t.get("route", "").lower()
-                
-                # V├®rifier si au moins un mot-cl├® significatif de la zone est dans la route
-                if any(keyword in route_lower for keyword in zone_keywords):
-                    zone_transports.append(t)
-            
-            # Utiliser uniquement les transports de la zone (pas de fallback)
-            filtered_transports = zone_transports
-            
-            # Prioriser selon la qualit├® de l'air
-            if aqi_value > 100:
-                # Mauvaise qualit├® : privil├®gier m├®tro, bus, train (transports ferm├®s)
-                priority_modes = ["M├®tro", "Bus", "Train", "Taxi"]
-                prioritized = [t for t in filtered_transports if t.get("mode") in priority_modes]
-                result["transports"] = prioritized[:5] if prioritized else filtered_transports[:5]
+    try:
+        # Filtrer strictement par zone g├®ographique: transports op├®rationnels
+        # desservant la zone (index zone <-> ligne du service transport)
+        zone_transports = await fetch_all_transports(status="operationnel", zones=[zone])
+        
+        # Utiliser uniquement les transports de la zone (pas de fallback)
+        filtered_transports = zone_transports
+        
+        # Prioriser selon la qualit├® de l'air
+        if aqi_value > 100:
+            # Mauvaise qualit├® : privil├®gier m├®tro, bus, train (transports ferm├®s)
+            priority_modes = ["M├®tro", "Bus", "Train", "Taxi"]
+            prioritized = [t for t in filtered_transports if t.get("mode") in priority_modes]
+            result["transports"] = prioritized[:5] if prioritized else filtered_transports[:5]
+        else:
+            # Bonne qualit├® : tous les transports sont OK, avec pr├®f├®rence pour v├®lo si AQI < 50
+            if aqi_value < 50:
+                # Excellent air : promouvoir v├®lo et marche
+                eco_modes = ["V├®lo", "Bus", "M├®tro", "Train"]
+                prioritized = [t for t in filtered_transports if t.get("mode") in eco_modes]
+                result["transports"] = prioritized[:8] if prioritized else filtered_transports[:8]
             else:
-                # Bonne qualit├® : tous les transports sont OK, avec pr├®f├®rence pour v├®lo si AQI < 50
-                if aqi_value < 50:
-                    # Excellent air : promouvoir v├®lo et marche
-                    eco_modes = ["V├®lo", "Bus", "M├®tro", "Train"]
-                    prioritized = [t for t in filtered_transports if t.get("mode") in eco_modes]
-                    result["transports"] = prioritized[:8] if prioritized else filtered_transports[:8]
-                else:
-                    result["transports"] = filtered_transports[:8]
-                
-        except Exception as e:
-            result["transports_error"] = f"Service transport indisponible: {str(e)}"
-            result["transports"] = []
+                result["transports"] = filtered_transports[:8]
+            
+    except Exception as e:
+        result["transports_error"] = f"Service transport indisponible: {str(e)}"
+        result["transports"] = []
     
     result["orchestration"] = {
         "services_called": ["air_quality (SOAP)", "transport (REST)"],
@@ -694,6 +914,24 @@ async def get_real_time_air(zone: str = "Tunis Centre-Ville"):
     }
 
 
+@app.get("/api/air-quality/cache-stats")
+async def get_air_quality_cache_stats():
+    """Compteurs du cache de qualit├® d'air (hits, misses, rafra├«chissements)."""
+    return air_quality_cache.stats()
+
+
+@app.get("/api/gateway/coalescing-stats")
+async def get_coalescing_stats():
+    """M├®triques de regroupement des appels amont identiques (single-flight)."""
+    return upstream.singleflight.stats()
+
+
+@app.get("/api/gateway/conditional-stats")
+async def get_conditional_stats():
+    """Revalidations ETag vers les services amont (r├®ponses 304 r├®utilis├®es)."""
+    return upstream.conditional.stats()
+
+
 @app.get("/api/orchestration/tourist-day")
 async def plan_tourist_day(zone: str = "Centre-Ville"):
     """
@@ -713,13 +951,11 @@ async def plan_tourist_day(zone: str = "Centre-Ville"):
     
     # ├ëtape 1: V├®rifier la qualit├® de l'air
     try:
-        wsdl_url = f"{SERVICES['air_quality']}/?wsdl"
-        soap_client = Client(wsdl_url)
-        measures = soap_client.service.GetMeasuresByStation(zone)
+        measure = (await get_latest_station_measures([zone])).get(zone)
         
-        if measures and len(measures) > 0:
-            aqi_value = measures[0].aqi
-            air_status = measures[0].status
+        if measure is not None:
+            aqi_value = measure.aqi
+            air_status = measure.status
         else:
             aqi_value = 75
             air_status = "Donn├®es non disponibles"
@@ -743,44 +979,41 @@ async def plan_tourist_day(zone: str = "Centre-Ville"):
     }
     """
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{SERVICES['tourism']}/graphql",
-                json={"query": query}
-            )
-            data = response.json()
-            if "data" in data and "attractions" in data["data"]:
-                all_attractions = data["data"]["attractions"]
-                # Filtrer selon la qualit├® de l'air
-                if aqi_value > 100:
-                    # Mauvaise qualit├®: privil├®gier attractions en int├®rieur
-                    indoor_categories = ["Mus├®e", "Monument", "Culture"]
-                    result["attractions"] = [a for a in all_attractions if a.get("category") in indoor_categories][:5]
-                    result["recommendation"] = f"ÔÜá´©Å AQI ├®lev├® ({aqi_value}). Privil├®giez les visites en int├®rieur (mus├®es, monuments)."
-                else:
-                    # Bonne qualit├®: toutes les attractions
-                    result["attractions"] = sorted(all_attractions, key=lambda x: x.get("rating", 0), reverse=True)[:8]
-                    result["recommendation"] = f"Ô£à Bonne qualit├® d'air ({aqi_value}). Profitez des parcs et activit├®s ext├®rieures !"
-        except Exception as e:
-            result["attractions_error"] = str(e)
-        
-        # ├ëtape 3: Sugg├®rer un transport adapt├®
-        try:
-            response = await client.get(f"{SERVICES['transport']}/transports/")
-            transports = response.json()
-            available = [t for t in transports if t.get("status") == "operationnel"]
-            
+    try:
+        response = await upstream.request(
+            "tourism", "POST", f"{SERVICES['tourism']}/graphql",
+            json_body={"query": query}, coalesce=True
+        )
+        data = response.json()
+        if "data" in data and "attractions" in data["data"]:
+            all_attractions = data["data"]["attractions"]
+            # Filtrer selon la qualit├® de l'air
             if aqi_value > 100:
-                # Privil├®gier m├®tro/bus ferm├®s
-                priority = next((t for t in available if t.get("mode") in ["M├®tro", "Bus"]), None)
+                # Mauvaise qualit├®: privil├®gier attractions en int├®rieur
+                indoor_categories = ["Mus├®e", "Monument", "Culture"]
+                result["attractions"] = [a for a in all_attractions if a.get("category") in indoor_categories][:5]
+                result["recommendation"] = f"ÔÜá´©Å AQI ├®lev├® ({aqi_value}). Privil├®giez les visites en int├®rieur (mus├®es, monuments)."
             else:
-                # Sugg├®rer v├®lo pour balade
-                priority = next((t for t in available if t.get("mode") == "V├®lo"), None)
-            
-            result["suggested_transport"] = priority if priority else available[0] if available else {}
-        except Exception as e:
-            result["transport_error"] = str(e)
+                # Bonne qualit├®: toutes les attractions
+                result["attractions"] = sorted(all_attractions, key=lambda x: x.get("rating", 0), reverse=True)[:8]
+                result["recommendation"] = f"Ô£à Bonne qualit├® d'air ({aqi_value}). Profitez des parcs et activit├®s ext├®rieures !"
+    except Exception as e:
+        result["attractions_error"] = str(e)
+    
+    # ├ëtape 3: Sugg├®rer un transport adapt├®
+    try:
+        available = await fetch_all_transports(status="operationnel")
+        
+        if aqi_value > 100:
+            # Privil├®gier m├®tro/bus ferm├®s
+            priority = next((t for t in available if t.get("mode") in ["M├®tro", "Bus"]), None)
+        else:
+            # Sugg├®rer v├®lo pour balade
+            priority = next((t for t in available if t.get("mode") == "V├®lo"), None)
+        
+        result["suggested_transport"] = priority if priority else available[0] if available else {}
+    except Exception as e:
+        result["transport_error"] = str(e)
     
     # ├ëtape 4: Cr├®er un plan de journ├®e
     result["day_plan"] = {
@@ -818,15 +1051,13 @@ async def emergency_response(zone: str, emergency_type: str = "medical"):
     
     # ├ëtape 1: V├®rifier la qualit├® de l'air (important pour urgences m├®dicales)
     try:
-        wsdl_url = f"{SERVICES['air_quality']}/?wsdl"
-        soap_client = Client(wsdl_url)
-        measures = soap_client.service.GetMeasuresByStation(zone)
+        measure = (await get_latest_station_measures([zone])).get(zone)
         
-        if measures and len(measures) > 0:
-            aqi_value = measures[0].aqi
+        if measure is not None:
+            aqi_value = measure.aqi
             result["air_quality"] = {
                 "aqi": aqi_value,
-                "status": measures[0].status,
+                "status": measure.status,
                 "alert": "ÔÜá´©Å Qualit├® d'air mauvaise - masques recommand├®s" if aqi_value > 100 else "Ô£à Air respirable"
             }
     except Exception as e:
@@ -834,8 +1065,6 @@ async def emergency_response(zone: str, emergency_type: str = "medical"):
     
     # ├ëtape 2: Informations sur les v├®hicules d'urgence (gRPC R├ëEL)
     try:
-        grpc_client = EmergencyClient(SERVICES['emergency'])
-        
         # Mapper le type d'urgence au type de v├®hicule
         vehicle_type_map = {
             "medical": "ambulance",
@@ -846,7 +1075,7 @@ async def emergency_response(zone: str, emergency_type: str = "medical"):
         needed_vehicle_type = vehicle_type_map.get(emergency_type, "ambulance")
         
         # R├®cup├®rer v├®hicules disponibles du bon type
-        available_vehicles = grpc_client.get_available_vehicles(needed_vehicle_type)
+        available_vehicles = await emergency.get_available_vehicles(needed_vehicle_type)
         
         if available_vehicles:
             vehicle = available_vehicles[0]  # Premier disponible
@@ -869,8 +1098,6 @@ async def emergency_response(zone: str, emergency_type: str = "medical"):
                 "message": f"Aucun v├®hicule de type {needed_vehicle_type} disponible",
                 "source": "gRPC - Donn├®es r├®elles"
             }
-        
-        grpc_client.close()
     except Exception as e:
         result["emergency_vehicles"] = {
             "error": f"Service gRPC indisponible: {str(e)}",
@@ -878,20 +1105,16 @@ async def emergency_response(zone: str, emergency_type: str = "medical"):
         }
     
     # ├ëtape 3: Impact sur les transports en commun
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{SERVICES['transport']}/transports/")
-            transports = response.json()
-            
-            # Simuler l'impact: certains transports doivent ├¬tre d├®tourn├®s
-            affected = [t for t in transports if zone.lower() in t.get("route", "").lower()]
-            result["traffic_impact"] = {
-                "affected_lines": len(affected),
-                "lines": [{"mode": t.get("mode"), "route": t.get("route")} for t in affected],
-                "action": "D├®viation temporaire pendant l'intervention"
-            }
-        except Exception as e:
-            result["traffic_impact"] = {"error": str(e)}
+    try:
+        # Simuler l'impact: certains transports doivent ├¬tre d├®tourn├®s
+        affected = await fetch_all_transports(zones=[zone])
+        result["traffic_impact"] = {
+            "affected_lines": len(affected),
+            "lines": [{"mode": t.get("mode"), "route": t.get("route")} for t in affected],
+            "action": "D├®viation temporaire pendant l'intervention"
+        }
+    except Exception as e:
+        result["traffic_impact"] = {"error": str(e)}
     
     # ├ëtape 4: Recommandations coordonn├®es
     result["recommendations"] = [
@@ -933,72 +1156,63 @@ async def plan_eco_route(start_zone: str, end_zone: str):
     zones_to_check = [start_zone, end_zone, "Centre-Ville"]  # Zones interm├®diaires
     air_quality_data = {}
     
-    # ├ëtape 1: Analyser la qualit├® de l'air sur plusieurs zones
+    # ├ëtape 1: Analyser la qualit├® de l'air sur plusieurs zones (une seule requ├¬te SOAP)
     try:
-        wsdl_url = f"{SERVICES['air_quality']}/?wsdl"
-        soap_client = Client(wsdl_url)
+        latest_by_zone = await get_latest_station_measures(zones_to_check)
         
         for zone in zones_to_check:
-            try:
-                measures = soap_client.service.GetMeasuresByStation(zone)
-                if measures and len(measures) > 0:
-                    air_quality_data[zone] = {
-                        "aqi": measures[0].aqi,
-                        "status": measures[0].status
-                    }
-            except:
-                air_quality_data[zone] = {"aqi": 75, "status": "Non disponible"}
+            measure = latest_by_zone.get(zone)
+            if measure is not None:
+                air_quality_data[zone] = {
+                    "aqi": measure.aqi,
+                    "status": measure.status
+                }
     except Exception as e:
         result["air_quality_error"] = str(e)
+        air_quality_data = {zone: {"aqi": 75, "status": "Non disponible"} for zone in zones_to_check}
     
     result["route_analysis"] = air_quality_data
     
     # ├ëtape 2: R├®cup├®rer les transports ├®cologiques
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{SERVICES['transport']}/transports/")
-            transports = response.json()
-            
-            # Filtrer par transports ├®cologiques
-            eco_transports = [t for t in transports 
-                            if t.get("status") == "operationnel" 
-                            and t.get("mode") in ["V├®lo", "M├®tro", "Tramway"]]
-            
-            # Calculer le score ├®cologique
-            avg_aqi = sum(aq.get("aqi", 75) for aq in air_quality_data.values()) / len(air_quality_data)
-            eco_bonus = 10 if len(eco_transports) > 0 else 0
-            pollution_penalty = -20 if avg_aqi > 100 else 0
-            result["eco_score"] = max(0, 100 + eco_bonus + pollution_penalty - int(avg_aqi/5))
-            
-            result["recommended_path"] = [
-                {"step": 1, "zone": start_zone, "aqi": air_quality_data.get(start_zone, {}).get("aqi", "N/A")},
-                {"step": 2, "zone": "Centre-Ville", "aqi": air_quality_data.get("Centre-Ville", {}).get("aqi", "N/A"), 
-                 "action": f"Utiliser {eco_transports[0].get('mode')} {eco_transports[0].get('route')}" if eco_transports else "Marcher"},
-                {"step": 3, "zone": end_zone, "aqi": air_quality_data.get(end_zone, {}).get("aqi", "N/A")}
-            ]
-            
-            # Proposer des alternatives
-            result["alternatives"] = [
-                {
-                    "name": "Route directe (rapide)",
-                    "duration": "15 min",
-                    "eco_score": result["eco_score"] - 20,
-                    "note": "Plus rapide mais traverse zones pollu├®es"
-                },
-                {
-                    "name": "Route ├®cologique (recommand├®e)",
-                    "duration": "25 min",
-                    "eco_score": result["eco_score"],
-                    "note": "├ëvite les zones ├á AQI ├®lev├®"
-                }
-            ]
-            
-        except Exception as e:
-            result["transport_error"] = str(e)
+    try:
+        # Transports ├®cologiques op├®rationnels (filtr├®s par le service transport)
+        eco_transports = await fetch_all_transports(status="operationnel", modes=["V├®lo", "M├®tro", "Tramway"])
+        
+        # Calculer le score ├®cologique
+        avg_aqi = sum(aq.get("aqi", 75) for aq in air_quality_data.values()) / len(air_quality_data)
+        eco_bonus = 10 if len(eco_transports) > 0 else 0
+        pollution_penalty = -20 if avg_aqi > 100 else 0
+        result["eco_score"] = max(0, 100 + eco_bonus + pollution_penalty - int(avg_aqi/5))
+        
+        result["recommended_path"] = [
+            {"step": 1, "zone": start_zone, "aqi": air_quality_data.get(start_zone, {}).get("aqi", "N/A")},
+            {"step": 2, "zone": "Centre-Ville", "aqi": air_quality_data.get("Centre-Ville", {}).get("aqi", "N/A"), 
+             "action": f"Utiliser {eco_transports[0].get('mode')} {eco_transports[0].get('route')}" if eco_transports else "Marcher"},
+            {"step": 3, "zone": end_zone, "aqi": air_quality_data.get(end_zone, {}).get("aqi", "N/A")}
+        ]
+        
+        # Proposer des alternatives
+        result["alternatives"] = [
+            {
+                "name": "Route directe (rapide)",
+                "duration": "15 min",
+                "eco_score": result["eco_score"] - 20,
+                "note": "Plus rapide mais traverse zones pollu├®es"
+            },
+            {
+                "name": "Route ├®cologique (recommand├®e)",
+                "duration": "25 min",
+                "eco_score": result["eco_score"],
+                "note": "├ëvite les zones ├á AQI ├®lev├®"
+            }
+        ]
+        
+    except Exception as e:
+        result["transport_error"] = str(e)
     
     result["orchestration"] = {
         "services_called": ["air_quality (SOAP - multiple zones)", "transport (REST)", "tourism (GraphQL optional)"],
-        "workflow": "SOAP:GetMultipleAQI ÔåÆ analyze_pollution_zones ÔåÆ REST:GetEcoTransports ÔåÆ calculate_best_path",
+        "workflow": "SOAP:GetLatestMeasures ÔåÆ analyze_pollution_zones ÔåÆ REST:GetEcoTransports ÔåÆ calculate_best_path",
         "optimization": "eco_score",
         "success": True
     }
@@ -1006,13 +1220,128 @@ async def plan_eco_route(start_zone: str, end_zone: str):
     return result
 
 
-@app.get("/api/orchestration/city-dashboard")
-async def get_city_dashboard():
+# ============================================
+# TABLEAU DE BORD - BRANCHES PARALL├êLES
+# ============================================
+
+# Budget de temps (secondes) de chaque branche du tableau de bord
+DASHBOARD_BRANCH_TIMEOUTS = {
+    "transport": float(os.getenv("DASHBOARD_TIMEOUT_TRANSPORT", "2.0")),
+    "air_quality": float(os.getenv("DASHBOARD_TIMEOUT_AIR_QUALITY", "4.0")),
+    "tourism": float(os.getenv("DASHBOARD_TIMEOUT_TOURISM", "2.0")),
+    "emergency": float(os.getenv("DASHBOARD_TIMEOUT_EMERGENCY", "2.0")),
+}
+
+
+async def _run_dashboard_branch(name: str, branch) -> tuple:
+    """
+    Ex├®cute une branche du tableau de bord dans son budget de temps.
+    Retourne (nom, section, alertes, statut de la branche); une branche en ├®chec
+    ou hors d├®lai n'emp├¬che pas les autres de r├®pondre.
+    """
+    timeout = DASHBOARD_BRANCH_TIMEOUTS[name]
+    started = time.perf_counter()
+    try:
+        section, alerts = await asyncio.wait_for(branch(), timeout=timeout)
+        branch_status = {"status": "ok"}
+    except asyncio.TimeoutError:
+        section, alerts = {"status": "ÔØî D├®lai d├®pass├®"}, []
+        branch_status = {"status": "timeout"}
+    except Exception as e:
+        print(f"ÔÜá´©Å Erreur branche {name} du tableau de bord: {e}")
+        section, alerts = {"status": "ÔØî Service indisponible", "error": str(e)}, []
+        branch_status = {"status": "error", "error": str(e)}
+    branch_status["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    branch_status["timeout_s"] = timeout
+    return name, section, alerts, branch_status
+
+
+async def _dashboard_transport() -> tuple:
+    """Branche 1: Transport (REST)."""
+    transports = await fetch_all_transports()
+    operational = len([t for t in transports if t.get("status") == "operationnel"])
+    total = len(transports)
+    section = {
+        "total_lines": total,
+        "operational": operational,
+        "status": "Ô£à Normal" if operational/total > 0.8 else "ÔÜá´©Å Perturbations",
+        "availability": f"{int(operational/total*100)}%"
+    }
+    return section, []
+
+
+async def _dashboard_air_quality() -> tuple:
+    """Branche 2: Qualit├® de l'air (TEMPS R├ëEL - OpenWeatherMap), toutes les zones en parall├¿le."""
+    results = await get_real_time_air_quality_many(TUNIS_ZONES_GPS.keys())
+    all_aqi_values = [r["aqi"] for r in results.values()]
+    
+    if not all_aqi_values:
+        return {"status": "ÔØî Donn├®es non disponibles"}, []
+    
+    avg_aqi = sum(all_aqi_values) / len(all_aqi_values)
+    bad_zones = len([aqi for aqi in all_aqi_values if aqi > 100])
+    section = {
+        "average_aqi": int(avg_aqi),
+        "status": "Ô£à Bon" if avg_aqi < 50 else "ÔÜá´©Å Mod├®r├®" if avg_aqi < 100 else "­ƒö┤ Mauvais",
+        "zones_monitored": len(all_aqi_values),
+        "polluted_zones": bad_zones,
+        "source": "OpenWeatherMap API (temps r├®el)"
+    }
+    alerts = [f"ÔÜá´©Å {bad_zones} zone(s) avec pollution ├®lev├®e"] if bad_zones > 0 else []
+    return section, alerts
+
+
+async def _dashboard_tourism() -> tuple:
+    """Branche 3: Tourisme (GraphQL)."""
+    query = '{ attractions { id name isOpen } }'
+    response = await upstream.request(
+        "tourism", "POST", f"{SERVICES['tourism']}/graphql",
+        json_body={"query": query}, coalesce=True
+    )
+    data = response.json()
+    if "data" not in data:
+        return {}, []
+    attractions = data["data"]["attractions"]
+    open_count = len([a for a in attractions if a.get("isOpen") == "open"])
+    section = {
+        "total_attractions": len(attractions),
+        "currently_open": open_count,
+        "status": "Ô£à Actif",
+        "occupancy": f"{int(open_count/len(attractions)*100)}%"
+    }
+    return section, []
+
+
+async def _dashboard_emergency() -> tuple:
+    """Branche 4: Urgences (gRPC R├ëEL)."""
+    vehicles, interventions = await asyncio.gather(
+        emergency.get_all_vehicles(),
+        emergency.get_active_interventions()
+    )
+    
+    available = len([v for v in vehicles if v['status'] == 'available'])
+    on_mission = len([v for v in vehicles if v['status'] == 'on_mission'])
+    
+    section = {
+        "status": "Ô£à Op├®rationnel" if available > 0 else "ÔÜá´©Å Tous v├®hicules en mission",
+        "active_interventions": len(interventions),
+        "total_vehicles": len(vehicles),
+        "available_vehicles": available,
+        "on_mission": on_mission,
+        "response_time_avg": "3-5 min",
+        "source": "gRPC - Donn├®es r├®elles"
+    }
+    alerts = [f"­ƒÜ¿ {len(interventions)} interventions actives"] if len(interventions) > 2 else []
+    return section, alerts
+
+
+async def build_city_dashboard():
     """
     Sc├®nario 5: Tableau de bord complet de la ville
     Orchestre: TOUS les services (REST + SOAP + GraphQL + gRPC)
     
     Cas d'usage: Vue d'ensemble temps r├®el de l'├®tat de la Smart City
+    Appel├® par le planificateur de l'instantan├® (voir get_city_dashboard).
     """
     from datetime import datetime
     
@@ -1026,106 +1355,20 @@ async def get_city_dashboard():
         "alerts": []
     }
     
-    async with httpx.AsyncClient() as client:
-        # Service 1: Transport (REST)
-        try:
-            response = await client.get(f"{SERVICES['transport']}/transports/")
-            transports = response.json()
-            operational = len([t for t in transports if t.get("status") == "operationnel"])
-            total = len(transports)
-            dashboard["transport"] = {
-                "total_lines": total,
-                "operational": operational,
-                "status": "Ô£à Normal" if operational/total > 0.8 else "ÔÜá´©Å Perturbations",
-                "availability": f"{int(operational/total*100)}%"
-            }
-        except:
-            dashboard["transport"] = {"status": "ÔØî Service indisponible"}
-        
-        # Service 2: Qualit├® de l'air (TEMPS R├ëEL - OpenWeatherMap)
-        try:
-            # R├®cup├®rer les donn├®es en temps r├®el pour toutes les zones
-            all_aqi_values = []
-            zones_monitored = 0
-            bad_zones = 0
-            
-            for zone_name in TUNIS_ZONES_GPS.keys():
-                try:
-                    air_data = await get_real_time_air_quality(zone_name)
-                    aqi = air_data["aqi"]
-                    all_aqi_values.append(aqi)
-                    zones_monitored += 1
-                    if aqi > 100:
-                        bad_zones += 1
-                except:
-                    continue
-            
-            if all_aqi_values:
-                avg_aqi = sum(all_aqi_values) / len(all_aqi_values)
-                
-                dashboard["air_quality"] = {
-                    "average_aqi": int(avg_aqi),
-                    "status": "Ô£à Bon" if avg_aqi < 50 else "ÔÜá´©Å Mod├®r├®" if avg_aqi < 100 else "­ƒö┤ Mauvais",
-                    "zones_monitored": zones_monitored,
-                    "polluted_zones": bad_zones,
-                    "source": "OpenWeatherMap API (temps r├®el)"
-                }
-                
-                if bad_zones > 0:
-                    dashboard["alerts"].append(f"ÔÜá´©Å {bad_zones} zone(s) avec pollution ├®lev├®e")
-            else:
-                dashboard["air_quality"] = {"status": "ÔØî Donn├®es non disponibles"}
-        except Exception as e:
-            print(f"ÔÜá´©Å Erreur r├®cup├®ration qualit├® air dashboard: {e}")
-            dashboard["air_quality"] = {"status": "ÔØî Service indisponible"}
-        
-        # Service 3: Tourisme (GraphQL)
-        try:
-            query = '{ attractions { id name isOpen } }'
-            response = await client.post(
-                f"{SERVICES['tourism']}/graphql",
-                json={"query": query}
-            )
-            data = response.json()
-            if "data" in data:
-                attractions = data["data"]["attractions"]
-                open_count = len([a for a in attractions if a.get("isOpen") == "open"])
-                dashboard["tourism"] = {
-                    "total_attractions": len(attractions),
-                    "currently_open": open_count,
-                    "status": "Ô£à Actif",
-                    "occupancy": f"{int(open_count/len(attractions)*100)}%"
-                }
-        except:
-            dashboard["tourism"] = {"status": "ÔØî Service indisponible"}
-        
-        # Service 4: Urgences (gRPC R├ëEL)
-        try:
-            grpc_client = EmergencyClient(SERVICES['emergency'])
-            vehicles = grpc_client.get_all_vehicles()
-            interventions = grpc_client.get_active_interventions()
-            grpc_client.close()
-            
-            available = len([v for v in vehicles if v['status'] == 'available'])
-            on_mission = len([v for v in vehicles if v['status'] == 'on_mission'])
-            
-            dashboard["emergency"] = {
-                "status": "Ô£à Op├®rationnel" if available > 0 else "ÔÜá´©Å Tous v├®hicules en mission",
-                "active_interventions": len(interventions),
-                "total_vehicles": len(vehicles),
-                "available_vehicles": available,
-                "on_mission": on_mission,
-                "response_time_avg": "3-5 min",
-                "source": "gRPC - Donn├®es r├®elles"
-            }
-            
-            if len(interventions) > 2:
-                dashboard["alerts"].append(f"­ƒÜ¿ {len(interventions)} interventions actives")
-        except Exception as e:
-            dashboard["emergency"] = {
-                "status": "ÔØî Service indisponible",
-                "error": str(e)
-            }
+    # Les 4 services sont interrog├®s en parall├¿le, chacun avec son propre budget de temps
+    branches = await asyncio.gather(
+        _run_dashboard_branch("transport", _dashboard_transport),
+        _run_dashboard_branch("air_quality", _dashboard_air_quality),
+        _run_dashboard_branch("tourism", _dashboard_tourism),
+        _run_dashboard_branch("emergency", _dashboard_emergency)
+    )
+    
+    dashboard["branches"] = {}
+    for name, section, alerts, branch_status in branches:
+        dashboard[name] = section
+        dashboard["alerts"].extend(alerts)
+        dashboard["branches"][name] = branch_status
+    dashboard["partial"] = any(b["status"] != "ok" for b in dashboard["branches"].values())
     
     # Analyse globale de la ville
     # V├®rifier si les services sont op├®rationnels (pas d'erreur et donn├®es pr├®sentes)
@@ -1156,6 +1399,116 @@ async def get_city_dashboard():
     return dashboard
 
 
+# Instantan├® du tableau de bord reconstruit en t├óche de fond
+dashboard_snapshot = SnapshotStore(
+    build_city_dashboard,
+    interval=float(os.getenv("DASHBOARD_REFRESH_INTERVAL", "30"))
+)
+
+# Canal temps r├®el (SSE): chaque rafra├«chissement amont est diffus├® ├á tous les abonn├®s
+events = EventBroadcaster(queue_size=int(os.getenv("SSE_QUEUE_SIZE", "100")))
+fleet_watcher = FleetWatcher(emergency, events, interval=float(os.getenv("FLEET_POLL_INTERVAL", "1")))
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+
+# Champs qui changent ├á chaque reconstruction sans que le contenu change
+DASHBOARD_VOLATILE_KEYS = ("timestamp", "snapshot", "branches")
+
+
+def publish_dashboard_diff(previous: Optional[Dict[str, Any]], current: Dict[str, Any]):
+    """Publie les sections du tableau de bord modifi├®es depuis l'instantan├® pr├®c├®dent."""
+    changes = {
+        key: value for key, value in current.items()
+        if key not in DASHBOARD_VOLATILE_KEYS and (previous is None or previous.get(key) != value)
+    }
+    if changes:
+        events.publish("dashboard", {"snapshot": current["snapshot"], "changes": changes})
+
+
+dashboard_snapshot.add_listener(publish_dashboard_diff)
+
+
+@app.get("/api/orchestration/city-dashboard")
+async def get_city_dashboard(fresh: bool = False, user: Optional[dict] = Depends(get_current_user_optional)):
+    """
+    Tableau de bord de la ville servi depuis l'instantan├® en m├®moire.
+    
+    L'instantan├® (version + date de g├®n├®ration dans "snapshot") est reconstruit
+    toutes les DASHBOARD_REFRESH_INTERVAL secondes: le co├╗t d'une lecture ne d├®pend
+    pas du nombre d'├®crans ouverts.
+    fresh=true force une reconstruction synchrone. [ADMIN ONLY]
+    """
+    if fresh:
+        if user is None:
+            raise HTTPException(
+                status_code=401,
+                detail="Authentification requise pour fresh=true",
+                headers={"WWW-Authenticate": "Basic"}
+            )
+        if user["role"] != "admin":
+            raise HTTPException(status_code=403, detail="Acc├¿s r├®serv├® aux administrateurs")
+        return await dashboard_snapshot.rebuild()
+    return await dashboard_snapshot.get()
+
+
+@app.get("/api/stream/events")
+async def stream_events(request: Request):
+    """
+    Flux Server-Sent Events (text/event-stream) pour le client Web.
+    
+    ├Ç la connexion: ├®tat complet ("dashboard" puis "fleet"), ensuite uniquement
+    les changements:
+    - dashboard: sections du tableau de bord modifi├®es ├á chaque instantan├®
+    - vehicle_status: changement de statut d'un v├®hicule d'urgence
+    - intervention / intervention_closed: interventions actives ajout├®es, modifi├®es ou termin├®es
+    Un seul appel amont par rafra├«chissement, quel que soit le nombre de clients connect├®s.
+    """
+    queue = events.subscribe()
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            try:
+                dashboard = await dashboard_snapshot.get()
+                yield format_sse("dashboard", {"snapshot": dashboard["snapshot"], "changes": dashboard})
+            except Exception as e:
+                yield format_sse("dashboard_error", {"error": str(e)})
+            try:
+                yield format_sse("fleet", await fleet_watcher.state())
+            except Exception as e:
+                yield format_sse("fleet_error", {"error": f"Service gRPC indisponible: {str(e)}"})
+
+            while True:
+                try:
+                    event_id, event, data = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    # Commentaire SSE: maintient la connexion ouverte ├á travers les proxys
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event, data, event_id)
+        finally:
+            events.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/stream/stats")
+async def get_stream_stats():
+    """Abonn├®s SSE connect├®s, ├®v├®nements diffus├®s et appels de surveillance de la flotte."""
+    return {
+        **events.stats(),
+        "fleet_polls": fleet_watcher.polls,
+        "fleet_errors": fleet_watcher.errors,
+        "fleet_last_error": fleet_watcher.last_error,
+        "fleet_poll_interval_seconds": fleet_watcher.interval
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     print("­ƒîÉ API Gateway - Smart City")
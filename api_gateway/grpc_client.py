@@ -9,6 +9,56 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'proto'))
 import emergency_pb2
 import emergency_pb2_grpc
 
+from metrics import track_upstream
+
+# Délai maximal (secondes) accordé à chaque appel gRPC
+GRPC_DEADLINE = float(os.getenv("GRPC_DEADLINE", "3"))
+
+# Keepalive HTTP/2: détecte les connexions mortes sans attendre un appel
+GRPC_CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', int(os.getenv("GRPC_KEEPALIVE_TIME_MS", "30000"))),
+    ('grpc.keepalive_timeout_ms', int(os.getenv("GRPC_KEEPALIVE_TIMEOUT_MS", "10000"))),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+    # Reconnexion automatique rapide après une coupure
+    ('grpc.initial_reconnect_backoff_ms', 500),
+    ('grpc.max_reconnect_backoff_ms', 5000),
+]
+
+
+def _vehicle_to_dict(v, with_created_at=True):
+    """Convertit un message Vehicle en dictionnaire."""
+    vehicle = {
+        'id': v.id,
+        'vehicle_type': v.vehicle_type,
+        'identifier': v.identifier,
+        'status': v.status,
+        'latitude': v.latitude,
+        'longitude': v.longitude,
+        'station': v.station,
+        'crew_size': v.crew_size
+    }
+    if with_created_at:
+        vehicle['created_at'] = v.created_at
+    return vehicle
+
+
+def _intervention_to_dict(i):
+    """Convertit un message Intervention en dictionnaire."""
+    return {
+        'id': i.id,
+        'intervention_type': i.intervention_type,
+        'priority': i.priority,
+        'address': i.address,
+        'latitude': i.latitude,
+        'longitude': i.longitude,
+        'status': i.status,
+        'assigned_vehicle_id': i.assigned_vehicle_id if i.assigned_vehicle_id > 0 else None,
+        'description': i.description,
+        'created_at': i.created_at,
+        'completed_at': i.completed_at if i.completed_at else None
+    }
+
 
 class EmergencyClient:
     """Client pour communiquer avec le service gRPC d'urgence."""
@@ -39,20 +89,7 @@ class EmergencyClient:
             request = emergency_pb2.Empty()
             response = self.stub.GetAllVehicles(request)
             
-            vehicles = []
-            for v in response.vehicles:
-                vehicles.append({
-                    'id': v.id,
-                    'vehicle_type': v.vehicle_type,
-                    'identifier': v.identifier,
-                    'status': v.status,
-                    'latitude': v.latitude,
-                    'longitude': v.longitude,
-                    'station': v.station,
-                    'crew_size': v.crew_size,
-                    'created_at': v.created_at
-                })
-            return vehicles
+            return [_vehicle_to_dict(v) for v in response.vehicles]
         except grpc.RpcError as e:
             raise Exception(f"Erreur gRPC: {e.code()} - {e.details()}")
     
@@ -63,19 +100,7 @@ class EmergencyClient:
             request = emergency_pb2.VehicleTypeRequest(vehicle_type=vehicle_type or "")
             response = self.stub.GetAvailableVehicles(request)
             
-            vehicles = []
-            for v in response.vehicles:
-                vehicles.append({
-                    'id': v.id,
-                    'vehicle_type': v.vehicle_type,
-                    'identifier': v.identifier,
-                    'status': v.status,
-                    'latitude': v.latitude,
-                    'longitude': v.longitude,
-                    'station': v.station,
-                    'crew_size': v.crew_size
-                })
-            return vehicles
+            return [_vehicle_to_dict(v, with_created_at=False) for v in response.vehicles]
         except grpc.RpcError as e:
             raise Exception(f"Erreur gRPC: {e.code()} - {e.details()}")
     
@@ -134,22 +159,7 @@ class EmergencyClient:
             request = emergency_pb2.Empty()
             response = self.stub.GetActiveInterventions(request)
             
-            interventions = []
-            for i in response.interventions:
-                interventions.append({
-                    'id': i.id,
-                    'intervention_type': i.intervention_type,
-                    'priority': i.priority,
-                    'address': i.address,
-                    'latitude': i.latitude,
-                    'longitude': i.longitude,
-                    'status': i.status,
-                    'assigned_vehicle_id': i.assigned_vehicle_id if i.assigned_vehicle_id > 0 else None,
-                    'description': i.description,
-                    'created_at': i.created_at,
-                    'completed_at': i.completed_at if i.completed_at else None
-                })
-            return interventions
+            return [_intervention_to_dict(i) for i in response.interventions]
         except grpc.RpcError as e:
             raise Exception(f"Erreur gRPC: {e.code()} - {e.details()}")
     
@@ -196,3 +206,113 @@ class EmergencyClient:
             }
         except grpc.RpcError as e:
             raise Exception(f"Erreur gRPC: {e.code()} - {e.details()}")
+
+
+class AsyncEmergencyClient:
+    """
+    Client gRPC asyncio (grpc.aio) partagé par toute la Gateway.
+
+    Un seul canal longue durée est ouvert au démarrage: grpc gère lui-même la
+    reconnexion, le keepalive détecte les coupures et chaque appel porte un délai.
+    """
+
+    def __init__(self, host='service-grpc:50051', deadline=GRPC_DEADLINE, options=None):
+        """Initialise le client (le canal est ouvert par connect)."""
+        self.host = host
+        self.deadline = deadline
+        self.options = options if options is not None else GRPC_CHANNEL_OPTIONS
+        self.channel = None
+        self.stub = None
+
+    def connect(self):
+        """Ouvre le canal partagé (doit être appelé depuis la boucle asyncio)."""
+        if not self.channel:
+            self.channel = grpc.aio.insecure_channel(self.host, options=self.options)
+            self.stub = emergency_pb2_grpc.EmergencyServiceStub(self.channel)
+
+    async def close(self):
+        """Ferme le canal partagé."""
+        if self.channel:
+            await self.channel.close()
+            self.channel = None
+            self.stub = None
+
+    async def _call(self, method, request, not_found_ok=False):
+        """
+        Appelle une méthode du stub avec le délai configuré.
+        Avec not_found_ok, un NOT_FOUND retourne None au lieu de lever une erreur.
+        """
+        self.connect()
+        try:
+            with track_upstream("emergency", method):
+                return await getattr(self.stub, method)(request, timeout=self.deadline)
+        except grpc.aio.AioRpcError as e:
+            if not_found_ok and e.code() == grpc.StatusCode.NOT_FOUND:
+                return None
+            raise Exception(f"Erreur gRPC: {e.code()} - {e.details()}")
+
+    async def get_all_vehicles(self):
+        """Récupère tous les véhicules."""
+        response = await self._call('GetAllVehicles', emergency_pb2.Empty())
+        return [_vehicle_to_dict(v) for v in response.vehicles]
+
+    async def get_available_vehicles(self, vehicle_type=None):
+        """Récupère les véhicules disponibles, optionnellement par type."""
+        request = emergency_pb2.VehicleTypeRequest(vehicle_type=vehicle_type or "")
+        response = await self._call('GetAvailableVehicles', request)
+        return [_vehicle_to_dict(v, with_created_at=False) for v in response.vehicles]
+
+    async def get_vehicle(self, vehicle_id):
+        """Récupère un véhicule par ID."""
+        response = await self._call('GetVehicle', emergency_pb2.VehicleRequest(id=vehicle_id), not_found_ok=True)
+        return _vehicle_to_dict(response) if response is not None else None
+
+    async def update_vehicle_status(self, vehicle_id, new_status, latitude=0.0, longitude=0.0):
+        """Met à jour le statut d'un véhicule."""
+        request = emergency_pb2.StatusUpdate(
+            vehicle_id=vehicle_id,
+            new_status=new_status,
+            latitude=latitude,
+            longitude=longitude
+        )
+        response = await self._call('UpdateVehicleStatus', request)
+        return _vehicle_to_dict(response, with_created_at=False)
+
+    async def get_active_interventions(self):
+        """Récupère les interventions actives."""
+        response = await self._call('GetActiveInterventions', emergency_pb2.Empty())
+        return [_intervention_to_dict(i) for i in response.interventions]
+
+    async def create_intervention(self, intervention_type, priority, address,
+                                  latitude, longitude, description="", assigned_vehicle_id=None):
+        """Crée une nouvelle intervention."""
+        request = emergency_pb2.InterventionInput(
+            intervention_type=intervention_type,
+            priority=priority,
+            address=address,
+            latitude=latitude,
+            longitude=longitude,
+            assigned_vehicle_id=assigned_vehicle_id or 0,
+            description=description
+        )
+        response = await self._call('CreateIntervention', request)
+        return {
+            'id': response.id,
+            'intervention_type': response.intervention_type,
+            'priority': response.priority,
+            'address': response.address,
+            'status': response.status,
+            'assigned_vehicle_id': response.assigned_vehicle_id if response.assigned_vehicle_id > 0 else None,
+            'description': response.description,
+            'created_at': response.created_at
+        }
+
+    async def complete_intervention(self, intervention_id):
+        """Termine une intervention."""
+        request = emergency_pb2.InterventionRequest(id=intervention_id)
+        response = await self._call('CompleteIntervention', request)
+        return {
+            'id': response.id,
+            'status': response.status,
+            'completed_at': response.completed_at
+        }
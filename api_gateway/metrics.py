@@ -0,0 +1,185 @@
+"""Métriques Prometheus de la Gateway: latence, erreurs et requêtes en cours."""
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+import httpx
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.routing import Match
+
+# Secondes: de l'appel local rapide (5 ms) au délai maximal des services (10 s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Appels vers les microservices (REST, GraphQL, SOAP, gRPC) et OpenWeather
+UPSTREAM_LATENCY = Histogram(
+    "gateway_upstream_request_duration_seconds",
+    "Latence des appels amont par service et opération",
+    ["service", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "gateway_upstream_errors_total",
+    "Appels amont en erreur (exception ou réponse 5xx)",
+    ["service", "operation", "reason"],
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "gateway_upstream_requests_in_flight",
+    "Appels amont en cours",
+    ["service", "operation"],
+)
+
+# Routes exposées par la Gateway
+ROUTE_LATENCY = Histogram(
+    "gateway_http_request_duration_seconds",
+    "Latence des routes de la Gateway (jusqu'à l'envoi des en-têtes de réponse)",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+ROUTE_REQUESTS = Counter(
+    "gateway_http_requests_total",
+    "Requêtes traitées par la Gateway",
+    ["method", "route", "status"],
+)
+ROUTE_IN_FLIGHT = Gauge(
+    "gateway_http_requests_in_flight",
+    "Requêtes en cours par route",
+    ["method", "route"],
+)
+
+
+def _error_reason(error: Exception) -> str:
+    """Motif d'erreur court: code gRPC si disponible, sinon type d'exception."""
+    code = getattr(error, "code", None)
+    if callable(code):
+        try:
+            return code().name
+        except Exception:
+            pass
+    return type(error).__name__
+
+
+@contextmanager
+def track_upstream(service: str, operation: str):
+    """Mesure un appel amont (latence, erreur, appels en cours)."""
+    in_flight = UPSTREAM_IN_FLIGHT.labels(service, operation)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        UPSTREAM_ERRORS.labels(service, operation, _error_reason(e)).inc()
+        raise
+    finally:
+        UPSTREAM_LATENCY.labels(service, operation).observe(time.perf_counter() - start)
+        in_flight.dec()
+
+
+def http_operation(request: httpx.Request) -> str:
+    """
+    Nom d'opération à cardinalité bornée pour une requête HTTP amont:
+    - SOAP: en-tête SOAPAction (nom de l'opération)
+    - GraphQL: premier champ de la requête (ex: graphql:attractions)
+    - REST: méthode + chemin, identifiants numériques remplacés par {id}
+    """
+    action = request.headers.get("soapaction")
+    if action:
+        return action.strip('"')
+    path = request.url.path
+    if path.rstrip("/").endswith("/graphql") and request.method == "POST":
+        try:
+            query = json.loads(request.content).get("query", "")
+            _, _, body = query.partition("{")
+            field = body.lstrip().split("(", 1)[0].split("{", 1)[0].split()[0]
+            return f"graphql:{field}"
+        except Exception:
+            return "graphql"
+    segments = ["{id}" if segment.isdigit() else segment for segment in path.split("/")]
+    return f"{request.method} {'/'.join(segments)}"
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Transport httpx qui mesure chaque appel vers un service amont."""
+
+    def __init__(self, service: str, transport: httpx.AsyncBaseTransport):
+        self.service = service
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        operation = http_operation(request)
+        with track_upstream(self.service, operation):
+            response = await self.transport.handle_async_request(request)
+        if response.status_code >= 500:
+            UPSTREAM_ERRORS.labels(self.service, operation, f"http_{response.status_code}").inc()
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI mesurant chaque route de la Gateway.
+
+    La route est identifiée par son modèle de chemin (ex: /api/transport/{transport_id})
+    pour borner la cardinalité; la correspondance chemin -> modèle est mise en cache.
+    La latence est mesurée jusqu'au début de la réponse, ce qui reste pertinent
+    pour les flux (SSE).
+    """
+
+    MAX_TEMPLATES = 4096
+
+    def __init__(self, app):
+        self.app = app
+        self._templates: Dict[Tuple[str, str], str] = {}
+
+    def _route_template(self, scope) -> str:
+        """Retrouve le modèle de chemin de la route appelée."""
+        key = (scope["method"], scope["path"])
+        template = self._templates.get(key)
+        if template is None:
+            template = "unmatched"
+            for route in scope["app"].routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    template = route.path
+                    break
+                if match == Match.PARTIAL and template == "unmatched":
+                    template = route.path
+            if len(self._templates) >= self.MAX_TEMPLATES:
+                self._templates.clear()
+            self._templates[key] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route_template(scope)
+        in_flight = ROUTE_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        start = time.perf_counter()
+        started = False
+
+        async def send_with_metrics(message):
+            nonlocal started
+            if message["type"] == "http.response.start" and not started:
+                started = True
+                ROUTE_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+                ROUTE_REQUESTS.labels(method, route, str(message["status"])).inc()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            if not started:
+                ROUTE_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+                ROUTE_REQUESTS.labels(method, route, "500").inc()
+            in_flight.dec()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exporte toutes les métriques au format texte Prometheus."""
+    return generate_latest(), CONTENT_TYPE_LATEST
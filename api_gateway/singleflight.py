@@ -0,0 +1,60 @@
+"""Regroupement (single-flight) des appels amont identiques en cours."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Les appels concurrents portant la même clé partagent un seul appel amont:
+    le premier appelant le lance, les suivants attendent le même résultat
+    (ou la même exception). Une fois terminé, la clé est libérée.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self._callers: Dict[Hashable, int] = {}
+        self.flights = 0
+        self.callers = 0
+        self.max_callers = 0
+        self.by_service: Dict[str, Dict[str, int]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], service: str = "default") -> Any:
+        """Exécute fn une seule fois pour tous les appelants concurrents de la clé."""
+        self.callers += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            self.flights += 1
+            flight = asyncio.ensure_future(fn())
+            self._flights[key] = flight
+            self._callers[key] = 0
+            flight.add_done_callback(lambda f: self._done(key, service, f))
+        self._callers[key] += 1
+        # shield: l'annulation d'un appelant n'annule pas l'appel partagé
+        return await asyncio.shield(flight)
+
+    def _done(self, key: Hashable, service: str, flight: asyncio.Future):
+        """Libère la clé à la fin du vol et enregistre ses métriques."""
+        self._flights.pop(key, None)
+        self._record(service, self._callers.pop(key, 0))
+        if not flight.cancelled():
+            flight.exception()
+
+    def _record(self, service: str, callers: int):
+        """Comptabilise le nombre d'appelants servis par un vol terminé."""
+        self.max_callers = max(self.max_callers, callers)
+        stats = self.by_service.setdefault(service, {"flights": 0, "callers": 0, "max_callers": 0})
+        stats["flights"] += 1
+        stats["callers"] += callers
+        stats["max_callers"] = max(stats["max_callers"], callers)
+
+    def stats(self) -> Dict[str, Any]:
+        """Métriques de regroupement: appels amont évités et appelants par vol."""
+        return {
+            "in_flight": len(self._flights),
+            "flights": self.flights,
+            "callers": self.callers,
+            "coalesced": self.callers - self.flights,
+            "avg_callers_per_flight": round(self.callers / self.flights, 2) if self.flights else 0.0,
+            "max_callers_per_flight": self.max_callers,
+            "by_service": self.by_service,
+        }
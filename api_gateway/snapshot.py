@@ -0,0 +1,84 @@
+"""Instantané matérialisé en mémoire, reconstruit périodiquement en tâche de fond."""
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class SnapshotStore:
+    """
+    Conserve la dernière version d'un document coûteux à calculer (ex: tableau de bord).
+
+    Un planificateur le reconstruit toutes les `interval` secondes; les lectures
+    retournent directement le document en mémoire, quel que soit le nombre de lecteurs.
+    Chaque reconstruction incrémente le numéro de version et notifie les
+    écouteurs enregistrés avec (ancien instantané, nouvel instantané).
+    """
+
+    def __init__(self, builder: Callable[[], Awaitable[Dict[str, Any]]], interval: float):
+        self.builder = builder
+        self.interval = interval
+        self.version = 0
+        self.generated_at: Optional[str] = None
+        self.current: Optional[Dict[str, Any]] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Optional[Dict[str, Any]], Dict[str, Any]], None]] = []
+
+    def add_listener(self, listener: Callable[[Optional[Dict[str, Any]], Dict[str, Any]], None]):
+        """Enregistre une fonction appelée après chaque reconstruction."""
+        self._listeners.append(listener)
+
+    async def rebuild(self) -> Dict[str, Any]:
+        """Reconstruit l'instantané (une seule reconstruction à la fois)."""
+        async with self._lock:
+            return await self._rebuild()
+
+    async def _rebuild(self) -> Dict[str, Any]:
+        """Reconstruit l'instantané (verrou déjà détenu)."""
+        data = await self.builder()
+        self.version += 1
+        self.generated_at = datetime.now().isoformat()
+        data["snapshot"] = {
+            "version": self.version,
+            "generated_at": self.generated_at,
+            "refresh_interval_seconds": self.interval
+        }
+        previous, self.current = self.current, data
+        for listener in self._listeners:
+            try:
+                listener(previous, data)
+            except Exception as e:
+                print(f"⚠️ Erreur écouteur instantané: {e}")
+        return data
+
+    async def get(self) -> Dict[str, Any]:
+        """Retourne l'instantané courant (construit à la demande s'il n'existe pas encore)."""
+        if self.current is None:
+            async with self._lock:
+                if self.current is None:
+                    return await self._rebuild()
+        return self.current
+
+    async def _run(self):
+        """Boucle du planificateur."""
+        while True:
+            try:
+                await self.rebuild()
+            except Exception as e:
+                print(f"⚠️ Erreur reconstruction instantané: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Démarre le planificateur (appelé au démarrage de la Gateway)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête le planificateur."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
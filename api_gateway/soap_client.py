@@ -0,0 +1,98 @@
+"""Client SOAP asynchrone pour le service de qualité de l'air."""
+import asyncio
+import os
+from typing import Dict, Optional
+
+import httpx
+from zeep import AsyncClient
+from zeep.cache import SqliteCache
+from zeep.transports import AsyncTransport
+
+# Cache persistant du WSDL (survit aux redémarrages de la Gateway)
+WSDL_CACHE_PATH = os.getenv("SOAP_WSDL_CACHE_PATH", "/tmp/zeep-wsdl-cache.db")
+WSDL_CACHE_TIMEOUT = int(os.getenv("SOAP_WSDL_CACHE_TIMEOUT", "86400"))
+WSDL_LOAD_TIMEOUT = float(os.getenv("SOAP_WSDL_LOAD_TIMEOUT", "10"))
+
+
+class AirQualitySoapClient:
+    """
+    Client zeep unique, construit une seule fois puis réutilisé.
+
+    Le WSDL est chargé (depuis le cache si possible) au démarrage; les opérations
+    sont ensuite appelées en async via le pool httpx partagé de la Gateway.
+    Si le service SOAP n'est pas encore joignable au démarrage, le chargement est
+    retenté au premier appel.
+    """
+
+    def __init__(self, wsdl_url: str):
+        self.wsdl_url = wsdl_url
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self.wsdl_client: Optional[httpx.Client] = None
+        self.client: Optional[AsyncClient] = None
+        self._lock = asyncio.Lock()
+
+    async def start(self, http_client: httpx.AsyncClient):
+        """Associe le pool partagé et tente de charger le WSDL."""
+        self.http_client = http_client
+        try:
+            await self.connect()
+        except Exception as e:
+            print(f"⚠️ WSDL SOAP non chargé au démarrage ({e}), nouvel essai au premier appel")
+
+    async def connect(self) -> AsyncClient:
+        """Construit le client zeep si nécessaire (une seule fois)."""
+        if self.client is not None:
+            return self.client
+        async with self._lock:
+            if self.client is None:
+                # Le chargement du WSDL est synchrone dans zeep: hors de la boucle asyncio
+                self.client = await asyncio.to_thread(self._build_client)
+        return self.client
+
+    def _build_client(self, purge_cache: bool = False) -> AsyncClient:
+        """Crée le client zeep avec transport async et cache WSDL persistant."""
+        if self.http_client is None:
+            raise RuntimeError("Client SOAP non démarré")
+        if self.wsdl_client is None:
+            self.wsdl_client = httpx.Client(timeout=WSDL_LOAD_TIMEOUT)
+        cache = SqliteCache(path=WSDL_CACHE_PATH, timeout=WSDL_CACHE_TIMEOUT)
+        if purge_cache:
+            with cache.db_connection() as conn:
+                conn.execute("DELETE FROM request")
+                conn.commit()
+        transport = AsyncTransport(
+            client=self.http_client,
+            wsdl_client=self.wsdl_client,
+            cache=cache,
+        )
+        return AsyncClient(self.wsdl_url, transport=transport)
+
+    async def operation(self, name: str):
+        """
+        Retourne l'opération SOAP demandée. Si le WSDL en cache est antérieur à
+        l'ajout de cette opération côté service, il est rechargé une fois.
+        """
+        client = await self.connect()
+        try:
+            return getattr(client.service, name)
+        except AttributeError:
+            async with self._lock:
+                if client is self.client:
+                    self.client = await asyncio.to_thread(self._build_client, True)
+            return getattr(self.client.service, name)
+
+    async def close(self):
+        """Libère le client de chargement du WSDL (le pool est fermé par la Gateway)."""
+        if self.wsdl_client is not None:
+            self.wsdl_client.close()
+            self.wsdl_client = None
+        self.client = None
+
+    async def get_latest_measures(self, station_names) -> Dict[str, object]:
+        """
+        Appelle GetLatestMeasures: dernière mesure de chaque station (nom exact).
+        Retourne {station: mesure}; les stations sans mesure sont absentes.
+        """
+        operation = await self.operation('GetLatestMeasures')
+        measures = await operation({'string': list(station_names)})
+        return {measure.station_name: measure for measure in measures or []}
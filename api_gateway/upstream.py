@@ -0,0 +1,147 @@
+"""Clients HTTP partagés (pool de connexions) vers les microservices."""
+import json
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+
+from conditional import ConditionalCache
+from metrics import InstrumentedTransport
+from singleflight import SingleFlight
+
+
+def _env_int(name: str, default: int) -> int:
+    """Lit un entier depuis l'environnement."""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Lit un flottant depuis l'environnement."""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _service_config(service: str, max_connections: int, max_keepalive: int, timeout: float,
+                    connect_timeout: float = 2.0) -> Dict:
+    """
+    Configuration d'un service amont, surchargeable par variables d'environnement:
+    UPSTREAM_<SERVICE>_MAX_CONNECTIONS, UPSTREAM_<SERVICE>_MAX_KEEPALIVE,
+    UPSTREAM_<SERVICE>_TIMEOUT, UPSTREAM_<SERVICE>_CONNECT_TIMEOUT
+    """
+    prefix = f"UPSTREAM_{service.upper()}_"
+    return {
+        "max_connections": _env_int(prefix + "MAX_CONNECTIONS", max_connections),
+        "max_keepalive": _env_int(prefix + "MAX_KEEPALIVE", max_keepalive),
+        "keepalive_expiry": _env_float(prefix + "KEEPALIVE_EXPIRY", 30.0),
+        "timeout": _env_float(prefix + "TIMEOUT", timeout),
+        "connect_timeout": _env_float(prefix + "CONNECT_TIMEOUT", connect_timeout),
+    }
+
+
+# HTTP/2 optionnel (nécessite le paquet h2)
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "false").lower() in ("1", "true", "yes")
+
+# Nombre de réponses mémorisées pour les requêtes conditionnelles (ETag)
+UPSTREAM_CONDITIONAL_ENTRIES = _env_int("UPSTREAM_CONDITIONAL_ENTRIES", 256)
+
+# Un pool par service amont
+UPSTREAM_CONFIG = {
+    "transport": _service_config("transport", max_connections=100, max_keepalive=20, timeout=5.0),
+    "tourism": _service_config("tourism", max_connections=50, max_keepalive=10, timeout=5.0),
+    "air_quality": _service_config("air_quality", max_connections=20, max_keepalive=5, timeout=10.0),
+    # Sous le budget de la branche qualité d'air du tableau de bord (4 s): le repli SOAP doit y tenir
+    "openweather": _service_config("openweather", max_connections=10, max_keepalive=5, timeout=2.0, connect_timeout=1.0),
+}
+
+
+class UpstreamPool:
+    """Ensemble des clients httpx partagés, un par service amont."""
+
+    def __init__(self, config: Dict[str, Dict], http2: bool = False, conditional_entries: int = 256):
+        self.config = config
+        self.http2 = http2
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.singleflight = SingleFlight()
+        self.conditional = ConditionalCache(conditional_entries)
+
+    def _build_client(self, service: str, settings: Dict) -> httpx.AsyncClient:
+        """Crée un client instrumenté avec keep-alive, limites et timeouts du service."""
+        limits = httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_keepalive"],
+            keepalive_expiry=settings["keepalive_expiry"],
+        )
+        timeout = httpx.Timeout(settings["timeout"], connect=settings["connect_timeout"])
+        transport = InstrumentedTransport(service, httpx.AsyncHTTPTransport(limits=limits, http2=self.http2))
+        return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+    async def start(self):
+        """Ouvre les pools de connexions (appelé au démarrage de la Gateway)."""
+        for service, settings in self.config.items():
+            if service not in self.clients:
+                self.clients[service] = self._build_client(service, settings)
+
+    async def close(self):
+        """Ferme proprement toutes les connexions (appelé à l'arrêt)."""
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients = {}
+
+    def get(self, service: str) -> httpx.AsyncClient:
+        """Retourne le client partagé d'un service."""
+        client: Optional[httpx.AsyncClient] = self.clients.get(service)
+        if client is None:
+            raise RuntimeError(f"Pool HTTP non initialisé pour le service '{service}'")
+        return client
+
+    async def request(
+        self,
+        service: str,
+        method: str,
+        url: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Any = None,
+        coalesce: bool = False,
+        conditional: bool = False
+    ) -> httpx.Response:
+        """
+        Envoie une requête au service amont via son pool.
+
+        Avec coalesce=True (appels idempotents uniquement), les requêtes concurrentes
+        identiques (service, méthode, URL, paramètres, corps) partagent un seul appel:
+        la même httpx.Response est alors retournée à tous les appelants.
+
+        Avec conditional=True (GET sur un service qui émet ETag/Last-Modified), la
+        dernière réponse est revalidée par If-None-Match: sur 304, la réponse
+        mémorisée est retournée telle quelle.
+        """
+        client = self.get(service)
+        key = (
+            service,
+            method.upper(),
+            url,
+            json.dumps(params, sort_keys=True, default=str) if params else None,
+            json.dumps(json_body, sort_keys=True, default=str) if json_body is not None else None,
+        )
+
+        async def send():
+            if not conditional:
+                return await client.request(method, url, params=params, json=json_body)
+            response = await client.request(
+                method, url, params=params, json=json_body, headers=self.conditional.headers_for(key)
+            )
+            response = self.conditional.resolve(key, response, service=service)
+            if response.status_code == 304:
+                # Copie évincée entre l'envoi et la réponse: requête complète
+                response = await client.request(method, url, params=params, json=json_body)
+                response = self.conditional.resolve(key, response, service=service)
+            return response
+
+        if not coalesce:
+            return await send()
+        return await self.singleflight.do(key, send, service=service)
+
+
+upstream = UpstreamPool(UPSTREAM_CONFIG, http2=UPSTREAM_HTTP2, conditional_entries=UPSTREAM_CONDITIONAL_ENTRIES)
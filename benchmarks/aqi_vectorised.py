@@ -0,0 +1,94 @@
+"""
+Microbenchmark: calcul de l'AQI multi-polluants (common/aqi.py), vectorisé
+NumPy vs boucle Python lecture par lecture sur les mêmes tables EPA.
+
+Les deux calculs sont comparés sur l'échantillon de la boucle (résultats
+identiques attendus) avant d'afficher les débits en lectures/s.
+
+Usage (depuis la racine du dépôt):
+    python benchmarks/aqi_vectorised.py --readings 2000000 --scalar 100000
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from common import aqi
+
+
+def scalar_aqi(reading: dict) -> tuple:
+    """Référence lecture par lecture (if/elif sur les points de rupture)."""
+    best, dominant = -1, None
+    for name in aqi.POLLUTANTS:
+        value = reading[name]
+        if value is None or math.isnan(value) or value < 0:
+            continue
+        scale = 10 ** aqi.DECIMALS[name]
+        c = math.floor(value * scale + 1e-9) / scale
+        for c_low, c_high, i_low, i_high in aqi.BREAKPOINTS[name]:
+            if c <= c_high:
+                break
+        top = aqi.BREAKPOINTS[name][-1][3]
+        index = round(min(max((i_high - i_low) / (c_high - c_low) * (c - c_low) + i_low, 0), top))
+        if index > best:
+            best, dominant = index, name
+    return best, dominant
+
+
+def random_readings(n: int, seed: int = 42) -> dict:
+    """Lectures plausibles (unités EPA), 5 % de valeurs O3/NO2/CO absentes."""
+    rng = np.random.default_rng(seed)
+    readings = {
+        "pm25": rng.gamma(2.0, 12.0, n),
+        "pm10": rng.gamma(2.0, 25.0, n),
+        "o3": rng.gamma(4.0, 12.0, n),
+        "no2": rng.gamma(2.0, 20.0, n),
+        "co": rng.gamma(2.0, 0.6, n),
+    }
+    for name in ("o3", "no2", "co"):
+        readings[name][rng.random(n) < 0.05] = np.nan
+    return readings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readings", type=int, default=2_000_000)
+    parser.add_argument("--scalar", type=int, default=100_000, help="lectures calculées par la boucle Python")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    readings = random_readings(args.readings)
+
+    sample = {name: values[:args.scalar] for name, values in readings.items()}
+    rows = [dict(zip(aqi.POLLUTANTS, values)) for values in zip(*(sample[n].tolist() for n in aqi.POLLUTANTS))]
+    start = time.perf_counter()
+    expected = [scalar_aqi(row) for row in rows]
+    scalar_rate = len(rows) / (time.perf_counter() - start)
+
+    vectorised = aqi.compute_aqi(**sample)
+    mismatches = sum(
+        1 for (value, dominant), v, d in zip(expected, vectorised["aqi"], vectorised["dominant"])
+        if value != v or (dominant or "") != d
+    )
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        aqi.compute_aqi(**readings)
+        best = min(best, time.perf_counter() - start)
+    vector_rate = args.readings / best
+
+    print(f"{'calcul':<12} {'lectures':>10} {'lectures/s':>14}")
+    print(f"{'boucle':<12} {len(rows):>10} {scalar_rate:>14,.0f}")
+    print(f"{'vectorisé':<12} {args.readings:>10} {vector_rate:>14,.0f}")
+    print(f"gain: {vector_rate / scalar_rate:.0f}x, écarts sur l'échantillon: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
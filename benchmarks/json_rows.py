@@ -0,0 +1,117 @@
+"""
+Microbenchmark: débit (lignes/s) des listes de transports, chemin standard
+vs chemin rapide (FAST_JSON).
+
+- service: GET /transports/ par pages (objets ORM + modèle pydantic + json)
+  vs tuples SQL encodés par orjson, appelé en ASGI dans le processus
+- gateway: pages décodées puis ré-encodées (json.loads + jsonable_encoder +
+  json.dumps) vs concaténation des pages sans décodage
+
+Usage (depuis la racine du dépôt):
+    python benchmarks/json_rows.py --rows 20000 --page 1000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "service_rest_transport"))
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+
+from common import fastjson
+
+
+def prepare(rows: int):
+    """Base temporaire (./data/transport.db dans le répertoire courant)."""
+    from app import crud
+    from app.database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    places = ["La Marsa", "Carthage", "Ariana", "Bardo", "Ben Arous", "La Goulette"]
+    crud.bulk_create_transports(db, [
+        {"mode": random.choice(["Bus", "Métro", "Train"]),
+         "route": f"Ligne {i} - {random.choice(places)} → {random.choice(places)}",
+         "status": random.choice(["operationnel", "retard", "en_maintenance"])}
+        for i in range(rows)
+    ])
+    db.close()
+
+
+async def fetch_pages(client: httpx.AsyncClient, page: int) -> list:
+    """Lit toute la liste page par page; retourne le corps brut de chaque page."""
+    pages, params = [], {"limit": page}
+    while True:
+        response = await client.get("/transports/", params=params)
+        response.raise_for_status()
+        pages.append(response.content)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+        params = {"limit": page, "cursor": cursor}
+
+
+async def bench_service(app, page: int, repeat: int, fast: bool) -> tuple:
+    fastjson.FAST_JSON = fast
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://transport") as client:
+        pages = await fetch_pages(client, page)  # préchauffage
+        start = time.perf_counter()
+        for _ in range(repeat):
+            pages = await fetch_pages(client, page)
+        elapsed = time.perf_counter() - start
+    rows = sum(len(json.loads(p)) for p in pages)
+    return rows * repeat / elapsed, pages
+
+
+def bench_gateway(pages: list, repeat: int, fast: bool) -> float:
+    rows = sum(len(json.loads(p)) for p in pages)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if fast:
+            fastjson.merge_json_arrays(pages)
+        else:
+            transports = []
+            for p in pages:
+                transports.extend(json.loads(p))
+            json.dumps(jsonable_encoder(transports), ensure_ascii=False).encode("utf-8")
+    return rows * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"orjson: {'oui' if fastjson.orjson else 'non (repli json)'}, {args.rows} lignes, pages de {args.page}")
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.mkdir("data")
+        prepare(args.rows)
+        from app.app import app
+
+        results = {}
+        for fast in (False, True):
+            rate, pages = asyncio.run(bench_service(app, args.page, args.repeat, fast))
+            results[("service", fast)] = rate
+            results[("gateway", fast)] = bench_gateway(pages, args.repeat * 4, fast)
+        os.chdir(ROOT)
+
+    print(f"{'étape':<10} {'standard':>14} {'FAST_JSON':>14} {'gain':>7}")
+    for stage in ("service", "gateway"):
+        before, after = results[(stage, False)], results[(stage, True)]
+        print(f"{stage:<10} {before:>12.0f}/s {after:>12.0f}/s {after / before:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
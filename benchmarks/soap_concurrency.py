@@ -0,0 +1,143 @@
+"""
+Benchmark: service SOAP qualité de l'air selon le mode de serveur (SOAP_SERVER).
+
+Chaque mode (simple = wsgiref d'origine, threaded, gunicorn) sert une copie
+temporaire de la base, remplie de mesures pour rendre GetAllMeasures coûteux.
+Des clients concurrents envoient un mélange d'appels lourds (GetAllMeasures)
+et légers (GetAirQuality); on mesure le débit et la latence des appels légers,
+qui attendent derrière les appels lourds avec un serveur mono-requête.
+
+Usage (depuis la racine du dépôt; le mode gunicorn nécessite Linux/macOS):
+    python benchmarks/soap_concurrency.py --concurrency 16 --requests 400
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SOAP_APP = os.path.join(ROOT, "service_soap_air", "app")
+
+ENVELOPE = (
+    '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" '
+    'xmlns:tns="smartcity.air"><soapenv:Body>{body}</soapenv:Body></soapenv:Envelope>'
+)
+HEAVY = ENVELOPE.format(body="<tns:GetAllMeasures/>")
+LIGHT = ENVELOPE.format(body="<tns:GetAirQuality><tns:measure_id>{id}</tns:measure_id></tns:GetAirQuality>")
+
+PREPARE = """
+import sys
+sys.path.insert(0, {app!r})
+import soap_server as s
+s.Base.metadata.create_all(bind=s.engine)
+db = s.SessionLocal()
+db.add_all([
+    s.AirQualityDB(station_name=f"Station {{i}}", location="Tunis", pm25=20.0, pm10=30.0,
+                   o3=50.0, no2=25.0, co=0.5, aqi=60, status="Bon")
+    for i in range({rows})
+])
+db.commit()
+"""
+
+
+def prepare(tmp: str, rows: int):
+    """Crée la base de test dans tmp/data (chemin relatif du service)."""
+    os.mkdir(os.path.join(tmp, "data"))
+    subprocess.run([sys.executable, "-c", PREPARE.format(app=SOAP_APP, rows=rows)], cwd=tmp, check=True)
+
+
+async def wait_ready(client: httpx.AsyncClient):
+    for _ in range(100):
+        try:
+            if (await client.get("/?wsdl")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("Serveur SOAP non démarré")
+
+
+async def load(port: int, concurrency: int, total: int, heavy_ratio: float, rows: int) -> dict:
+    """Envoie `total` appels SOAP avec `concurrency` clients simultanés."""
+    limits = httpx.Limits(max_connections=concurrency)
+    headers = {"Content-Type": "text/xml; charset=utf-8"}
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+        await wait_ready(client)
+        calls = ["heavy" if random.random() < heavy_ratio else "light" for _ in range(total)]
+        latencies = {"heavy": [], "light": []}
+        errors = 0
+
+        async def worker():
+            nonlocal errors
+            while calls:
+                kind = calls.pop()
+                body = HEAVY if kind == "heavy" else LIGHT.format(id=random.randint(1, rows))
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/", content=body, headers=headers)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    # Connexions refusées / réinitialisées (file d'attente d'écoute pleine)
+                    errors += 1
+                    continue
+                latencies[kind].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    light = sorted(latencies["light"]) or [0.0]
+    return {
+        "rate": (total - errors) / elapsed,
+        "errors": errors,
+        "light_p50": statistics.median(light) * 1000,
+        "light_p95": light[int(len(light) * 0.95) - 1] * 1000 if len(light) > 1 else light[0] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["simple", "threaded", "gunicorn"])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--rows", type=int, default=1000, help="mesures en base (coût de GetAllMeasures)")
+    parser.add_argument("--heavy-ratio", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8701)
+    args = parser.parse_args()
+
+    print(f"{args.requests} appels, {args.concurrency} clients, {args.heavy_ratio:.0%} GetAllMeasures "
+          f"sur {args.rows} mesures (workers={args.workers}, threads={args.threads})")
+    print(f"{'mode':<10} {'appels/s':>10} {'léger p50 (ms)':>15} {'léger p95 (ms)':>15} {'erreurs':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        prepare(tmp, args.rows)
+        for mode in args.modes:
+            env = dict(
+                os.environ, SOAP_SERVER=mode, SOAP_HOST="127.0.0.1", SOAP_PORT=str(args.port),
+                SOAP_WORKERS=str(args.workers), SOAP_THREADS=str(args.threads)
+            )
+            server = subprocess.Popen(
+                [sys.executable, os.path.join(SOAP_APP, "soap_server.py")],
+                cwd=tmp, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                stats = asyncio.run(load(args.port, args.concurrency, args.requests, args.heavy_ratio, args.rows))
+                print(
+                    f"{mode:<10} {stats['rate']:>10.1f} {stats['light_p50']:>15.1f} "
+                    f"{stats['light_p95']:>15.1f} {stats['errors']:>8}"
+                )
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
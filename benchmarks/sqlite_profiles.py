@@ -0,0 +1,114 @@
+"""
+Benchmark: charge mixte lecture/écriture sur SQLite selon le profil de connexion.
+
+Compare les profils de common/sqlite_engine.py (journal DELETE d'origine vs WAL)
+avec des threads lecteurs et écrivains concurrents sur une base temporaire.
+
+Usage (depuis la racine du dépôt):
+    python benchmarks/sqlite_profiles.py --readers 8 --writers 2 --duration 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from common.sqlite_engine import SQLITE_PROFILES, create_sqlite_engine
+
+
+def prepare(engine, rows: int):
+    """Crée et remplit une table proche de celle du service transport."""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE transports (id INTEGER PRIMARY KEY, mode TEXT NOT NULL, "
+            "route TEXT NOT NULL, status TEXT NOT NULL)"
+        ))
+        conn.execute(text("CREATE INDEX ix_transports_status_mode ON transports (status, mode)"))
+        conn.execute(
+            text("INSERT INTO transports (mode, route, status) VALUES (:mode, :route, :status)"),
+            [
+                {"mode": random.choice(["Bus", "Métro", "Train", "Vélo"]),
+                 "route": f"Ligne {i} - Tunis → La Marsa",
+                 "status": random.choice(["operationnel", "retard", "en_maintenance"])}
+                for i in range(rows)
+            ]
+        )
+
+
+def reader(engine, rows: int, stop: threading.Event, stats: dict):
+    """Lectures: une ligne par id + une page filtrée par status."""
+    while not stop.is_set():
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT * FROM transports WHERE id = :id"), {"id": random.randint(1, rows)}).fetchall()
+                conn.execute(text(
+                    "SELECT * FROM transports WHERE status = 'operationnel' AND id > :id ORDER BY id LIMIT 50"
+                ), {"id": random.randint(1, rows)}).fetchall()
+            stats["reads"] += 1
+        except OperationalError:
+            stats["read_errors"] += 1
+
+
+def writer(engine, rows: int, stop: threading.Event, stats: dict):
+    """Écritures: une transaction courte par mise à jour de statut."""
+    while not stop.is_set():
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    text("UPDATE transports SET status = :status WHERE id = :id"),
+                    {"status": random.choice(["operationnel", "retard"]), "id": random.randint(1, rows)}
+                )
+            stats["writes"] += 1
+        except OperationalError:
+            stats["write_errors"] += 1
+
+
+def run_profile(profile: str, readers: int, writers: int, duration: float, rows: int) -> dict:
+    """Mesure le débit d'un profil sur une base neuve."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_sqlite_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile=profile)
+        prepare(engine, rows)
+        stats = {"reads": 0, "writes": 0, "read_errors": 0, "write_errors": 0}
+        stop = threading.Event()
+        threads = [threading.Thread(target=reader, args=(engine, rows, stop, stats)) for _ in range(readers)]
+        threads += [threading.Thread(target=writer, args=(engine, rows, stop, stats)) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+    stats["reads_per_s"] = stats["reads"] / duration
+    stats["writes_per_s"] = stats["writes"] / duration
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--profiles", nargs="+", default=list(SQLITE_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.readers} lecteurs, {args.writers} écrivains, {args.duration:.0f} s, {args.rows} lignes")
+    print(f"{'profil':<10} {'lectures/s':>12} {'écritures/s':>12} {'err. lecture':>13} {'err. écriture':>14}")
+    for profile in args.profiles:
+        stats = run_profile(profile, args.readers, args.writers, args.duration, args.rows)
+        print(
+            f"{profile:<10} {stats['reads_per_s']:>12.0f} {stats['writes_per_s']:>12.0f} "
+            f"{stats['read_errors']:>13} {stats['write_errors']:>14}"
+        )
+
+
+if __name__ == "__main__":
+    main()
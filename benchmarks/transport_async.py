@@ -0,0 +1,157 @@
+"""
+Benchmark: endpoints synchrones (Session, pool de threads) vs asynchrones
+(AsyncSession + aiosqlite) du service transport.
+
+Deux mini-applications FastAPI exposent les mêmes lectures (GET par id et page
+filtrée par zone) à partir de crud.py et crud_async.py, sur une copie temporaire
+de la base. Chacune est servie par uvicorn dans un processus séparé, puis
+chargée par un client httpx avec N requêtes simultanées.
+
+Usage (depuis la racine du dépôt):
+    python benchmarks/transport_async.py --concurrency 50 100 200 --requests 3000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "service_rest_transport"))
+
+import httpx
+
+
+def build_app(mode: str, db_path: str):
+    """Application FastAPI minimale utilisant le chemin sync ou async du service."""
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from sqlalchemy.orm import sessionmaker
+
+    from app import crud, crud_async
+    from common.sqlite_engine import create_async_sqlite_engine, create_sqlite_engine
+
+    app = FastAPI()
+    if mode == "sync":
+        SessionLocal = sessionmaker(bind=create_sqlite_engine(f"sqlite:///{db_path}"), autoflush=False)
+
+        def get_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        @app.get("/transports/{transport_id}")
+        def get_transport(transport_id: int, db=Depends(get_db)):
+            return crud._transport_dict(crud.get_transport(db, transport_id))
+
+        @app.get("/transports/")
+        def list_transports(zone: str, db=Depends(get_db)):
+            return [crud._transport_dict(t) for t in crud.get_transports_after(db, limit=50, zones=[zone])]
+    else:
+        AsyncSessionLocal = async_sessionmaker(
+            create_async_sqlite_engine(f"sqlite+aiosqlite:///{db_path}"), autoflush=False, expire_on_commit=False
+        )
+
+        async def get_db():
+            async with AsyncSessionLocal() as db:
+                yield db
+
+        @app.get("/transports/{transport_id}")
+        async def get_transport(transport_id: int, db=Depends(get_db)):
+            return crud._transport_dict(await crud_async.get_transport(db, transport_id))
+
+        @app.get("/transports/")
+        async def list_transports(zone: str, db=Depends(get_db)):
+            return [crud._transport_dict(t) for t in await crud_async.get_transports_after(db, limit=50, zones=[zone])]
+    return app
+
+
+def serve(mode: str, db_path: str, port: int):
+    import uvicorn
+    uvicorn.run(build_app(mode, db_path), host="127.0.0.1", port=port, log_level="warning")
+
+
+def prepare(db_path: str, rows: int):
+    """Crée une base de test: transports, zones et index ligne <-> zone."""
+    from sqlalchemy.orm import sessionmaker
+
+    from app import crud
+    from app.database import Base
+    from common.sqlite_engine import create_sqlite_engine
+
+    engine = create_sqlite_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    crud.seed_zones(db)
+    places = ["La Marsa", "Carthage", "Ariana", "Bardo", "Ben Arous", "La Goulette"]
+    crud.bulk_create_transports(db, [
+        {"mode": random.choice(["Bus", "Métro", "Train"]),
+         "route": f"Ligne {i} - {random.choice(places)} → {random.choice(places)}",
+         "status": "operationnel"}
+        for i in range(rows)
+    ])
+    db.close()
+    engine.dispose()
+    return places
+
+
+async def load(port: int, concurrency: int, total: int, rows: int, places) -> float:
+    """Envoie `total` requêtes (moitié GET par id, moitié pages par zone); retourne req/s."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        for _ in range(50):
+            try:
+                await client.get("/transports/1")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+        queue = list(range(total))
+
+        async def worker():
+            while queue:
+                i = queue.pop()
+                if i % 2:
+                    response = await client.get(f"/transports/{random.randint(1, rows)}")
+                else:
+                    response = await client.get("/transports/", params={"zone": random.choice(places)})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "transport.db")
+        places = prepare(db_path, args.rows)
+        print(f"{args.requests} requêtes par mesure, {args.rows} transports")
+        print(f"{'mode':<6} {'concurrence':>11} {'req/s':>10}")
+        for mode in ("sync", "async"):
+            server = multiprocessing.Process(target=serve, args=(mode, db_path, args.port), daemon=True)
+            server.start()
+            try:
+                for concurrency in args.concurrency:
+                    rate = asyncio.run(load(args.port, concurrency, args.requests, args.rows, places))
+                    print(f"{mode:<6} {concurrency:>11} {rate:>10.0f}")
+            finally:
+                server.terminate()
+                server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Modules partagés entre les microservices (copiés dans chaque image Docker)."""
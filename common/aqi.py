@@ -0,0 +1,148 @@
+"""
+Calcul vectorisé de l'AQI US EPA multi-polluants (NumPy).
+
+Unités attendues (celles des tables EPA):
+- pm25, pm10: µg/m³
+- o3, no2: ppb
+- co: ppm
+Ce sont les unités stockées par le service SOAP. La Gateway expose tout en
+µg/m³ (schéma OpenWeatherMap): from_ugm3() et to_ugm3() convertissent O3, NO2
+et CO entre les deux.
+
+Chaque polluant donne un sous-indice par interpolation linéaire dans sa table
+de points de rupture; l'AQI est le plus élevé des sous-indices et le polluant
+correspondant est le polluant dominant. Une valeur absente (None / NaN) est
+ignorée; sans aucune valeur, l'AQI vaut -1.
+
+O3: seule la table 8 h de l'EPA est appliquée (mesures sans durée de moyenne
+connue). Elle s'arrête à 200 ppb (AQI 300): au-delà, l'EPA calcule l'indice
+sur la moyenne 1 h (405-604 ppb -> 301-500), non disponible ici, et le
+sous-indice O3 est plafonné à 300. Les autres tables vont jusqu'à 500.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+POLLUTANTS = ("pm25", "pm10", "o3", "no2", "co")
+
+# Points de rupture EPA: (concentration basse, haute, indice bas, haut).
+# PM2.5: révision de 2024. O3: moyenne 8 h uniquement (jusqu'à 200 ppb, AQI 300).
+BREAKPOINTS: Dict[str, Tuple[Tuple[float, float, int, int], ...]] = {
+    "pm25": (
+        (0.0, 9.0, 0, 50), (9.1, 35.4, 51, 100), (35.5, 55.4, 101, 150),
+        (55.5, 125.4, 151, 200), (125.5, 225.4, 201, 300), (225.5, 325.4, 301, 500),
+    ),
+    "pm10": (
+        (0, 54, 0, 50), (55, 154, 51, 100), (155, 254, 101, 150),
+        (255, 354, 151, 200), (355, 424, 201, 300), (425, 604, 301, 500),
+    ),
+    "o3": (
+        (0, 54, 0, 50), (55, 70, 51, 100), (71, 85, 101, 150),
+        (86, 105, 151, 200), (106, 200, 201, 300),
+    ),
+    "no2": (
+        (0, 53, 0, 50), (54, 100, 51, 100), (101, 360, 101, 150),
+        (361, 649, 151, 200), (650, 1249, 201, 300), (1250, 2049, 301, 500),
+    ),
+    "co": (
+        (0.0, 4.4, 0, 50), (4.5, 9.4, 51, 100), (9.5, 12.4, 101, 150),
+        (12.5, 15.4, 151, 200), (15.5, 30.4, 201, 300), (30.5, 50.4, 301, 500),
+    ),
+}
+
+# Troncature des concentrations avant calcul (nombre de décimales, règle EPA)
+DECIMALS = {"pm25": 1, "pm10": 0, "o3": 0, "no2": 0, "co": 1}
+
+# Catégories: AQI maximal de chaque libellé
+STATUS_LABELS = ("Bon", "Modéré", "Mauvais pour groupes sensibles", "Mauvais", "Très mauvais", "Dangereux")
+STATUS_LIMITS = np.array([50, 100, 150, 200, 300])
+
+# µg/m³ -> unités EPA à 25 °C (masse molaire / 24,45)
+UGM3_FACTORS = {"o3": 1 / 1.962, "no2": 1 / 1.882, "co": 1 / 1145.0}
+
+_TABLES = {
+    name: tuple(np.array(column, dtype=float) for column in zip(*rows))
+    for name, rows in BREAKPOINTS.items()
+}
+
+
+def _as_array(values) -> np.ndarray:
+    """Convertit des lectures (scalaire, liste avec None, tableau) en float64, None -> NaN."""
+    if isinstance(values, np.ndarray):
+        return values.astype(float, copy=False)
+    if values is None or np.isscalar(values):
+        values = [values]
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def sub_index(pollutant: str, concentrations) -> np.ndarray:
+    """
+    Sous-indice AQI (float, NaN si absent) d'un polluant pour un tableau de
+    concentrations, plafonné à l'indice le plus haut de sa table.
+    """
+    c_low, c_high, i_low, i_high = _TABLES[pollutant]
+    scale = 10.0 ** DECIMALS[pollutant]
+    # Marge pour les flottants juste sous la décimale (4.4 * 10 = 43.999...)
+    c = np.floor(_as_array(concentrations) * scale + 1e-9) / scale
+    c = np.where(c < 0, np.nan, c)
+    # Premier segment dont la borne haute couvre la concentration (au-delà: dernier segment)
+    segment = np.minimum(np.searchsorted(c_high, c, side="left"), len(c_high) - 1)
+    index = (i_high[segment] - i_low[segment]) / (c_high[segment] - c_low[segment]) * (c - c_low[segment]) + i_low[segment]
+    return np.rint(np.clip(index, 0, i_high[-1]))
+
+
+def compute_aqi(**readings) -> Dict[str, Any]:
+    """
+    AQI de tableaux de lectures de même longueur (mots-clés pm25, pm10, o3,
+    no2, co; les polluants non fournis ou None sont ignorés). Retourne:
+    - aqi: tableau d'entiers (-1 sans aucune valeur)
+    - dominant: nom du polluant dominant ("" sans aucune valeur)
+    - status: libellé de la catégorie ("" sans aucune valeur)
+    - sub_indices: {polluant: sous-indices (NaN si absent)}
+    """
+    unknown = set(readings) - set(POLLUTANTS)
+    if unknown:
+        raise ValueError(f"Polluants inconnus: {', '.join(sorted(unknown))} (disponibles: {', '.join(POLLUTANTS)})")
+    names = [name for name in POLLUTANTS if readings.get(name) is not None]
+    sub_indices = {name: sub_index(name, readings[name]) for name in names}
+    if not sub_indices:
+        raise ValueError("Aucun polluant fourni")
+
+    stacked = np.vstack([sub_indices[name] for name in names])
+    missing = np.isnan(stacked).all(axis=0)
+    filled = np.where(np.isnan(stacked), -1.0, stacked)
+    dominant_row = filled.argmax(axis=0)
+    aqi = np.where(missing, -1, filled.max(axis=0)).astype(np.int64)
+
+    labels = np.array(STATUS_LABELS + ("",), dtype=object)
+    status = labels[np.where(missing, len(STATUS_LABELS), np.searchsorted(STATUS_LIMITS, aqi, side="left"))]
+    dominant = np.array(names + [""], dtype=object)[np.where(missing, len(names), dominant_row)]
+    return {"aqi": aqi, "dominant": dominant, "status": status, "sub_indices": sub_indices}
+
+
+def aqi_for(pm25=None, pm10=None, o3=None, no2=None, co=None) -> Tuple[int, Optional[str], str]:
+    """AQI, polluant dominant et libellé d'une seule lecture (-1, None, "" sans valeur)."""
+    result = compute_aqi(pm25=[pm25], pm10=[pm10], o3=[o3], no2=[no2], co=[co])
+    aqi = int(result["aqi"][0])
+    return aqi, (result["dominant"][0] or None), result["status"][0]
+
+
+def from_ugm3(components: Dict[str, Optional[float]]) -> Dict[str, Optional[float]]:
+    """Convertit des concentrations en µg/m³ (OpenWeatherMap) vers les unités EPA."""
+    return {
+        name: (value * UGM3_FACTORS[name] if name in UGM3_FACTORS and value is not None else value)
+        for name, value in components.items()
+    }
+
+
+def to_ugm3(components: Dict[str, Optional[float]]) -> Dict[str, Optional[float]]:
+    """Convertit des concentrations en unités EPA (ppb, ppm) vers les µg/m³."""
+    return {
+        name: (value / UGM3_FACTORS[name] if name in UGM3_FACTORS and value is not None else value)
+        for name, value in components.items()
+    }
+
+
+def status_label(aqi: int) -> str:
+    """Libellé de catégorie d'un AQI."""
+    return STATUS_LABELS[int(np.searchsorted(STATUS_LIMITS, aqi, side="left"))]
@@ -0,0 +1,45 @@
+"""Sérialisation JSON rapide (orjson si installé) pour les lectures de listes."""
+import json
+import os
+from typing import Any, Iterable, Sequence
+
+try:
+    import orjson
+except ImportError:  # repli sur la bibliothèque standard
+    orjson = None
+
+# Chemin rapide activé explicitement (FAST_JSON=true): lignes SQL sérialisées
+# directement, sans validation pydantic par ligne ni ré-encodage par la Gateway
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+
+def dumps(data: Any) -> bytes:
+    """Encode en JSON compact (UTF-8, caractères non ASCII conservés)."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """Décode un document JSON."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def rows_to_json(rows: Iterable[Sequence[Any]], columns: Sequence[str]) -> bytes:
+    """Encode des lignes (tuples) en tableau d'objets JSON {colonne: valeur}."""
+    return dumps([dict(zip(columns, row)) for row in rows])
+
+
+def merge_json_arrays(chunks: Iterable[bytes]) -> bytes:
+    """
+    Concatène des tableaux JSON (pages d'une même liste) sans les décoder:
+    b'[1,2]', b'[]', b'[3]' -> b'[1,2,3]'.
+    """
+    items = []
+    for chunk in chunks:
+        body = chunk.strip()[1:-1].strip()
+        if body:
+            items.append(body)
+    return b"[" + b",".join(items) + b"]"
@@ -0,0 +1,148 @@
+"""Fabrique de moteurs SQLAlchemy SQLite avec profil de connexion réglable."""
+import os
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Profils de connexion (SQLITE_PROFILE):
+# - wal: lecteurs et écrivain en parallèle (journal WAL), fsync allégé (NORMAL),
+#   cache de pages et mmap agrandis, attente en cas de verrou au lieu d'échouer
+# - default: comportement SQLite d'origine (journal DELETE, synchronous FULL)
+SQLITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout_ms": 5000,
+        "cache_size_kb": 20000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    "default": {
+        "journal_mode": None,
+        "synchronous": None,
+        "busy_timeout_ms": 5000,
+        "cache_size_kb": None,
+        "mmap_size": None,
+        "temp_store": None,
+    },
+}
+
+DEFAULT_PROFILE = "wal"
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def sqlite_settings(profile: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Réglages du profil demandé (ou SQLITE_PROFILE), surchargeables par
+    SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE,
+    SQLITE_POOL_SIZE et SQLITE_MAX_OVERFLOW.
+    """
+    name = (profile or os.getenv("SQLITE_PROFILE", DEFAULT_PROFILE)).lower()
+    if name not in SQLITE_PROFILES:
+        raise ValueError(f"Profil SQLite inconnu: {name} (disponibles: {', '.join(SQLITE_PROFILES)})")
+    settings = dict(SQLITE_PROFILES[name], profile=name)
+    settings["busy_timeout_ms"] = _env_int("SQLITE_BUSY_TIMEOUT_MS", settings["busy_timeout_ms"])
+    settings["cache_size_kb"] = _env_int("SQLITE_CACHE_SIZE_KB", settings["cache_size_kb"])
+    settings["mmap_size"] = _env_int("SQLITE_MMAP_SIZE", settings["mmap_size"])
+    settings["pool_size"] = _env_int("SQLITE_POOL_SIZE", 10)
+    settings["max_overflow"] = _env_int("SQLITE_MAX_OVERFLOW", 20)
+    return settings
+
+
+def pragma_statements(settings: Dict[str, Any]) -> list:
+    """PRAGMA exécutés à l'ouverture de chaque connexion."""
+    statements = []
+    if settings["journal_mode"]:
+        statements.append(f"PRAGMA journal_mode={settings['journal_mode']}")
+    if settings["synchronous"]:
+        statements.append(f"PRAGMA synchronous={settings['synchronous']}")
+    if settings["busy_timeout_ms"] is not None:
+        statements.append(f"PRAGMA busy_timeout={int(settings['busy_timeout_ms'])}")
+    if settings["cache_size_kb"]:
+        # Valeur négative: taille en KiB plutôt qu'en nombre de pages
+        statements.append(f"PRAGMA cache_size=-{int(settings['cache_size_kb'])}")
+    if settings["mmap_size"]:
+        statements.append(f"PRAGMA mmap_size={int(settings['mmap_size'])}")
+    if settings["temp_store"]:
+        statements.append(f"PRAGMA temp_store={settings['temp_store']}")
+    return statements
+
+
+def register_pragmas(engine: Engine, settings: Dict[str, Any]):
+    """Applique les PRAGMA du profil à chaque nouvelle connexion du moteur."""
+    statements = pragma_statements(settings)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def create_sqlite_engine(database_url: str, profile: Optional[str] = None, **kwargs) -> Engine:
+    """
+    Crée un moteur SQLite partagé par les threads du service: pool de connexions
+    persistantes (les PRAGMA et le cache de pages survivent entre les requêtes)
+    et PRAGMA du profil appliqués à chaque connexion.
+    """
+    settings = sqlite_settings(profile)
+    connect_args = {"check_same_thread": False, "timeout": settings["busy_timeout_ms"] / 1000}
+    connect_args.update(kwargs.pop("connect_args", {}))
+    kwargs.setdefault("poolclass", QueuePool)
+    kwargs.setdefault("pool_size", settings["pool_size"])
+    kwargs.setdefault("max_overflow", settings["max_overflow"])
+    engine = create_engine(database_url, connect_args=connect_args, **kwargs)
+    register_pragmas(engine, settings)
+    return engine
+
+
+def create_async_sqlite_engine(database_url: str, profile: Optional[str] = None, **kwargs) -> AsyncEngine:
+    """
+    Équivalent asynchrone (pilote aiosqlite, URL sqlite+aiosqlite://): mêmes
+    PRAGMA et même pool, les requêtes n'occupent pas de thread du serveur.
+    """
+    settings = sqlite_settings(profile)
+    connect_args = {"timeout": settings["busy_timeout_ms"] / 1000}
+    connect_args.update(kwargs.pop("connect_args", {}))
+    kwargs.setdefault("poolclass", AsyncAdaptedQueuePool)
+    kwargs.setdefault("pool_size", settings["pool_size"])
+    kwargs.setdefault("max_overflow", settings["max_overflow"])
+    engine = create_async_engine(database_url, connect_args=connect_args, **kwargs)
+    register_pragmas(engine.sync_engine, settings)
+    return engine
+
+
+def close_sqlite_engine(engine: Engine):
+    """
+    Arrêt du service: reporte le journal WAL dans le fichier principal et le
+    vide (PRAGMA wal_checkpoint(TRUNCATE), sans effet hors mode WAL), puis
+    ferme les connexions du pool.
+    """
+    try:
+        with engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    except Exception as e:
+        print(f"⚠️ Checkpoint WAL impossible: {e}")
+    finally:
+        engine.dispose()
+
+
+async def close_async_sqlite_engine(engine: AsyncEngine):
+    """Équivalent asynchrone de close_sqlite_engine."""
+    try:
+        async with engine.connect() as connection:
+            await connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    except Exception as e:
+        print(f"⚠️ Checkpoint WAL impossible: {e}")
+    finally:
+        await engine.dispose()
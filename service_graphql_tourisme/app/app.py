@@ -6,6 +6,8 @@ from .database import Base, engine
 from .models import AttractionDB
 from .database import SessionLocal
 import uvicorn
+# Module partagé common/ (chemin ajouté par .database)
+from common.sqlite_engine import close_sqlite_engine
 
 # Créer les tables (commenté pour ne pas écraser les données existantes)
 # Base.metadata.create_all(bind=engine)
@@ -333,6 +335,12 @@ graphql_app = GraphQLRouter(schema)
 app.include_router(graphql_app, prefix="/graphql")
 
 
+@app.on_event("shutdown")
+def close_database():
+    """Reporte le journal WAL dans la base et ferme les connexions du pool."""
+    close_sqlite_engine(engine)
+
+
 @app.get("/")
 def root():
     """Point d'entrée de l'API."""
@@ -1,16 +1,18 @@
 """Configuration de la base de données pour le service urgence."""
-from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 import os
+import sys
+
+# Module partagé common/ (racine du dépôt en local, /app dans les conteneurs)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from common.sqlite_engine import create_sqlite_engine
 
 # Chemin de la base de données (volume Docker persistant)
 DATABASE_URL = "sqlite:///./data/urgence.db"
 
-# Configuration du moteur SQLAlchemy
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+# Configuration du moteur SQLAlchemy (profil SQLite choisi par SQLITE_PROFILE, WAL par défaut)
+engine = create_sqlite_engine(DATABASE_URL)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -1,11 +1,13 @@
 """Serveur gRPC pour le service d'urgence."""
 import grpc
+import signal
 from concurrent import futures
 from datetime import datetime
 
 import emergency_pb2
 import emergency_pb2_grpc
 from database import Base, engine, SessionLocal
+from common.sqlite_engine import close_sqlite_engine
 from models import VehicleDB, InterventionDB
 
 
@@ -256,7 +258,15 @@ def serve():
     # Initialiser les données
     # init_demo_data()  # Désactivé pour utiliser les données existantes
     
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    # Accepter les pings keepalive des clients à canal persistant (Gateway)
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=10),
+        options=[
+            ('grpc.keepalive_permit_without_calls', 1),
+            ('grpc.http2.min_recv_ping_interval_without_data_ms', 10000),
+            ('grpc.http2.max_ping_strikes', 0),
+        ]
+    )
     emergency_pb2_grpc.add_EmergencyServiceServicer_to_server(
         EmergencyServiceServicer(), server
     )
@@ -272,11 +282,15 @@ def serve():
     print("Interventions: 6 en base - Grande Tunis")
     print("=" * 50)
     
+    # docker stop (SIGTERM): laisse finir les appels en cours puis ferme la base
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop(5))
     try:
         server.wait_for_termination()
     except KeyboardInterrupt:
         print("\n⚠️ Arrêt du serveur...")
         server.stop(0)
+    finally:
+        close_sqlite_engine(engine)
 
 
 if __name__ == '__main__':
@@ -1,12 +1,23 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, Body
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+import asyncio
+import os
+import time
+from datetime import datetime
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Imports locaux
-from .database import get_db, engine, Base, SessionLocal
-from .models import TransportDB
-from . import crud
+from .database import get_async_db, engine, async_engine, Base, SessionLocal, AsyncSessionLocal
+from .models import TransportDB, ZoneDB, TransportZoneDB, TransportChangeDB
+from . import crud, crud_async
+from .catalog import catalog
+from .ingest import StatusIngestor
+# Module partagé common/ (chemin ajouté par .database)
+from common import fastjson
+from common.sqlite_engine import close_async_sqlite_engine
 
 # Créer les tables au démarrage (commenté pour préserver les données)
 # Base.metadata.create_all(bind=engine)
@@ -50,6 +61,32 @@ def init_demo_data():
 
 # init_demo_data()  # Désactivé pour utiliser les données existantes
 
+
+def ensure_schema():
+    """
+    Met à niveau une base existante sans toucher aux données: index manquants,
+    tables des zones et du journal des modifications, puis construction
+    initiale de l'index ligne <-> zone.
+    """
+    if not inspect(engine).has_table(TransportDB.__tablename__):
+        return
+    for index in TransportDB.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    Base.metadata.create_all(
+        bind=engine, tables=[ZoneDB.__table__, TransportZoneDB.__table__, TransportChangeDB.__table__]
+    )
+    db = SessionLocal()
+    try:
+        added = crud.seed_zones(db)
+        if added or db.query(TransportZoneDB).count() == 0:
+            links = crud.rebuild_zone_index(db)
+            print(f"✅ Index zones reconstruit: {links} associations ligne/zone")
+    finally:
+        db.close()
+
+
+ensure_schema()
+
 # Métadonnées OpenAPI pour une documentation professionnelle
 app = FastAPI(
     title="Service REST Transport - TuniLink",
@@ -59,6 +96,29 @@ app = FastAPI(
     redoc_url="/redoc"  # ReDoc alternatif
 )
 
+
+# Ingestion différée des statuts (POST /transports/status)
+status_ingestor = StatusIngestor(
+    AsyncSessionLocal,
+    batch_size=int(os.getenv("TRANSPORT_INGEST_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("TRANSPORT_INGEST_FLUSH_INTERVAL", "0.2"))
+)
+
+
+@app.on_event("startup")
+async def start_ingest():
+    """Démarre la boucle d'écriture des statuts."""
+    status_ingestor.start()
+
+
+@app.on_event("shutdown")
+async def close_database():
+    """Écrit les statuts en attente, reporte le journal WAL dans la base et ferme les pools."""
+    await status_ingestor.stop()
+    await close_async_sqlite_engine(async_engine)
+    engine.dispose()
+
+
 # Modèle Pydantic avec validation (Obligatoire pour une bonne note)
 class Transport(BaseModel):
     id: int = Field(..., description="Identifiant unique du transport", gt=0)
@@ -86,26 +146,298 @@ class TransportUpdate(BaseModel):
     route: Optional[str] = Field(None, min_length=1)
     status: Optional[str] = Field(None, min_length=1)
 
+class TransportBulkUpdate(TransportUpdate):
+    id: int = Field(..., description="Identifiant du transport à modifier", gt=0)
+
+class StatusUpdate(BaseModel):
+    id: int = Field(..., description="Identifiant du transport", gt=0)
+    status: str = Field(..., min_length=1, description="Nouvel état (operationnel, retard, en_maintenance...)")
+
+class BulkItemResult(BaseModel):
+    index: int = Field(..., description="Position de l'élément dans la requête")
+    id: Optional[int] = Field(None, description="Identifiant du transport")
+    status: str = Field(..., description="created, updated, deleted ou not_found")
+
+class BulkResult(BaseModel):
+    applied: int
+    failed: int
+    results: List[BulkItemResult]
+
+class TransportChange(BaseModel):
+    seq: int = Field(..., description="Curseur de la modification")
+    op: str = Field(..., description="insert, update ou delete")
+    id: int = Field(..., description="Identifiant du transport")
+    transport: Optional[Transport] = Field(None, description="État après modification (absent pour delete)")
+    changed_at: Optional[datetime] = None
+
+class ChangeFeed(BaseModel):
+    changes: List[TransportChange]
+    cursor: int = Field(..., description="Valeur de `since` pour l'appel suivant")
+    has_more: bool = Field(..., description="D'autres modifications sont disponibles immédiatement")
+
+class Zone(BaseModel):
+    key: str = Field(..., description="Nom normalisé (sans accents, minuscules)")
+    name: str = Field(..., description="Nom de la zone")
+    lines: int = Field(..., description="Nombre de lignes desservant la zone")
+
+# Nombre maximal d'éléments par requête groupée
+BULK_MAX_ITEMS = int(os.getenv("TRANSPORT_BULK_MAX_ITEMS", "5000"))
+
+# Attente maximale (secondes) d'un appel en long-polling sur /transports/changes
+CHANGES_MAX_WAIT = float(os.getenv("TRANSPORT_CHANGES_MAX_WAIT", "30"))
+
+
+def check_bulk_size(items: list):
+    """Refuse les lots vides ou trop volumineux."""
+    if not items:
+        raise HTTPException(status_code=422, detail="Lot vide")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Lot limité à {BULK_MAX_ITEMS} éléments")
+
+
+def bulk_result(results: List[BulkItemResult]) -> BulkResult:
+    """Résumé d'une opération groupée."""
+    failed = sum(1 for item in results if item.status == "not_found")
+    return BulkResult(applied=len(results) - failed, failed=failed, results=results)
+
+
+def change_item(change: TransportChangeDB) -> TransportChange:
+    """Élément du flux de modifications."""
+    transport = None
+    if change.op != "delete":
+        transport = Transport(id=change.transport_id, mode=change.mode, route=change.route, status=change.status)
+    return TransportChange(
+        seq=change.seq, op=change.op, id=change.transport_id, transport=transport, changed_at=change.changed_at
+    )
+
+
+def fast_json_response(response: Response, rows: list, next_cursor: Optional[int] = None) -> Response:
+    """
+    Réponse JSON encodée directement depuis les tuples (FAST_JSON), en
+    conservant les en-têtes déjà posés par les dépendances (ETag...).
+    """
+    headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+    return Response(
+        content=fastjson.rows_to_json(rows, crud_async.TRANSPORT_COLUMNS),
+        media_type="application/json",
+        headers=headers
+    )
+
+
+async def conditional_get(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """
+    Lectures conditionnelles: si la copie du client correspond à la version
+    courante du catalogue (If-None-Match / If-Modified-Since), répond 304
+    après une seule requête indexée (journal des modifications), sans lire
+    les transports. Sinon ajoute ETag et Last-Modified à la réponse.
+    Les validateurs sont lus avant la requête SQL: une écriture concurrente
+    donne au pire un ETag plus ancien que les données, jamais l'inverse.
+    """
+    state = await crud_async.catalog_state(db)
+    headers = state.headers()
+    if state.not_modified(request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
 @app.get("/health", tags=["Health"])
-def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     """Endpoint de santé pour vérifier que le service est opérationnel."""
-    count = db.query(TransportDB).count()
+    count = await crud_async.count_transports(db)
     return {"status": "ok", "service": "transport", "transports_count": count}
 
 
-@app.get("/transports/", response_model=List[Transport], tags=["Transport"])
-@app.get("/transport", response_model=List[Transport], tags=["Transport"])
-def list_transports(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Liste tous les transports disponibles avec pagination."""
-    transports = crud.get_transports(db, skip=skip, limit=limit)
+@app.get("/transports/", response_model=List[Transport], tags=["Transport"], dependencies=[Depends(conditional_get)])
+@app.get("/transport", response_model=List[Transport], tags=["Transport"], dependencies=[Depends(conditional_get)])
+async def list_transports(
+    response: Response,
+    cursor: Optional[int] = Query(None, ge=0, description="Curseur: id du dernier transport de la page précédente"),
+    limit: int = Query(100, ge=1, le=1000),
+    skip: Optional[int] = Query(None, ge=0, description="Pagination par OFFSET (obsolète, préférer cursor)"),
+    status: Optional[str] = Query(None, description="État exact (ex: operationnel)"),
+    mode: Optional[List[str]] = Query(None, description="Un ou plusieurs modes (mode=Bus&mode=Métro)"),
+    zone: Optional[List[str]] = Query(None, description="Zone desservie (plusieurs: l'une d'elles), voir /zones"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Liste les transports par pages triées par id, filtrés côté base.
+
+    Pagination par curseur: passer la valeur de l'en-tête X-Next-Cursor dans
+    `cursor` pour obtenir la page suivante. L'en-tête est absent sur la dernière page.
+
+    Réponses conditionnelles: renvoyer l'ETag reçu dans If-None-Match donne
+    un 304 sans accès à la base tant que le catalogue n'a pas changé.
+    """
+    filters = {"status": status, "modes": mode, "zones": zone}
+    if fastjson.FAST_JSON and skip is None:
+        # Chemin rapide: tuples SQL encodés directement, sans modèle pydantic par ligne
+        rows = await crud_async.get_transport_rows(db, after_id=cursor or 0, limit=limit, **filters)
+        return fast_json_response(response, rows, next_cursor=rows[-1][0] if len(rows) == limit else None)
+    if skip is not None and cursor is None:
+        transports = await crud_async.get_transports(db, skip=skip, limit=limit, **filters)
+    else:
+        transports = await crud_async.get_transports_after(db, after_id=cursor or 0, limit=limit, **filters)
+        if len(transports) == limit:
+            response.headers["X-Next-Cursor"] = str(transports[-1].id)
     return transports
 
 
-@app.get("/transports/{transport_id}", response_model=Transport, tags=["Transport"])
-@app.get("/transport/{transport_id}", response_model=Transport, tags=["Transport"])
-def get_transport(transport_id: int, db: Session = Depends(get_db)):
+@app.get("/transports/changes", response_model=ChangeFeed, tags=["Transport"])
+async def list_changes(
+    since: int = Query(0, ge=0, description="Curseur: `cursor` de la réponse précédente (0: depuis le début)"),
+    limit: int = Query(500, ge=1, le=5000),
+    wait: float = Query(0, ge=0, le=CHANGES_MAX_WAIT, description="Long-polling: secondes d'attente si rien n'a changé"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Flux des modifications du catalogue (créations, mises à jour, suppressions)
+    postérieures au curseur `since`, dans l'ordre où elles ont été validées.
+
+    Pour répliquer le catalogue: lire l'export (en-tête X-Change-Cursor), puis
+    appeler ce flux en repassant `cursor` comme `since`. Avec `wait`, la réponse
+    est retenue jusqu'à la prochaine modification (ou l'expiration du délai).
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        version = catalog.version
+        changes = await crud_async.get_changes(db, since=since, limit=limit)
+        remaining = deadline - time.monotonic()
+        if changes or remaining <= 0:
+            break
+        # Libère la connexion (et l'instantané de lecture WAL) pendant l'attente
+        await db.rollback()
+        if not await catalog.wait_for_change(version, remaining):
+            break
+    return ChangeFeed(
+        changes=[change_item(change) for change in changes],
+        cursor=changes[-1].seq if changes else since,
+        has_more=len(changes) == limit
+    )
+
+
+@app.get("/transports/export", tags=["Transport"], dependencies=[Depends(conditional_get)])
+async def export_transports(db: AsyncSession = Depends(get_async_db)):
+    """
+    Export complet du catalogue en flux NDJSON (un transport JSON par ligne).
+    Les lignes sont lues par lots depuis un curseur côté serveur: la mémoire
+    utilisée ne dépend pas de la taille de la table.
+
+    L'en-tête X-Change-Cursor donne le point de départ du flux /transports/changes
+    (lu avant l'export: les modifications concurrentes seront rejouées).
+    """
+    state = await crud_async.catalog_state(db)
+    headers = {**state.headers(), "X-Change-Cursor": str(state.seq)}
+    await db.close()
+
+    async def generate():
+        async with AsyncSessionLocal() as db:
+            async for batch in crud_async.iter_transports(db):
+                yield b"".join(fastjson.dumps(row) + b"\n" for row in batch)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson", headers=headers)
+
+
+@app.get("/zones", response_model=List[Zone], tags=["Zones"], dependencies=[Depends(conditional_get)])
+async def list_zones(db: AsyncSession = Depends(get_async_db)):
+    """Zones connues et nombre de lignes qui les desservent (index ligne <-> zone)."""
+    return await crud_async.get_zones(db)
+
+
+@app.get("/zones/{zone}/transports", response_model=List[Transport], tags=["Zones"], dependencies=[Depends(conditional_get)])
+async def list_zone_transports(
+    zone: str,
+    response: Response,
+    status: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Lignes desservant une zone, lues depuis l'index ligne <-> zone."""
+    if not await crud_async.resolve_zone_ids(db, [zone]):
+        raise HTTPException(status_code=404, detail="Zone inconnue")
+    if fastjson.FAST_JSON:
+        rows = await crud_async.get_transport_rows(db, limit=None, status=status, zones=[zone])
+        return fast_json_response(response, rows)
+    return await crud_async.get_transports(db, limit=None, status=status, zones=[zone])
+
+
+@app.post("/zones/rebuild", tags=["Zones"])
+async def rebuild_zones(db: AsyncSession = Depends(get_async_db)):
+    """Reconstruit entièrement l'index ligne <-> zone."""
+    return {"links": await crud_async.rebuild_zone_index(db)}
+
+
+@app.post("/transports/bulk", response_model=BulkResult, status_code=201, tags=["Transport"])
+async def bulk_create_transports(transports: List[TransportCreate], db: AsyncSession = Depends(get_async_db)):
+    """Crée plusieurs transports en une seule transaction."""
+    check_bulk_size(transports)
+    created = await crud_async.bulk_create_transports(db, [t.dict() for t in transports])
+    return bulk_result([
+        BulkItemResult(index=index, id=t["id"], status="created")
+        for index, t in enumerate(created)
+    ])
+
+
+@app.put("/transports/bulk", response_model=BulkResult, tags=["Transport"])
+async def bulk_update_transports(transports: List[TransportBulkUpdate], db: AsyncSession = Depends(get_async_db)):
+    """Met à jour plusieurs transports en une seule transaction (résultat par élément)."""
+    check_bulk_size(transports)
+    found = set(await crud_async.bulk_update_transports(db, [t.dict() for t in transports]))
+    return bulk_result([
+        BulkItemResult(index=index, id=t.id, status="updated" if t.id in found else "not_found")
+        for index, t in enumerate(transports)
+    ])
+
+
+@app.delete("/transports/bulk", response_model=BulkResult, tags=["Transport"])
+async def bulk_delete_transports(ids: List[int] = Body(..., description="Identifiants à supprimer"), db: AsyncSession = Depends(get_async_db)):
+    """Supprime plusieurs transports en une seule transaction (résultat par élément)."""
+    check_bulk_size(ids)
+    deleted = set(await crud_async.bulk_delete_transports(db, ids))
+    return bulk_result([
+        BulkItemResult(index=index, id=transport_id, status="deleted" if transport_id in deleted else "not_found")
+        for index, transport_id in enumerate(ids)
+    ])
+
+
+@app.post("/transports/status", status_code=202, tags=["Transport"])
+async def ingest_statuses(
+    updates: List[StatusUpdate],
+    response: Response,
+    sync: bool = Query(False, description="Attendre l'écriture en base (résultat par élément)")
+):
+    """
+    Ingestion de statuts à haut débit (flux AVL): les statuts sont mis en file,
+    regroupés par ligne (le dernier l'emporte) et écrits par lots. Réponse 202
+    immédiate; avec sync=true, réponse 200 après validation du lot, avec le
+    résultat de chaque élément.
+    """
+    check_bulk_size(updates)
+    future = status_ingestor.submit([(u.id, u.status) for u in updates], wait=sync)
+    if future is None:
+        return {"accepted": len(updates), "pending": status_ingestor.pending}
+    try:
+        found = await asyncio.shield(future)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Écriture des statuts impossible: {e}")
+    response.status_code = 200
+    return bulk_result([
+        BulkItemResult(index=index, id=u.id, status="updated" if u.id in found else "not_found")
+        for index, u in enumerate(updates)
+    ])
+
+
+@app.get("/transports/status/stats", tags=["Transport"])
+async def ingest_stats():
+    """File d'ingestion des statuts: en attente, regroupés, lots écrits et retard d'écriture."""
+    return status_ingestor.stats()
+
+
+@app.get("/transports/{transport_id}", response_model=Transport, tags=["Transport"], dependencies=[Depends(conditional_get)])
+@app.get("/transport/{transport_id}", response_model=Transport, tags=["Transport"], dependencies=[Depends(conditional_get)])
+async def get_transport(transport_id: int, db: AsyncSession = Depends(get_async_db)):
     """Récupère un transport par son ID."""
-    transport = crud.get_transport(db, transport_id)
+    transport = await crud_async.get_transport(db, transport_id)
     if not transport:
         raise HTTPException(status_code=404, detail="Transport non trouvé")
     return transport
@@ -113,9 +445,9 @@ def get_transport(transport_id: int, db: Session = Depends(get_db)):
 
 @app.post("/transports/", response_model=Transport, status_code=201, tags=["Transport"])
 @app.post("/transport", response_model=Transport, status_code=201, tags=["Transport"])
-def create_transport(transport: TransportCreate, db: Session = Depends(get_db)):
+async def create_transport(transport: TransportCreate, db: AsyncSession = Depends(get_async_db)):
     """Crée un nouveau transport."""
-    new_transport = crud.create_transport(
+    new_transport = await crud_async.create_transport(
         db, 
         mode=transport.mode, 
         route=transport.route, 
@@ -126,9 +458,9 @@ def create_transport(transport: TransportCreate, db: Session = Depends(get_db)):
 
 @app.put("/transports/{transport_id}", response_model=Transport, tags=["Transport"])
 @app.put("/transport/{transport_id}", response_model=Transport, tags=["Transport"])
-def update_transport(transport_id: int, transport: TransportUpdate, db: Session = Depends(get_db)):
+async def update_transport(transport_id: int, transport: TransportUpdate, db: AsyncSession = Depends(get_async_db)):
     """Met à jour un transport existant."""
-    updated_transport = crud.update_transport(
+    updated_transport = await crud_async.update_transport(
         db, 
         transport_id, 
         mode=transport.mode, 
@@ -142,9 +474,9 @@ def update_transport(transport_id: int, transport: TransportUpdate, db: Session
 
 @app.delete("/transports/{transport_id}", status_code=204, tags=["Transport"])
 @app.delete("/transport/{transport_id}", status_code=204, tags=["Transport"])
-def delete_transport(transport_id: int, db: Session = Depends(get_db)):
+async def delete_transport(transport_id: int, db: AsyncSession = Depends(get_async_db)):
     """Supprime un transport."""
-    success = crud.delete_transport(db, transport_id)
+    success = await crud_async.delete_transport(db, transport_id)
     if not success:
         raise HTTPException(status_code=404, detail="Transport non trouvé")
     return
@@ -0,0 +1,117 @@
+"""Version du catalogue des transports (validateurs HTTP ETag / Last-Modified)."""
+import asyncio
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Optional, Tuple
+
+
+class CatalogState:
+    """
+    Validateurs HTTP du catalogue, lus en base (crud_async.catalog_state):
+    identiques pour tous les workers et conservés après un redémarrage.
+
+    - ETag: curseur de la dernière modification du journal (transport_changes.seq,
+      écrit dans la transaction de chaque écriture) et nombre de zones
+    - Last-Modified: date de cette modification, à la seconde près. Il n'est pas
+      envoyé tant que cette seconde n'est pas écoulée: une autre écriture
+      pourrait encore porter la même date et le client recevrait un 304 à tort.
+
+    Les écritures faites hors de crud (ex: init_db) ne passent pas par le
+    journal et ne changent pas ces validateurs.
+    """
+
+    def __init__(self, seq: int, zones: int, changed_at: Optional[datetime]):
+        self.seq = seq
+        self.zones = zones
+        if changed_at is not None and changed_at.tzinfo is None:
+            # CURRENT_TIMESTAMP de SQLite: UTC sans fuseau
+            changed_at = changed_at.replace(tzinfo=timezone.utc)
+        self.changed_at = changed_at.replace(microsecond=0) if changed_at is not None else None
+
+    @property
+    def etag(self) -> str:
+        return f'W/"{self.seq}-{self.zones}"'
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        """Date HTTP de la dernière modification, None si absente ou dans la seconde en cours."""
+        if self.changed_at is None:
+            return None
+        if self.changed_at >= datetime.now(timezone.utc).replace(microsecond=0):
+            return None
+        return format_datetime(self.changed_at, usegmt=True)
+
+    def headers(self) -> dict:
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = self.last_modified
+        return headers
+
+    def not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        """
+        Vrai si la copie du client est à jour. If-None-Match est prioritaire;
+        If-Modified-Since n'est utilisé qu'en son absence.
+        """
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or self.etag in tags or self.etag[2:] in tags
+        if if_modified_since is not None and self.changed_at is not None:
+            try:
+                return self.changed_at <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+class CatalogVersion:
+    """
+    Compteur en mémoire incrémenté à chaque écriture du processus (crud.py,
+    crud_async.py), utilisé seulement pour réveiller les requêtes en
+    long-polling (flux /transports/changes) via wait_for_change(). Les
+    validateurs HTTP viennent de la base (CatalogState).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = 0
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def bump(self) -> int:
+        """Signale une modification du catalogue; retourne la nouvelle version."""
+        with self._lock:
+            self.version += 1
+            version, waiters, self._waiters = self.version, self._waiters, []
+        # bump() peut être appelé hors de la boucle des waiters (thread du pool)
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+        return version
+
+    async def wait_for_change(self, version: int, timeout: float) -> bool:
+        """
+        Attend que la version dépasse `version` (lue avant la requête SQL, pour
+        ne manquer aucune écriture). Retourne False si le délai expire.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self.version != version:
+                return True
+            self._waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+catalog = CatalogVersion()
@@ -1,7 +1,10 @@
 """Opérations CRUD pour la base de données."""
+from sqlalchemy import delete, false, func, insert, select, update
 from sqlalchemy.orm import Session
-from .models import TransportDB
-from typing import List, Optional
+from .catalog import catalog
+from .models import TransportChangeDB, TransportDB, TransportZoneDB, ZoneDB
+from .zones import DEFAULT_ZONES, match_zones, normalize, zone_forms
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 
 def get_transport(db: Session, transport_id: int) -> Optional[TransportDB]:
@@ -9,16 +12,91 @@ def get_transport(db: Session, transport_id: int) -> Optional[TransportDB]:
     return db.query(TransportDB).filter(TransportDB.id == transport_id).first()
 
 
-def get_transports(db: Session, skip: int = 0, limit: int = 100) -> List[TransportDB]:
+def get_transports(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    modes: Optional[List[str]] = None,
+    zones: Optional[List[str]] = None
+) -> List[TransportDB]:
     """Récupère une liste de transports avec pagination."""
-    return db.query(TransportDB).offset(skip).limit(limit).all()
+    query = filter_transports(db, db.query(TransportDB), status, modes, zones)
+    return query.offset(skip).limit(limit).all()
+
+
+def filter_transports(
+    db: Session,
+    query,
+    status: Optional[str] = None,
+    modes: Optional[List[str]] = None,
+    zones: Optional[List[str]] = None
+):
+    """
+    Applique les filtres de liste en SQL:
+    - status: égalité (index status/mode)
+    - modes: appartenance (IN), un des modes demandés
+    - zones: lignes desservant au moins une des zones (index ligne <-> zone)
+    """
+    if status:
+        query = query.filter(TransportDB.status == status)
+    if modes:
+        query = query.filter(TransportDB.mode.in_(modes))
+    if zones:
+        zone_ids = resolve_zone_ids(db, zones)
+        if not zone_ids:
+            return query.filter(false())
+        query = query.filter(TransportDB.id.in_(
+            select(TransportZoneDB.transport_id).where(TransportZoneDB.zone_id.in_(zone_ids))
+        ))
+    return query
+
+
+def get_transports_after(
+    db: Session,
+    after_id: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    modes: Optional[List[str]] = None,
+    zones: Optional[List[str]] = None
+) -> List[TransportDB]:
+    """
+    Pagination par curseur (keyset): transports d'id > after_id, triés par id.
+    Utilise l'index de clé primaire, le coût ne dépend pas de la position de la page.
+    """
+    query = filter_transports(db, db.query(TransportDB), status, modes, zones)
+    return (
+        query
+        .filter(TransportDB.id > after_id)
+        .order_by(TransportDB.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def iter_transports(db: Session, batch_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Parcourt tous les transports par lots via un curseur côté serveur (yield_per):
+    seul le lot courant est en mémoire, quelle que soit la taille de la table.
+    """
+    result = db.execute(
+        select(TransportDB.id, TransportDB.mode, TransportDB.route, TransportDB.status)
+        .order_by(TransportDB.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for rows in result.mappings().partitions():
+        yield [dict(row) for row in rows]
 
 
 def create_transport(db: Session, mode: str, route: str, status: str) -> TransportDB:
     """Crée un nouveau transport."""
     db_transport = TransportDB(mode=mode, route=route, status=status)
     db.add(db_transport)
+    db.flush()
+    index_transport_zones(db, db_transport)
+    log_changes(db, "insert", [_transport_dict(db_transport)])
     db.commit()
+    catalog.bump()
     db.refresh(db_transport)
     return db_transport
 
@@ -35,14 +113,20 @@ def update_transport(
     if not db_transport:
         return None
     
+    before = _transport_dict(db_transport)
     if mode is not None:
         db_transport.mode = mode
-    if route is not None:
+    if route is not None and route != db_transport.route:
         db_transport.route = route
+        index_transport_zones(db, db_transport)
     if status is not None:
         db_transport.status = status
+    after = _transport_dict(db_transport)
+    if after != before:
+        log_changes(db, "update", [after])
     
     db.commit()
+    catalog.bump()
     db.refresh(db_transport)
     return db_transport
 
@@ -53,6 +137,246 @@ def delete_transport(db: Session, transport_id: int) -> bool:
     if not db_transport:
         return False
     
+    db.query(TransportZoneDB).filter(TransportZoneDB.transport_id == transport_id).delete()
     db.delete(db_transport)
+    log_changes(db, "delete", [{"id": transport_id}])
     db.commit()
+    catalog.bump()
     return True
+
+
+# ============================================
+# OPÉRATIONS PAR LOT (une transaction par lot)
+# ============================================
+
+def _transport_dict(db_transport: TransportDB) -> Dict[str, Any]:
+    return {
+        "id": db_transport.id,
+        "mode": db_transport.mode,
+        "route": db_transport.route,
+        "status": db_transport.status,
+    }
+
+
+def _link_zones(db: Session, transports: List[Tuple[int, str]]):
+    """Indexe les zones de plusieurs lignes (id, route) en un seul INSERT multi-lignes."""
+    zones = load_zone_forms(db)
+    links = [
+        {"transport_id": transport_id, "zone_id": zone_id}
+        for transport_id, route in transports
+        for zone_id in match_zones(route, zones)
+    ]
+    if links:
+        db.execute(insert(TransportZoneDB), links)
+
+
+def bulk_create_transports(db: Session, items: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Crée plusieurs transports dans une seule transaction: un INSERT multi-lignes
+    (RETURNING, dans l'ordre des éléments) puis l'index des zones.
+    """
+    created = [
+        _transport_dict(t)
+        for t in db.scalars(insert(TransportDB).returning(TransportDB, sort_by_parameter_order=True), items)
+    ]
+    _link_zones(db, [(t["id"], t["route"]) for t in created])
+    log_changes(db, "insert", created)
+    db.commit()
+    catalog.bump()
+    return created
+
+
+def bulk_update_transports(db: Session, items: List[Dict[str, Any]]) -> List[int]:
+    """
+    Met à jour plusieurs transports (clé "id" + champs à modifier) dans une seule
+    transaction: un SELECT des ids existants, puis des UPDATE par clé primaire en
+    executemany. Retourne les ids trouvés; les autres sont ignorés.
+    """
+    ids = {item["id"] for item in items}
+    routes = dict(db.query(TransportDB.id, TransportDB.route).filter(TransportDB.id.in_(ids)))
+    changes = [
+        {key: value for key, value in item.items() if value is not None}
+        for item in items if item["id"] in routes
+    ]
+    changes = [change for change in changes if len(change) > 1]
+    if changes:
+        db.execute(update(TransportDB), changes)
+
+    # Réindexer les zones des lignes dont la route a changé (dernière valeur par id)
+    rerouted = {c["id"]: c["route"] for c in changes if "route" in c}
+    rerouted = {transport_id: route for transport_id, route in rerouted.items() if route != routes[transport_id]}
+    if rerouted:
+        db.execute(delete(TransportZoneDB).where(TransportZoneDB.transport_id.in_(rerouted.keys())))
+        _link_zones(db, list(rerouted.items()))
+    if changes:
+        updated = db.query(TransportDB).filter(TransportDB.id.in_({c["id"] for c in changes}))
+        log_changes(db, "update", [_transport_dict(t) for t in updated])
+    db.commit()
+    if changes:
+        catalog.bump()
+    return list(routes)
+
+
+def bulk_delete_transports(db: Session, ids: List[int]) -> List[int]:
+    """Supprime plusieurs transports (et leurs zones) dans une seule transaction."""
+    existing = [transport_id for (transport_id,) in db.query(TransportDB.id).filter(TransportDB.id.in_(set(ids)))]
+    if existing:
+        db.execute(delete(TransportZoneDB).where(TransportZoneDB.transport_id.in_(existing)))
+        db.execute(delete(TransportDB).where(TransportDB.id.in_(existing)))
+        log_changes(db, "delete", [{"id": transport_id} for transport_id in existing])
+    db.commit()
+    if existing:
+        catalog.bump()
+    return existing
+
+
+def apply_statuses(db: Session, statuses: Dict[int, str]) -> List[int]:
+    """
+    Applique des statuts {id: status} en une transaction (ingestion en écriture
+    différée): un SELECT des statuts courants, puis un UPDATE executemany des
+    seules lignes dont le statut change. Retourne les ids trouvés.
+    """
+    current = dict(db.query(TransportDB.id, TransportDB.status).filter(TransportDB.id.in_(statuses.keys())))
+    changes = [
+        {"id": transport_id, "status": status}
+        for transport_id, status in statuses.items()
+        if transport_id in current and current[transport_id] != status
+    ]
+    if changes:
+        db.execute(update(TransportDB), changes)
+        updated = db.query(TransportDB).filter(TransportDB.id.in_({c["id"] for c in changes}))
+        log_changes(db, "update", [_transport_dict(t) for t in updated])
+    db.commit()
+    if changes:
+        catalog.bump()
+    return list(current)
+
+
+# ============================================
+# JOURNAL DES MODIFICATIONS (flux /transports/changes)
+# ============================================
+
+def change_rows(op: str, transports: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Lignes du journal pour des transports modifiés (état après modification)."""
+    return [
+        {
+            "transport_id": t["id"],
+            "op": op,
+            "mode": t.get("mode"),
+            "route": t.get("route"),
+            "status": t.get("status"),
+        }
+        for t in transports
+    ]
+
+
+def log_changes(db: Session, op: str, transports: List[Dict[str, Any]]):
+    """Ajoute des modifications au journal, dans la transaction en cours (sans commit)."""
+    if transports:
+        db.execute(insert(TransportChangeDB), change_rows(op, transports))
+
+
+def get_changes(db: Session, since: int = 0, limit: int = 500) -> List[TransportChangeDB]:
+    """Modifications de curseur (seq) strictement supérieur à `since`, dans l'ordre."""
+    return (
+        db.query(TransportChangeDB)
+        .filter(TransportChangeDB.seq > since)
+        .order_by(TransportChangeDB.seq)
+        .limit(limit)
+        .all()
+    )
+
+
+def latest_change_seq(db: Session) -> int:
+    """Curseur de la dernière modification enregistrée (0 si aucune)."""
+    return db.query(func.max(TransportChangeDB.seq)).scalar() or 0
+
+
+# ============================================
+# INDEX ZONE <-> LIGNE
+# ============================================
+
+def seed_zones(db: Session) -> int:
+    """Ajoute les zones connues absentes de la table (retourne le nombre ajouté)."""
+    existing = {key for (key,) in db.query(ZoneDB.key)}
+    added = 0
+    for name, aliases in DEFAULT_ZONES.items():
+        key = normalize(name)
+        if key not in existing:
+            db.add(ZoneDB(key=key, name=name, aliases="|".join(normalize(a) for a in aliases)))
+            added += 1
+    db.commit()
+    if added:
+        catalog.bump()
+    return added
+
+
+def load_zone_forms(db: Session) -> List[Tuple[int, List[str]]]:
+    """Zones et leurs formes normalisées, pour la correspondance avec les routes."""
+    return [(zone.id, zone_forms(zone.key, zone.aliases)) for zone in db.query(ZoneDB)]
+
+
+def index_transport_zones(
+    db: Session,
+    db_transport: TransportDB,
+    zones: Optional[List[Tuple[int, List[str]]]] = None
+):
+    """Recalcule les zones d'une ligne (sans commit)."""
+    if zones is None:
+        zones = load_zone_forms(db)
+    db.query(TransportZoneDB).filter(TransportZoneDB.transport_id == db_transport.id).delete()
+    db.add_all(
+        TransportZoneDB(transport_id=db_transport.id, zone_id=zone_id)
+        for zone_id in match_zones(db_transport.route, zones)
+    )
+
+
+def rebuild_zone_index(db: Session) -> int:
+    """
+    Reconstruit tout l'index ligne <-> zone (retourne le nombre d'associations).
+    Les lignes dont les zones changent sont inscrites au journal (update): les
+    listes filtrées par zone changent, l'ETag du catalogue aussi.
+    """
+    zones = load_zone_forms(db)
+    before = set(db.query(TransportZoneDB.transport_id, TransportZoneDB.zone_id))
+    db.query(TransportZoneDB).delete()
+    rows = [
+        {"transport_id": transport_id, "zone_id": zone_id}
+        for transport_id, route in db.query(TransportDB.id, TransportDB.route)
+        for zone_id in match_zones(route, zones)
+    ]
+    if rows:
+        db.execute(TransportZoneDB.__table__.insert(), rows)
+    rezoned = {transport_id for transport_id, _ in before ^ {(r["transport_id"], r["zone_id"]) for r in rows}}
+    if rezoned:
+        updated = db.query(TransportDB).filter(TransportDB.id.in_(rezoned))
+        log_changes(db, "update", [_transport_dict(t) for t in updated])
+    db.commit()
+    catalog.bump()
+    return len(rows)
+
+
+def resolve_zone_ids(db: Session, names: List[str]) -> List[int]:
+    """
+    Zones désignées par les noms demandés: correspondance exacte sur la clé ou un
+    alias, sinon zones citées dans le nom (ex: "Plage de La Marsa").
+    """
+    zones = load_zone_forms(db)
+    zone_ids = set()
+    for name in names:
+        key = normalize(name)
+        exact = {zone_id for zone_id, forms in zones if key in forms}
+        zone_ids |= exact or match_zones(name, zones)
+    return sorted(zone_ids)
+
+
+def get_zones(db: Session) -> List[Dict[str, Any]]:
+    """Zones avec le nombre de lignes qui les desservent."""
+    rows = (
+        db.query(ZoneDB, func.count(TransportZoneDB.transport_id))
+        .outerjoin(TransportZoneDB, TransportZoneDB.zone_id == ZoneDB.id)
+        .group_by(ZoneDB.id)
+        .order_by(ZoneDB.name)
+        .all()
+    )
+    return [{"key": zone.key, "name": zone.name, "lines": count} for zone, count in rows]
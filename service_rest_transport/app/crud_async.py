@@ -0,0 +1,260 @@
+"""
+Opérations CRUD asynchrones (AsyncSession, pilote aiosqlite).
+
+Mêmes requêtes que crud.py pour les endpoints de l'API. Les opérations par lot
+et la reconstruction de l'index des zones réutilisent le code synchrone via
+run_sync: elles s'exécutent sur la connexion asynchrone, sans thread dédié.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, false, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud
+from .catalog import CatalogState, catalog
+from .models import TransportChangeDB, TransportDB, TransportZoneDB, ZoneDB
+from .zones import match_zones, normalize, zone_forms
+
+# Colonnes exposées par l'API (ordre des tuples de get_transport_rows)
+TRANSPORT_COLUMNS = ("id", "mode", "route", "status")
+
+
+async def get_transport(db: AsyncSession, transport_id: int) -> Optional[TransportDB]:
+    """Récupère un transport par son ID."""
+    return await db.get(TransportDB, transport_id)
+
+
+async def count_transports(db: AsyncSession) -> int:
+    """Nombre total de transports."""
+    return await db.scalar(select(func.count()).select_from(TransportDB))
+
+
+async def filter_transports(
+    db: AsyncSession,
+    query,
+    status: Optional[str] = None,
+    modes: Optional[List[str]] = None,
+    zones: Optional[List[str]] = None
+):
+    """Applique les filtres de liste en SQL (voir crud.filter_transports)."""
+    if status:
+        query = query.where(TransportDB.status == status)
+    if modes:
+        query = query.where(TransportDB.mode.in_(modes))
+    if zones:
+        zone_ids = await resolve_zone_ids(db, zones)
+        if not zone_ids:
+            return query.where(false())
+        query = query.where(TransportDB.id.in_(
+            select(TransportZoneDB.transport_id).where(TransportZoneDB.zone_id.in_(zone_ids))
+        ))
+    return query
+
+
+async def get_transports(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: Optional[int] = 100,
+    status: Optional[str] = None,
+    modes: Optional[List[str]] = None,
+    zones: Optional[List[str]] = None
+) -> List[TransportDB]:
+    """Récupère une liste de transports avec pagination."""
+    query = await filter_transports(db, select(TransportDB), status, modes, zones)
+    return list(await db.scalars(query.offset(skip).limit(limit)))
+
+
+async def get_transports_after(
+    db: AsyncSession,
+    after_id: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    modes: Optional[List[str]] = None,
+    zones: Optional[List[str]] = None
+) -> List[TransportDB]:
+    """Pagination par curseur (keyset): transports d'id > after_id, triés par id."""
+    query = await filter_transports(db, select(TransportDB), status, modes, zones)
+    return list(await db.scalars(
+        query.where(TransportDB.id > after_id).order_by(TransportDB.id).limit(limit)
+    ))
+
+
+async def get_transport_rows(
+    db: AsyncSession,
+    after_id: int = 0,
+    limit: Optional[int] = 100,
+    status: Optional[str] = None,
+    modes: Optional[List[str]] = None,
+    zones: Optional[List[str]] = None
+) -> List[Tuple]:
+    """
+    Comme get_transports_after, mais en tuples (TRANSPORT_COLUMNS) plutôt
+    qu'en objets ORM: pas d'identity map ni d'instanciation par ligne.
+    """
+    query = select(TransportDB.id, TransportDB.mode, TransportDB.route, TransportDB.status)
+    query = await filter_transports(db, query, status, modes, zones)
+    result = await db.execute(query.where(TransportDB.id > after_id).order_by(TransportDB.id).limit(limit))
+    return result.tuples().all()
+
+
+async def iter_transports(db: AsyncSession, batch_size: int = 500) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Parcourt tous les transports par lots via un curseur côté serveur (stream)."""
+    result = await db.stream(
+        select(TransportDB.id, TransportDB.mode, TransportDB.route, TransportDB.status)
+        .order_by(TransportDB.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for rows in result.mappings().partitions():
+        yield [dict(row) for row in rows]
+
+
+async def create_transport(db: AsyncSession, mode: str, route: str, status: str) -> TransportDB:
+    """Crée un nouveau transport."""
+    db_transport = TransportDB(mode=mode, route=route, status=status)
+    db.add(db_transport)
+    await db.flush()
+    await index_transport_zones(db, db_transport)
+    await log_changes(db, "insert", [crud._transport_dict(db_transport)])
+    await db.commit()
+    catalog.bump()
+    return db_transport
+
+
+async def update_transport(
+    db: AsyncSession,
+    transport_id: int,
+    mode: Optional[str] = None,
+    route: Optional[str] = None,
+    status: Optional[str] = None
+) -> Optional[TransportDB]:
+    """Met à jour un transport existant."""
+    db_transport = await get_transport(db, transport_id)
+    if not db_transport:
+        return None
+
+    before = crud._transport_dict(db_transport)
+    if mode is not None:
+        db_transport.mode = mode
+    if route is not None and route != db_transport.route:
+        db_transport.route = route
+        await index_transport_zones(db, db_transport)
+    if status is not None:
+        db_transport.status = status
+    after = crud._transport_dict(db_transport)
+    if after != before:
+        await log_changes(db, "update", [after])
+
+    await db.commit()
+    catalog.bump()
+    return db_transport
+
+
+async def delete_transport(db: AsyncSession, transport_id: int) -> bool:
+    """Supprime un transport."""
+    db_transport = await get_transport(db, transport_id)
+    if not db_transport:
+        return False
+
+    await db.execute(delete(TransportZoneDB).where(TransportZoneDB.transport_id == transport_id))
+    await db.delete(db_transport)
+    await log_changes(db, "delete", [{"id": transport_id}])
+    await db.commit()
+    catalog.bump()
+    return True
+
+
+# ============================================
+# OPÉRATIONS PAR LOT (code synchrone via run_sync)
+# ============================================
+
+async def bulk_create_transports(db: AsyncSession, items: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    return await db.run_sync(crud.bulk_create_transports, items)
+
+
+async def bulk_update_transports(db: AsyncSession, items: List[Dict[str, Any]]) -> List[int]:
+    return await db.run_sync(crud.bulk_update_transports, items)
+
+
+async def bulk_delete_transports(db: AsyncSession, ids: List[int]) -> List[int]:
+    return await db.run_sync(crud.bulk_delete_transports, ids)
+
+
+# ============================================
+# JOURNAL DES MODIFICATIONS
+# ============================================
+
+async def log_changes(db: AsyncSession, op: str, transports: List[Dict[str, Any]]):
+    """Ajoute des modifications au journal, dans la transaction en cours (sans commit)."""
+    if transports:
+        await db.execute(insert(TransportChangeDB), crud.change_rows(op, transports))
+
+
+async def get_changes(db: AsyncSession, since: int = 0, limit: int = 500) -> List[TransportChangeDB]:
+    """Modifications de curseur (seq) strictement supérieur à `since`, dans l'ordre."""
+    return list(await db.scalars(
+        select(TransportChangeDB)
+        .where(TransportChangeDB.seq > since)
+        .order_by(TransportChangeDB.seq)
+        .limit(limit)
+    ))
+
+
+async def latest_change_seq(db: AsyncSession) -> int:
+    """Curseur de la dernière modification enregistrée (0 si aucune)."""
+    return await db.scalar(select(func.max(TransportChangeDB.seq))) or 0
+
+
+async def catalog_state(db: AsyncSession) -> CatalogState:
+    """Validateurs HTTP du catalogue: dernière modification du journal et nombre de zones, en une requête."""
+    last = select(TransportChangeDB.seq, TransportChangeDB.changed_at).order_by(TransportChangeDB.seq.desc()).limit(1).subquery()
+    seq, changed_at, zones = (await db.execute(select(
+        select(last.c.seq).scalar_subquery(),
+        select(last.c.changed_at).scalar_subquery(),
+        select(func.count(ZoneDB.id)).scalar_subquery(),
+    ))).one()
+    return CatalogState(seq or 0, zones or 0, changed_at)
+
+
+# ============================================
+# INDEX ZONE <-> LIGNE
+# ============================================
+
+async def load_zone_forms(db: AsyncSession) -> List[Tuple[int, List[str]]]:
+    """Zones et leurs formes normalisées, pour la correspondance avec les routes."""
+    return [(zone.id, zone_forms(zone.key, zone.aliases)) for zone in await db.scalars(select(ZoneDB))]
+
+
+async def index_transport_zones(db: AsyncSession, db_transport: TransportDB):
+    """Recalcule les zones d'une ligne (sans commit)."""
+    zones = await load_zone_forms(db)
+    await db.execute(delete(TransportZoneDB).where(TransportZoneDB.transport_id == db_transport.id))
+    db.add_all(
+        TransportZoneDB(transport_id=db_transport.id, zone_id=zone_id)
+        for zone_id in match_zones(db_transport.route, zones)
+    )
+
+
+async def rebuild_zone_index(db: AsyncSession) -> int:
+    return await db.run_sync(crud.rebuild_zone_index)
+
+
+async def resolve_zone_ids(db: AsyncSession, names: List[str]) -> List[int]:
+    """Zones désignées par les noms demandés (voir crud.resolve_zone_ids)."""
+    zones = await load_zone_forms(db)
+    zone_ids = set()
+    for name in names:
+        key = normalize(name)
+        exact = {zone_id for zone_id, forms in zones if key in forms}
+        zone_ids |= exact or match_zones(name, zones)
+    return sorted(zone_ids)
+
+
+async def get_zones(db: AsyncSession) -> List[Dict[str, Any]]:
+    """Zones avec le nombre de lignes qui les desservent."""
+    rows = await db.execute(
+        select(ZoneDB, func.count(TransportZoneDB.transport_id))
+        .outerjoin(TransportZoneDB, TransportZoneDB.zone_id == ZoneDB.id)
+        .group_by(ZoneDB.id)
+        .order_by(ZoneDB.name)
+    )
+    return [{"key": zone.key, "name": zone.name, "lines": count} for zone, count in rows]
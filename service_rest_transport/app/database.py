@@ -1,20 +1,31 @@
 """Configuration de la base de données SQLite avec SQLAlchemy."""
-from sqlalchemy import create_engine
+import os
+import sys
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+# Module partagé common/ (racine du dépôt en local, /app dans les conteneurs)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from common.sqlite_engine import create_async_sqlite_engine, create_sqlite_engine
+
 # Chemin de la base de données SQLite (volume Docker monté sur /app/data)
 DATABASE_URL = "sqlite:///./data/transport.db"
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
 
-# Création du moteur SQLAlchemy
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False}  # Nécessaire pour SQLite
-)
+# Création du moteur SQLAlchemy (profil SQLite choisi par SQLITE_PROFILE, WAL par défaut)
+engine = create_sqlite_engine(DATABASE_URL)
 
 # Session locale pour les transactions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Moteur et sessions asynchrones (aiosqlite) utilisés par les endpoints de l'API;
+# le moteur synchrone reste utilisé au démarrage et par les scripts (init_db)
+async_engine = create_async_sqlite_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base pour les modèles ORM
 Base = declarative_base()
 
@@ -26,3 +37,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency pour obtenir une session asynchrone."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,156 @@
+"""Ingestion en écriture différée des statuts de lignes (flux AVL à haut débit)."""
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import crud
+
+
+class StatusIngestor:
+    """
+    File en mémoire des statuts reçus, écrite en base par lots.
+
+    - regroupement: plusieurs statuts pour la même ligne avant l'écriture ne
+      donnent qu'une mise à jour (le dernier reçu l'emporte)
+    - déclenchement: dès batch_size lignes en attente, ou flush_interval
+      secondes après la dernière écriture
+    - une transaction par lot (crud.apply_statuses): journal des modifications
+      et version du catalogue mis à jour comme pour les autres écritures
+    - durabilité: submit(wait=True) retourne un Future résolu une fois le lot
+      contenant ces statuts validé (ou en erreur si l'écriture échoue)
+
+    Les statuts non encore écrits sont perdus si le processus s'arrête
+    brutalement; stop() écrit ceux en attente lors d'un arrêt normal.
+    """
+
+    def __init__(self, session_factory, batch_size: int = 500, flush_interval: float = 0.2):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[int, str] = {}
+        self._oldest: Optional[float] = None
+        self._waiters: List[asyncio.Future] = []
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.received = 0
+        self.coalesced = 0
+        self.flushed = 0
+        self.not_found = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_flush_lag = 0.0
+        self.max_flush_lag = 0.0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, statuses: Iterable[Tuple[int, str]], wait: bool = False) -> Optional[asyncio.Future]:
+        """
+        Met des statuts (id, status) en attente d'écriture, dans l'ordre reçu
+        (doublons d'une même requête compris). Avec wait=True, retourne un
+        Future résolu avec les ids trouvés en base après le lot.
+        """
+        for transport_id, status in statuses:
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if transport_id in self._pending:
+                self.coalesced += 1
+            self._pending[transport_id] = status
+            self.received += 1
+
+        future = None
+        if wait:
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+            self._wakeup.set()
+        elif len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return future
+
+    async def flush(self):
+        """Écrit tous les statuts en attente en une transaction."""
+        async with self._lock:
+            if not self._pending and not self._waiters:
+                return
+            statuses, self._pending = self._pending, {}
+            waiters, self._waiters = self._waiters, []
+            oldest, self._oldest = self._oldest, None
+
+            found: Set[int] = set()
+            try:
+                if statuses:
+                    async with self.session_factory() as db:
+                        found = set(await db.run_sync(crud.apply_statuses, statuses))
+            except Exception as e:
+                self.errors += 1
+                # Une seule trace par panne, pas une par lot
+                if self.last_error is None:
+                    print(f"⚠️ Erreur d'écriture des statuts ({len(statuses)} lignes): {e}")
+                self.last_error = str(e)
+                # Remettre le lot en attente sans écraser les statuts reçus entre-temps
+                for transport_id, status in statuses.items():
+                    self._pending.setdefault(transport_id, status)
+                if self._oldest is None or (oldest is not None and oldest < self._oldest):
+                    self._oldest = oldest
+                for future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            self.batches += 1
+            self.flushed += len(statuses)
+            self.not_found += len(statuses) - len(found)
+            self.last_error = None
+            if oldest is not None:
+                self.last_flush_lag = time.monotonic() - oldest
+                self.max_flush_lag = max(self.max_flush_lag, self.last_flush_lag)
+            for future in waiters:
+                if not future.done():
+                    future.set_result(found)
+
+    async def _run(self):
+        """Boucle d'écriture: lot plein, appelant synchrone ou délai écoulé."""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        """Démarre la boucle d'écriture (démarrage du service)."""
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête la boucle (sans interrompre un lot en cours) et écrit les statuts en attente."""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs d'ingestion et retard d'écriture (secondes)."""
+        return {
+            "pending": self.pending,
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "flushed": self.flushed,
+            "not_found": self.not_found,
+            "batches": self.batches,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "oldest_pending_age": round(time.monotonic() - self._oldest, 3) if self._oldest else 0.0,
+            "last_flush_lag": round(self.last_flush_lag, 3),
+            "max_flush_lag": round(self.max_flush_lag, 3),
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+        }
@@ -1,5 +1,5 @@
 """Modèles SQLAlchemy pour la base de données."""
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 try:
     from .database import Base
@@ -17,3 +17,47 @@ class TransportDB(Base):
     status = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Filtres status / status + mode des listes (préfixe utilisable pour status seul)
+    __table_args__ = (
+        Index("ix_transports_status_mode", "status", "mode"),
+    )
+
+
+class ZoneDB(Base):
+    """Zone géographique normalisée (ex: La Marsa -> clé "la marsa")."""
+    __tablename__ = "zones"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    key = Column(String, nullable=False, unique=True, index=True)
+    name = Column(String, nullable=False)
+    aliases = Column(String, nullable=False, default="")
+
+
+class TransportZoneDB(Base):
+    """Association ligne <-> zone desservie, maintenue par crud à chaque écriture."""
+    __tablename__ = "transport_zones"
+
+    transport_id = Column(Integer, ForeignKey("transports.id", ondelete="CASCADE"), primary_key=True)
+    zone_id = Column(Integer, ForeignKey("zones.id", ondelete="CASCADE"), primary_key=True)
+
+    # Recherche des lignes d'une zone
+    __table_args__ = (
+        Index("ix_transport_zones_zone", "zone_id", "transport_id"),
+    )
+
+
+class TransportChangeDB(Base):
+    """
+    Journal des modifications du catalogue (ajout seul), écrit par crud dans la
+    même transaction que la modification. seq sert de curseur au flux /transports/changes.
+    """
+    __tablename__ = "transport_changes"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    transport_id = Column(Integer, nullable=False, index=True)
+    op = Column(String, nullable=False)  # insert, update ou delete
+    mode = Column(String)  # état après modification (vide pour delete)
+    route = Column(String)
+    status = Column(String)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,53 @@
+"""Zones de la Grande Tunis et correspondance zone <-> ligne de transport."""
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Zones connues et leurs variantes d'écriture rencontrées dans les routes
+DEFAULT_ZONES: Dict[str, List[str]] = {
+    "Tunis Centre-Ville": ["centre ville", "tunis centre", "habib bourguiba", "tunis marine", "bab alioua", "barcelone"],
+    "La Marsa": ["marsa"],
+    "Carthage": [],
+    "Sidi Bou Saïd": [],
+    "Ariana": [],
+    "Ennasr": [],
+    "Bardo": [],
+    "La Goulette": ["goulette"],
+    "Aéroport Tunis-Carthage": ["aeroport"],
+    "Ben Arous": [],
+    "Hammam-Lif": [],
+    "Mégrine": [],
+    "Ezzahra": [],
+    "El Mourouj": ["mourouj"],
+    "Den Den": [],
+    "Salammbô": [],
+    "Cité Olympique": [],
+    "Belvédère": [],
+    "Hammamet": [],
+    "Nabeul": [],
+    "Bizerte": [],
+}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Forme normalisée: sans accents, minuscules, mots séparés par un espace."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def zone_forms(key: str, aliases: str) -> List[str]:
+    """Toutes les formes normalisées d'une zone (clé + alias séparés par '|')."""
+    return [key] + [alias for alias in aliases.split("|") if alias]
+
+
+def match_zones(route: str, zones: Iterable[Tuple[int, List[str]]]) -> Set[int]:
+    """
+    Zones citées dans une route: une forme correspond si elle apparaît comme
+    suite de mots entiers ("la" ne correspond pas à "Salammbô").
+    `zones`: (id, formes normalisées).
+    """
+    text = f" {normalize(route)} "
+    return {zone_id for zone_id, forms in zones if any(f" {form} " in text for form in forms)}
@@ -0,0 +1,125 @@
+"""Modes de service HTTP de l'application WSGI SOAP (SOAP_SERVER)."""
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+# - simple: wsgiref d'origine, une requête à la fois (développement)
+# - threaded: wsgiref + pool de SOAP_THREADS threads (bibliothèque standard)
+# - gunicorn: SOAP_WORKERS processus pré-forkés x SOAP_THREADS threads (production, Linux)
+SOAP_SERVER_MODES = ("simple", "threaded", "gunicorn")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def serving_settings() -> Dict[str, Any]:
+    """Réglages du serveur, surchargeables par variables d'environnement SOAP_*."""
+    mode = os.getenv("SOAP_SERVER", "threaded").lower()
+    if mode not in SOAP_SERVER_MODES:
+        raise ValueError(f"Mode de serveur SOAP inconnu: {mode} (disponibles: {', '.join(SOAP_SERVER_MODES)})")
+    return {
+        "mode": mode,
+        "host": os.getenv("SOAP_HOST", "0.0.0.0"),
+        "port": _env_int("SOAP_PORT", 8001),
+        "workers": _env_int("SOAP_WORKERS", 2),
+        "threads": _env_int("SOAP_THREADS", 8),
+        "backlog": _env_int("SOAP_BACKLOG", 128),
+        "graceful_timeout": _env_int("SOAP_GRACEFUL_TIMEOUT", 30),
+    }
+
+
+class PooledWSGIServer(WSGIServer):
+    """
+    Serveur wsgiref dont chaque connexion est traitée par un pool de threads
+    borné: un appel lent (GetAllMeasures) n'en bloque plus les autres.
+    """
+
+    def __init__(self, server_address, handler_class, threads: int = 8, backlog: int = 128):
+        # Lu par server_activate() (listen) pendant WSGIServer.__init__
+        self.request_queue_size = backlog
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="soap")
+        super().__init__(server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        """Ferme l'écoute puis attend la fin des requêtes en cours."""
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+def _serve_wsgiref(wsgi_app, settings: Dict[str, Any]):
+    """Modes simple et threaded: arrêt propre sur SIGTERM / SIGINT."""
+    if settings["mode"] == "threaded":
+        server = PooledWSGIServer(
+            (settings["host"], settings["port"]), WSGIRequestHandler,
+            threads=settings["threads"], backlog=settings["backlog"]
+        )
+        server.set_app(wsgi_app)
+    else:
+        server = make_server(settings["host"], settings["port"], wsgi_app)
+
+    def stop(signum, frame):
+        print("🛑 Arrêt demandé, fin des requêtes en cours...")
+        # shutdown() attend la fin de serve_forever: appel depuis un autre thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def _serve_gunicorn(wsgi_app, settings: Dict[str, Any], on_fork: Optional[Callable[[], None]]):
+    """Mode gunicorn (workers gthread); gunicorn gère SIGTERM (arrêt gracieux)."""
+    from gunicorn.app.base import BaseApplication
+
+    options = {
+        "bind": f"{settings['host']}:{settings['port']}",
+        "workers": settings["workers"],
+        "threads": settings["threads"],
+        "worker_class": "gthread",
+        "backlog": settings["backlog"],
+        "graceful_timeout": settings["graceful_timeout"],
+        "accesslog": "-",
+    }
+    if on_fork is not None:
+        options["post_fork"] = lambda server, worker: on_fork()
+
+    class SoapApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return wsgi_app
+
+    SoapApplication().run()
+
+
+def serve(wsgi_app, on_fork: Optional[Callable[[], None]] = None, settings: Optional[Dict[str, Any]] = None):
+    """
+    Sert l'application selon SOAP_SERVER. `on_fork` est appelé dans chaque
+    worker gunicorn après le fork (ex: libérer les connexions SQLite héritées).
+    """
+    settings = settings or serving_settings()
+    if settings["mode"] == "gunicorn":
+        _serve_gunicorn(wsgi_app, settings, on_fork)
+    else:
+        _serve_wsgiref(wsgi_app, settings)
@@ -3,16 +3,29 @@ from spyne import Application, rpc, ServiceBase, Integer, Float, Unicode, Array
 from spyne.protocol.soap import Soap11
 from spyne.server.wsgi import WsgiApplication
 from spyne.model.complex import ComplexModel
-from wsgiref.simple_server import make_server
-from sqlalchemy import create_engine, Column, Integer as SQLInteger, Float as SQLFloat, String, DateTime
+from spyne.model.fault import Fault
+from sqlalchemy import or_, select, Column, Integer as SQLInteger, Float as SQLFloat, String, DateTime, Table
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
+import math
 import os
+import sys
 
-# Configuration SQLite (volume Docker monté sur /app/data)
+# Module partagé common/ (racine du dépôt en local, /app dans les conteneurs)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from common.aqi import aqi_for, compute_aqi
+from common.sqlite_engine import close_sqlite_engine, create_sqlite_engine
+from serving import serve, serving_settings
+
+# Configuration SQLite (volume Docker monté sur /app/data), profil choisi par SQLITE_PROFILE
 DATABASE_URL = "sqlite:///./data/air_quality.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Nombre maximal de mesures par appel AddMeasures
+MAX_BATCH_SIZE = int(os.getenv("SOAP_MAX_BATCH_SIZE", "5000"))
+engine = create_sqlite_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -35,13 +48,168 @@ class AirQualityDB(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class LatestMeasureDB(Base):
+    """
+    Dernière mesure de chaque station (copie de la ligne air_quality la plus
+    récente), tenue à jour dans la même transaction que les insertions.
+    """
+    __tablename__ = "air_quality_latest"
+
+    station_name = Column(String, primary_key=True)
+    # Même nom d'attribut que AirQualityDB (to_soap_measure)
+    id = Column("measure_id", SQLInteger, nullable=False)
+    location = Column(String, nullable=False)
+    pm25 = Column(SQLFloat, nullable=False)
+    pm10 = Column(SQLFloat, nullable=False)
+    o3 = Column(SQLFloat, nullable=True)
+    no2 = Column(SQLFloat, nullable=True)
+    co = Column(SQLFloat, nullable=True)
+    aqi = Column(SQLInteger, nullable=False)
+    status = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True))
+
+
 # Créer tables (commenté pour préserver les données)
 # Base.metadata.create_all(bind=engine)
 
 
+LATEST_COLUMNS = ("station_name", "id", "location", "pm25", "pm10", "o3", "no2", "co", "aqi", "status", "created_at")
+
+
+def refresh_latest_measures(db, measure_ids=None):
+    """
+    Reporte des mesures dans air_quality_latest (toutes les stations si
+    measure_ids est None). Une station n'est remplacée que par une mesure plus
+    récente (id supérieur). Ne valide pas la transaction.
+    """
+    query = select(*(getattr(AirQualityDB, c) for c in LATEST_COLUMNS))
+    if measure_ids is None:
+        latest_ids = select(func.max(AirQualityDB.id)).group_by(AirQualityDB.station_name)
+        query = query.where(AirQualityDB.id.in_(latest_ids))
+    else:
+        query = query.where(AirQualityDB.id.in_(list(measure_ids)))
+    stmt = sqlite_insert(LatestMeasureDB).from_select(
+        [getattr(LatestMeasureDB, c) for c in LATEST_COLUMNS],
+        query.order_by(AirQualityDB.id)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LatestMeasureDB.station_name],
+        set_={c.name: stmt.excluded[c.name] for c in LatestMeasureDB.__table__.c if c.name != "station_name"},
+        where=stmt.excluded.measure_id > LatestMeasureDB.id
+    )
+    db.execute(stmt)
+
+
+# Agrégats par station et par période (heure / jour UTC, début de période
+# au format "AAAA-MM-JJ HH:MM:SS"): nombre, somme, min et max de chaque polluant
+ROLLUP_POLLUTANTS = ("pm25", "pm10", "o3", "no2", "co", "aqi")
+ROLLUP_BUCKETS = {"hour": "%Y-%m-%d %H:00:00", "day": "%Y-%m-%d 00:00:00"}
+
+
+def rollup_table(name: str) -> Table:
+    """Table d'agrégats (station_name, bucket) -> count et {polluant}_count/_sum/_min/_max."""
+    columns = [
+        Column("station_name", String, primary_key=True),
+        Column("bucket", String, primary_key=True),
+        Column("count", SQLInteger, nullable=False),
+    ]
+    for p in ROLLUP_POLLUTANTS:
+        columns += [
+            Column(f"{p}_count", SQLInteger, nullable=False),
+            Column(f"{p}_sum", SQLFloat, nullable=False),
+            Column(f"{p}_min", SQLFloat, nullable=True),
+            Column(f"{p}_max", SQLFloat, nullable=True),
+        ]
+    return Table(name, Base.metadata, *columns)
+
+
+ROLLUP_TABLES = {
+    "hour": rollup_table("air_quality_hourly"),
+    "day": rollup_table("air_quality_daily"),
+}
+
+
+def refresh_rollups(db, measure_ids=None):
+    """
+    Ajoute des mesures brutes aux agrégats horaires et journaliers (tout
+    l'historique si measure_ids est None). Chaque mesure ne doit être ajoutée
+    qu'une fois. Ne valide pas la transaction.
+    """
+    for resolution, table in ROLLUP_TABLES.items():
+        bucket = func.strftime(ROLLUP_BUCKETS[resolution], AirQualityDB.created_at)
+        aggregates = [AirQualityDB.station_name, bucket, func.count()]
+        for p in ROLLUP_POLLUTANTS:
+            column = getattr(AirQualityDB, p)
+            # total() vaut 0.0 (et non NULL) sans valeur renseignée
+            aggregates += [func.count(column), func.total(column), func.min(column), func.max(column)]
+        query = select(*aggregates).group_by(AirQualityDB.station_name, bucket)
+        if measure_ids is not None:
+            query = query.where(AirQualityDB.id.in_(list(measure_ids)))
+        else:
+            query = query.where(AirQualityDB.created_at.isnot(None))
+
+        stmt = sqlite_insert(table).from_select(list(table.c), query)
+        new = stmt.excluded
+        updates = {"count": table.c["count"] + new["count"]}
+        for p in ROLLUP_POLLUTANTS:
+            current_min, current_max = table.c[f"{p}_min"], table.c[f"{p}_max"]
+            updates[f"{p}_count"] = table.c[f"{p}_count"] + new[f"{p}_count"]
+            updates[f"{p}_sum"] = table.c[f"{p}_sum"] + new[f"{p}_sum"]
+            # min()/max() scalaires de SQLite renvoient NULL si un argument est NULL
+            updates[f"{p}_min"] = func.min(
+                func.coalesce(current_min, new[f"{p}_min"]), func.coalesce(new[f"{p}_min"], current_min)
+            )
+            updates[f"{p}_max"] = func.max(
+                func.coalesce(current_max, new[f"{p}_max"]), func.coalesce(new[f"{p}_max"], current_max)
+            )
+        db.execute(stmt.on_conflict_do_update(index_elements=["station_name", "bucket"], set_=updates))
+
+
+def update_derived_tables(db, measure_ids):
+    """Reporte des mesures nouvellement insérées (flush fait) dans les tables dérivées."""
+    refresh_latest_measures(db, measure_ids)
+    refresh_rollups(db, measure_ids)
+
+
+def ensure_derived_tables():
+    """
+    Crée les tables dérivées (dernière mesure, agrégats) si besoin et remplit
+    depuis l'historique celles qui sont vides. Les autres tables ne sont pas touchées.
+    """
+    LatestMeasureDB.__table__.create(bind=engine, checkfirst=True)
+    for table in ROLLUP_TABLES.values():
+        table.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        if db.query(LatestMeasureDB).first() is None:
+            refresh_latest_measures(db)
+        if db.execute(select(ROLLUP_TABLES["hour"]).limit(1)).first() is None:
+            refresh_rollups(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+def parse_series_bound(value, name: str):
+    """
+    Borne ISO 8601 -> texte comparable aux buckets (UTC). Sans décalage
+    ("2024-05-01T14:00:00") la borne est lue en UTC; avec un décalage
+    ("+01:00", "Z") elle est convertie en UTC avant la comparaison.
+    """
+    if not value:
+        return None
+    try:
+        bound = datetime.fromisoformat(value)
+    except ValueError:
+        raise Fault(faultcode="Client", faultstring=f"{name} invalide: {value} (format ISO 8601 attendu)") from None
+    if bound.tzinfo is not None:
+        bound = bound.astimezone(timezone.utc).replace(tzinfo=None)
+    return bound.strftime("%Y-%m-%d %H:%M:%S")
+
+
 # Modèle SOAP
 class AirQualityMeasure(ComplexModel):
-    """Modèle SOAP pour une mesure."""
+    """Modèle SOAP pour une mesure (PM en µg/m³, O3 et NO2 en ppb, CO en ppm)."""
     __namespace__ = 'smartcity.air'
     
     measure_id = Integer
@@ -57,6 +225,93 @@ class AirQualityMeasure(ComplexModel):
     timestamp = Unicode
 
 
+class PollutantStats(ComplexModel):
+    """Statistiques d'un polluant sur une période."""
+    __namespace__ = 'smartcity.air'
+    
+    count = Integer
+    sum = Float
+    mean = Float
+    min = Float
+    max = Float
+
+
+class MeasureSeriesPoint(ComplexModel):
+    """Agrégats d'une station sur une période (heure ou jour, début en UTC)."""
+    __namespace__ = 'smartcity.air'
+    
+    bucket = Unicode
+    count = Integer
+    pm25 = PollutantStats
+    pm10 = PollutantStats
+    o3 = PollutantStats
+    no2 = PollutantStats
+    co = PollutantStats
+    aqi = PollutantStats
+
+
+def to_series_point(row):
+    """Convertit une ligne d'agrégats en point de série SOAP."""
+    stats = {}
+    for p in ROLLUP_POLLUTANTS:
+        count = row[f"{p}_count"]
+        stats[p] = PollutantStats(
+            count=count, sum=row[f"{p}_sum"],
+            mean=row[f"{p}_sum"] / count if count else None,
+            min=row[f"{p}_min"], max=row[f"{p}_max"]
+        )
+    return MeasureSeriesPoint(bucket=row["bucket"], count=row["count"], **stats)
+
+
+class AddMeasureResult(ComplexModel):
+    """Résultat d'une mesure d'un lot AddMeasures (position dans le lot)."""
+    __namespace__ = 'smartcity.air'
+    
+    index = Integer
+    measure_id = Integer
+    result = Unicode
+    error = Unicode
+    aqi = Integer
+    dominant_pollutant = Unicode
+
+
+def validate_measure(m):
+    """
+    Retourne le motif de rejet d'une mesure SOAP, ou None si elle est valide
+    (aqi et status sont recalculés, common/aqi.py).
+    """
+    if m is None:
+        return "mesure vide"
+    for field in ("station_name", "location"):
+        if not (getattr(m, field) or "").strip():
+            return f"{field} manquant"
+    for field in ("pm25", "pm10"):
+        if getattr(m, field) is None:
+            return f"{field} manquant"
+    for field in ("pm25", "pm10", "o3", "no2", "co"):
+        value = getattr(m, field)
+        if value is not None and (not math.isfinite(value) or value < 0):
+            return f"{field} invalide: {value}"
+    return None
+
+
+class StationMeasures(ComplexModel):
+    """Mesures regroupées par station demandée."""
+    __namespace__ = 'smartcity.air'
+    
+    station_name = Unicode
+    measures = Array(AirQualityMeasure)
+
+
+def to_soap_measure(m):
+    """Convertit une ligne AirQualityDB en mesure SOAP."""
+    return AirQualityMeasure(
+        measure_id=m.id, station_name=m.station_name, location=m.location,
+        pm25=m.pm25, pm10=m.pm10, o3=m.o3, no2=m.no2, co=m.co,
+        aqi=m.aqi, status=m.status, timestamp=str(m.created_at)
+    )
+
+
 class AirQualityService(ServiceBase):
     """Service SOAP."""
     
@@ -68,11 +323,7 @@ class AirQualityService(ServiceBase):
             m = db.query(AirQualityDB).filter(AirQualityDB.id == measure_id).first()
             if not m:
                 return None
-            return AirQualityMeasure(
-                measure_id=m.id, station_name=m.station_name, location=m.location,
-                pm25=m.pm25, pm10=m.pm10, o3=m.o3, no2=m.no2, co=m.co,
-                aqi=m.aqi, status=m.status, timestamp=str(m.created_at)
-            )
+            return to_soap_measure(m)
         finally:
             db.close()
     
@@ -82,14 +333,7 @@ class AirQualityService(ServiceBase):
         db = SessionLocal()
         try:
             measures = db.query(AirQualityDB).all()
-            result = []
-            for m in measures:
-                result.append(AirQualityMeasure(
-                    measure_id=m.id, station_name=m.station_name, location=m.location,
-                    pm25=m.pm25, pm10=m.pm10, o3=m.o3, no2=m.no2, co=m.co,
-                    aqi=m.aqi, status=m.status, timestamp=str(m.created_at)
-                ))
-            return result
+            return [to_soap_measure(m) for m in measures]
         finally:
             db.close()
     
@@ -101,21 +345,91 @@ class AirQualityService(ServiceBase):
             measures = db.query(AirQualityDB).filter(
                 AirQualityDB.station_name.like(f"%{station_name}%")
             ).all()
-            result = []
-            for m in measures:
-                result.append(AirQualityMeasure(
-                    measure_id=m.id, station_name=m.station_name, location=m.location,
-                    pm25=m.pm25, pm10=m.pm10, o3=m.o3, no2=m.no2, co=m.co,
-                    aqi=m.aqi, status=m.status, timestamp=str(m.created_at)
-                ))
-            return result
+            return [to_soap_measure(m) for m in measures]
+        finally:
+            db.close()
+    
+    @rpc(Array(Unicode), _returns=Array(StationMeasures))
+    def GetMeasuresByStations(ctx, station_names):
+        """Récupère les mesures de plusieurs stations en une seule requête."""
+        names = [n for n in (station_names or []) if n]
+        if not names:
+            return []
+        db = SessionLocal()
+        try:
+            measures = db.query(AirQualityDB).filter(
+                or_(*[AirQualityDB.station_name.like(f"%{n}%") for n in names])
+            ).all()
+            # Même correspondance que GetMeasuresByStation (LIKE insensible à la casse)
+            return [
+                StationMeasures(
+                    station_name=name,
+                    measures=[to_soap_measure(m) for m in measures
+                              if name.lower() in m.station_name.lower()]
+                )
+                for name in names
+            ]
+        finally:
+            db.close()
+    
+    @rpc(Array(Unicode), _returns=Array(AirQualityMeasure))
+    def GetLatestMeasures(ctx, station_names):
+        """
+        Dernière mesure de chaque station demandée (nom exact), lue dans
+        air_quality_latest; les stations inconnues sont omises.
+        """
+        names = [n for n in (station_names or []) if n]
+        if not names:
+            return []
+        db = SessionLocal()
+        try:
+            latest = {
+                m.station_name: m
+                for m in db.query(LatestMeasureDB).filter(LatestMeasureDB.station_name.in_(names))
+            }
+            return [to_soap_measure(latest[n]) for n in dict.fromkeys(names) if n in latest]
+        finally:
+            db.close()
+    
+    @rpc(Unicode, Unicode, Unicode, Unicode, _returns=Array(MeasureSeriesPoint))
+    def GetMeasureSeries(ctx, station_name, date_from, date_to, resolution):
+        """
+        Série agrégée d'une station (nom exact) entre date_from et date_to
+        (ISO 8601, UTC sauf décalage explicite, bornes incluses, optionnelles),
+        par "hour" ou "day", lue dans les tables d'agrégats sans parcourir
+        les mesures brutes.
+        """
+        resolution = (resolution or "hour").lower()
+        if resolution not in ROLLUP_TABLES:
+            raise Fault(
+                faultcode="Client",
+                faultstring=f"Résolution inconnue: {resolution} (disponibles: {', '.join(ROLLUP_TABLES)})"
+            )
+        table = ROLLUP_TABLES[resolution]
+        query = select(table).where(table.c.station_name == station_name)
+        start = parse_series_bound(date_from, "date_from")
+        end = parse_series_bound(date_to, "date_to")
+        if start is not None:
+            # Période contenant date_from incluse
+            query = query.where(table.c.bucket >= datetime.fromisoformat(start).strftime(ROLLUP_BUCKETS[resolution]))
+        if end is not None:
+            query = query.where(table.c.bucket <= end)
+        db = SessionLocal()
+        try:
+            rows = db.execute(query.order_by(table.c.bucket)).mappings().all()
+            return [to_series_point(row) for row in rows]
         finally:
             db.close()
     
     @rpc(Unicode, Unicode, Float, Float, Float, Float, Float, Integer, Unicode, 
          _returns=AirQualityMeasure)
     def AddMeasure(ctx, station_name, location, pm25, pm10, o3, no2, co, aqi, status):
-        """Ajoute une mesure."""
+        """
+        Ajoute une mesure. L'AQI et le statut sont calculés depuis les polluants
+        (aqi et status reçus conservés seulement si pm25 et pm10 manquent).
+        """
+        if pm25 is not None and pm10 is not None:
+            aqi, _, status = aqi_for(pm25=pm25, pm10=pm10, o3=o3, no2=no2, co=co)
         db = SessionLocal()
         try:
             new_m = AirQualityDB(
@@ -124,13 +438,62 @@ class AirQualityService(ServiceBase):
                 aqi=aqi, status=status
             )
             db.add(new_m)
+            db.flush()
+            update_derived_tables(db, [new_m.id])
             db.commit()
             db.refresh(new_m)
-            return AirQualityMeasure(
-                measure_id=new_m.id, station_name=new_m.station_name, location=new_m.location,
-                pm25=new_m.pm25, pm10=new_m.pm10, o3=new_m.o3, no2=new_m.no2, co=new_m.co,
-                aqi=new_m.aqi, status=new_m.status, timestamp=str(new_m.created_at)
+            return to_soap_measure(new_m)
+        finally:
+            db.close()
+    
+    @rpc(Array(AirQualityMeasure), _returns=Array(AddMeasureResult))
+    def AddMeasures(ctx, measures):
+        """
+        Ajoute un lot de mesures (concentrateurs de capteurs) en une transaction.
+        Chaque mesure est validée: les mesures invalides sont rejetées (result
+        "rejected" et motif), les autres insérées (result "created", id, AQI et
+        polluant dominant calculés pour tout le lot en un appel vectorisé);
+        les tables dérivées sont mises à jour une seule fois pour le lot.
+        """
+        measures = list(measures or [])
+        if len(measures) > MAX_BATCH_SIZE:
+            raise Fault(
+                faultcode="Client",
+                faultstring=f"Lot trop volumineux: {len(measures)} mesures (maximum {MAX_BATCH_SIZE})"
+            )
+        results = []
+        valid = []
+        for index, m in enumerate(measures):
+            error = validate_measure(m)
+            if error:
+                results.append(AddMeasureResult(index=index, result="rejected", error=error))
+                continue
+            valid.append(m)
+            results.append(AddMeasureResult(index=index, result="created"))
+        if not valid:
+            return results
+
+        computed = compute_aqi(**{p: [getattr(m, p) for m in valid] for p in ("pm25", "pm10", "o3", "no2", "co")})
+        rows = [
+            AirQualityDB(
+                station_name=m.station_name.strip(), location=m.location.strip(),
+                pm25=m.pm25, pm10=m.pm10, o3=m.o3, no2=m.no2, co=m.co,
+                aqi=int(aqi), status=status
             )
+            for m, aqi, status in zip(valid, computed["aqi"], computed["status"])
+        ]
+        db = SessionLocal()
+        try:
+            db.add_all(rows)
+            db.flush()
+            update_derived_tables(db, [row.id for row in rows])
+            db.commit()
+            created = iter(zip(rows, computed["dominant"]))
+            for r in results:
+                if r.result == "created":
+                    row, dominant = next(created)
+                    r.measure_id, r.aqi, r.dominant_pollutant = row.id, row.aqi, dominant
+            return results
         finally:
             db.close()
     
@@ -143,6 +506,9 @@ class AirQualityService(ServiceBase):
             if not m:
                 return "Erreur: Mesure non trouvée"
             m.status = new_status
+            db.query(LatestMeasureDB).filter(LatestMeasureDB.id == measure_id).update(
+                {LatestMeasureDB.status: new_status}, synchronize_session=False
+            )
             db.commit()
             return f"Statut mis à jour: {new_status}"
         finally:
@@ -199,18 +565,26 @@ def init_demo_data():
 
 
 if __name__ == '__main__':
+    settings = serving_settings()
     print("🌍 TuniLink - Service SOAP Qualité de l'Air")
     print("=" * 50)
     print("🔗 L'expérience urbaine réinventée")
-    print("Serveur: http://0.0.0.0:8001")
-    print("WSDL: http://0.0.0.0:8001/?wsdl")
+    print(f"Serveur: http://{settings['host']}:{settings['port']}")
+    print(f"WSDL: http://{settings['host']}:{settings['port']}/?wsdl")
+    print(f"Mode: {settings['mode']} (workers: {settings['workers']}, threads: {settings['threads']})")
     print("=" * 50)
     
     # Initialiser les données
     # print("🌫️ Initialisation des données...")
     # init_demo_data()  # Désactivé pour utiliser les données existantes
     
-    server = make_server('0.0.0.0', 8001, wsgi_app)
+    ensure_derived_tables()
     print("✅ Serveur démarré")
-    server.serve_forever()
+    try:
+        # Chaque worker gunicorn ouvre ses propres connexions SQLite après le fork
+        serve(wsgi_app, on_fork=lambda: engine.dispose(close=False), settings=settings)
+    finally:
+        # Arrêt (SIGTERM): journal WAL reporté dans la base avant de quitter
+        # (gunicorn: à la sortie de chaque worker puis du processus maître)
+        close_sqlite_engine(engine)
 
@@ -0,0 +1,53 @@
+"""
+Unités des concentrations: le service SOAP et common/aqi.py travaillent en
+unités EPA (O3 et NO2 en ppb, CO en ppm), la Gateway expose des µg/m³.
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from common.aqi import aqi_for, from_ugm3, to_ugm3
+
+
+def test_aqi_expects_epa_units():
+    # Bornes hautes de la catégorie "Modéré" des tables EPA
+    assert aqi_for(o3=70)[0] == 100
+    assert aqi_for(no2=100)[0] == 100
+    assert aqi_for(co=9.4)[0] == 100
+
+
+def test_o3_uses_8_hour_table_only():
+    # Fin de la table 8 h EPA: 200 ppb -> 300; pas de segment inventé au-delà
+    assert aqi_for(o3=200)[0] == 300
+    assert aqi_for(o3=201)[0] == 300
+    assert aqi_for(o3=604)[0] == 300
+    assert aqi_for(o3=201, pm25=300.0) == (aqi_for(pm25=300.0)[0], "pm25", "Dangereux")
+
+
+def test_ugm3_conversion():
+    assert to_ugm3({"o3": 100.0, "no2": 100.0, "co": 1.0, "pm2_5": 12.0}) == pytest.approx(
+        {"o3": 196.2, "no2": 188.2, "co": 1145.0, "pm2_5": 12.0}
+    )
+    assert from_ugm3(to_ugm3({"o3": 68.0, "no2": 42.0, "co": 0.9})) == pytest.approx(
+        {"o3": 68.0, "no2": 42.0, "co": 0.9}
+    )
+    # 1145 µg/m³ de CO (OpenWeatherMap) = 1 ppm: même AQI dans les deux unités
+    assert aqi_for(**from_ugm3({"co": 1145.0})) == aqi_for(co=1.0)
+
+
+def test_gateway_exposes_soap_measures_in_ugm3():
+    pytest.importorskip("fastapi")
+    sys.path.insert(0, os.path.join(ROOT, "api_gateway"))
+    from gateway import soap_components
+
+    measure = SimpleNamespace(pm25=32.5, pm10=48.0, o3=68.0, no2=42.0, co=0.9)
+    assert soap_components(measure) == {
+        "pm2_5": 32.5, "pm10": 48.0, "o3": 133.42, "no2": 79.04, "co": 1030.5,
+    }
+    missing = SimpleNamespace(pm25=10.0, pm10=20.0, o3=None, no2=None, co=None)
+    assert soap_components(missing)["co"] is None
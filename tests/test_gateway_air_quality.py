@@ -0,0 +1,93 @@
+"""Qualité d'air de la Gateway: cache OpenWeather et repli SOAP."""
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "api_gateway"))
+
+pytest.importorskip("fastapi")
+
+import gateway
+from cache import TTLCache
+
+
+def test_failures_are_cached_for_error_ttl():
+    calls = []
+
+    async def failing_loader():
+        calls.append(1)
+        raise RuntimeError("OpenWeather indisponible")
+
+    async def scenario():
+        cache = TTLCache(ttl=60, error_ttl=30)
+        for _ in range(20):
+            with pytest.raises(RuntimeError):
+                await cache.get("Bardo", failing_loader)
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert stats["misses"] == 1 and stats["errors"] == 1 and stats["failure_hits"] == 19
+
+
+@pytest.mark.parametrize("key", ["", "YOUR_API_KEY_HERE", "your_api_key_here", "votre_cle_api_ici"])
+def test_placeholder_keys_mean_no_key(monkeypatch, key):
+    monkeypatch.setattr(gateway, "OPENWEATHER_API_KEY", key)
+    assert not gateway.openweather_configured()
+
+
+def test_openweather_timeout_fits_dashboard_budget():
+    settings = gateway.upstream.config["openweather"]
+    assert settings["timeout"] + settings["connect_timeout"] < gateway.DASHBOARD_BRANCH_TIMEOUTS["air_quality"]
+
+
+class CountingSoapOperation:
+    """Remplace l'opération zeep GetLatestMeasures: une invocation = une enveloppe SOAP."""
+
+    def __init__(self):
+        self.envelopes = []
+
+    async def __call__(self, stations):
+        self.envelopes.append(list(stations["string"]))
+        return [
+            SimpleNamespace(station_name=name, pm25=12.0, pm10=20.0, o3=30.0, no2=10.0, co=0.4, aqi=57, status="Modéré")
+            for name in stations["string"]
+        ]
+
+
+@pytest.fixture
+def soap_envelopes(monkeypatch):
+    operation = CountingSoapOperation()
+
+    async def fake_operation(name):
+        assert name == "GetLatestMeasures"
+        return operation
+
+    monkeypatch.setattr(gateway.soap_air, "operation", fake_operation)
+    gateway.air_quality_cache.invalidate()
+    yield operation.envelopes
+    gateway.air_quality_cache.invalidate()
+
+
+def test_measures_without_key_send_one_soap_envelope(monkeypatch, soap_envelopes):
+    monkeypatch.setattr(gateway, "OPENWEATHER_API_KEY", "YOUR_API_KEY_HERE")
+    measures = asyncio.run(gateway.get_air_quality_measures())
+    assert len(soap_envelopes) == 1
+    assert len(soap_envelopes[0]) == len(gateway.TUNIS_ZONES_GPS)
+    assert [m["source"] for m in measures] == ["Service SOAP local"] * len(gateway.TUNIS_ZONES_GPS)
+
+
+def test_openweather_failure_sends_one_soap_envelope(monkeypatch, soap_envelopes):
+    async def failing_fetch(zone):
+        raise gateway.OpenWeatherUnavailable("code 503")
+
+    monkeypatch.setattr(gateway, "OPENWEATHER_API_KEY", "real-key")
+    monkeypatch.setattr(gateway, "fetch_real_time_air_quality", failing_fetch)
+    asyncio.run(gateway.get_air_quality_measures())
+    section, _ = asyncio.run(gateway._dashboard_air_quality())
+    assert len(soap_envelopes) == 2
+    assert section["zones_monitored"] == len(gateway.TUNIS_ZONES_GPS)
@@ -0,0 +1,35 @@
+"""Bornes de GetMeasureSeries: comparées aux buckets d'agrégats, tous en UTC."""
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+pytest.importorskip("spyne")
+
+
+@pytest.fixture
+def soap_server(monkeypatch, tmp_path):
+    # La base est ouverte relativement au répertoire courant (./data)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(os.path.join(ROOT, "service_soap_air", "app"))
+    return importlib.import_module("soap_server")
+
+
+def test_naive_bounds_are_utc(soap_server):
+    assert soap_server.parse_series_bound("2024-05-01", "date_from") == "2024-05-01 00:00:00"
+    assert soap_server.parse_series_bound("2024-05-01T14:00:00", "date_to") == "2024-05-01 14:00:00"
+
+
+def test_offset_bounds_are_converted_to_utc(soap_server):
+    parse = soap_server.parse_series_bound
+    assert parse("2024-05-01T14:00:00+01:00", "date_from") == "2024-05-01 13:00:00"
+    assert parse("2024-05-01T00:30:00+01:00", "date_from") == "2024-04-30 23:30:00"
+    assert parse("2024-05-01T14:00:00Z", "date_to") == "2024-05-01 14:00:00"
+
+
+def test_invalid_bound_is_a_client_fault(soap_server):
+    with pytest.raises(soap_server.Fault):
+        soap_server.parse_series_bound("01/05/2024", "date_from")
@@ -0,0 +1,26 @@
+"""Validateurs HTTP du catalogue transport (ETag / Last-Modified lus en base)."""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "service_rest_transport", "app"))
+
+from catalog import CatalogState
+
+
+def test_etag_depends_only_on_persisted_state():
+    changed_at = datetime(2026, 1, 5, 10, 0, 0)
+    # Deux workers (ou un redémarrage) lisant la même base: même ETag
+    assert CatalogState(42, 21, changed_at).etag == CatalogState(42, 21, changed_at).etag
+    assert CatalogState(43, 21, changed_at).etag != CatalogState(42, 21, changed_at).etag
+    assert CatalogState(42, 21, changed_at).not_modified('W/"42-21"', None)
+    assert not CatalogState(43, 21, changed_at).not_modified('W/"42-21"', None)
+
+
+def test_last_modified_withheld_during_current_second():
+    now = datetime.now(timezone.utc)
+    assert CatalogState(1, 21, now).last_modified is None
+    earlier = CatalogState(1, 21, now - timedelta(seconds=5))
+    assert earlier.not_modified(None, earlier.last_modified)
+    assert not CatalogState(2, 21, now).not_modified(None, earlier.last_modified)
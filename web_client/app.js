@@ -59,60 +59,7 @@ async function loadCityDashboard() {
         
         console.log('Dashboard data:', data); // Pour debug
         
-        // Mise à jour des statistiques de transport
-        if (dashTransportValue && data.transport) {
-            const operationalLines = data.transport.operational || 0;
-            const totalLines = data.transport.total_lines || 0;
-            dashTransportValue.textContent = `${operationalLines}/${totalLines}`;
-            console.log('Transport:', `${operationalLines}/${totalLines}`);
-        }
-        
-        // Mise à jour de la qualité de l'air
-        if (dashAirValue && data.air_quality) {
-            const aqi = data.air_quality.average_aqi || 0;
-            dashAirValue.textContent = aqi;
-            console.log('Air Quality AQI:', aqi);
-        }
-        
-        // Mise à jour du tourisme
-        if (dashTourismValue && data.tourism) {
-            const openAttractions = data.tourism.currently_open || 0;
-            const totalAttractions = data.tourism.total_attractions || 0;
-            dashTourismValue.textContent = `${openAttractions}/${totalAttractions}`;
-            console.log('Tourism:', `${openAttractions}/${totalAttractions}`);
-        }
-        
-        // Mise à jour des urgences
-        if (dashEmergencyValue && data.emergency) {
-            const availableVehicles = data.emergency.available_vehicles || 0;
-            const totalVehicles = data.emergency.total_vehicles || 0;
-            dashEmergencyValue.textContent = `${availableVehicles}/${totalVehicles}`;
-            console.log('Emergency:', `${availableVehicles}/${totalVehicles}`);
-        }
-        
-        // Mise à jour du statut général de la ville
-        const cityStatusText = document.getElementById('city-status-text');
-        if (cityStatusText) {
-            const status = data.city_status || 'Normal';
-            const timestamp = new Date().toLocaleTimeString('fr-FR');
-            cityStatusText.textContent = `État général : ${status} (mis à jour à ${timestamp})`;
-        }
-        
-        // Mise à jour des alertes
-        const alertsList = document.getElementById('alerts-list');
-        const alertsSection = document.getElementById('alerts-section');
-        if (alertsList && data.alerts && data.alerts.length > 0) {
-            alertsList.innerHTML = data.alerts.map(alert => 
-                `<div class="alert-item">${alert}</div>`
-            ).join('');
-            if (alertsSection) {
-                alertsSection.style.display = 'block';
-            }
-        } else {
-            if (alertsSection) {
-                alertsSection.style.display = 'none';
-            }
-        }
+        renderCityDashboard(data);
     } catch (error) {
         console.error('Erreur lors du chargement du dashboard ville:', error);
         // Réafficher "-" en cas d'erreur
@@ -128,6 +75,70 @@ async function loadCityDashboard() {
     }
 }
 
+// Affichage du dashboard (données issues du fetch ou du flux temps réel)
+function renderCityDashboard(data) {
+    const dashTransportValue = document.getElementById('dash-transport-value');
+    const dashAirValue = document.getElementById('dash-air-value');
+    const dashTourismValue = document.getElementById('dash-tourism-value');
+    const dashEmergencyValue = document.getElementById('dash-emergency-value');
+    
+    // Mise à jour des statistiques de transport
+    if (dashTransportValue && data.transport) {
+        const operationalLines = data.transport.operational || 0;
+        const totalLines = data.transport.total_lines || 0;
+        dashTransportValue.textContent = `${operationalLines}/${totalLines}`;
+        console.log('Transport:', `${operationalLines}/${totalLines}`);
+    }
+    
+    // Mise à jour de la qualité de l'air
+    if (dashAirValue && data.air_quality) {
+        const aqi = data.air_quality.average_aqi || 0;
+        dashAirValue.textContent = aqi;
+        console.log('Air Quality AQI:', aqi);
+    }
+    
+    // Mise à jour du tourisme
+    if (dashTourismValue && data.tourism) {
+        const openAttractions = data.tourism.currently_open || 0;
+        const totalAttractions = data.tourism.total_attractions || 0;
+        dashTourismValue.textContent = `${openAttractions}/${totalAttractions}`;
+        console.log('Tourism:', `${openAttractions}/${totalAttractions}`);
+    }
+    
+    // Mise à jour des urgences
+    if (dashEmergencyValue && data.emergency) {
+        const availableVehicles = data.emergency.available_vehicles || 0;
+        const totalVehicles = data.emergency.total_vehicles || 0;
+        dashEmergencyValue.textContent = `${availableVehicles}/${totalVehicles}`;
+        console.log('Emergency:', `${availableVehicles}/${totalVehicles}`);
+    }
+    
+    // Mise à jour du statut général de la ville
+    const cityStatusText = document.getElementById('city-status-text');
+    if (cityStatusText) {
+        const status = data.city_status || 'Normal';
+        const generatedAt = data.snapshot ? new Date(data.snapshot.generated_at) : new Date();
+        const timestamp = generatedAt.toLocaleTimeString('fr-FR');
+        cityStatusText.textContent = `État général : ${status} (mis à jour à ${timestamp})`;
+    }
+    
+    // Mise à jour des alertes
+    const alertsList = document.getElementById('alerts-list');
+    const alertsSection = document.getElementById('alerts-section');
+    if (alertsList && data.alerts && data.alerts.length > 0) {
+        alertsList.innerHTML = data.alerts.map(alert => 
+            `<div class="alert-item">${alert}</div>`
+        ).join('');
+        if (alertsSection) {
+            alertsSection.style.display = 'block';
+        }
+    } else {
+        if (alertsSection) {
+            alertsSection.style.display = 'none';
+        }
+    }
+}
+
 // Navigation entre les sections
 document.querySelectorAll('.nav-btn').forEach(btn => {
     btn.addEventListener('click', () => {
@@ -145,7 +156,16 @@ document.querySelectorAll('.nav-btn').forEach(btn => {
         
         // Charger le dashboard ville si c'est la section sélectionnée
         if (service === 'dashboard') {
-            loadCityDashboard();
+            if (streamConnected && dashboardState) {
+                renderCityDashboard(dashboardState);
+            } else {
+                loadCityDashboard();
+            }
+        }
+        
+        // Afficher l'état de la flotte reçu en temps réel
+        if (service === 'emergency' && streamConnected && fleetState.ready) {
+            renderFleet();
         }
     });
 });
@@ -460,47 +480,7 @@ async function loadEmergencyData() {
         
         console.log('Véhicules reçus:', vehicles);
         
-        if (vehicles.length === 0) {
-            vehiclesDiv.innerHTML = '<p>Aucun véhicule</p>';
-        } else {
-            let vehiclesHtml = '';
-            vehicles.forEach(v => {
-                const statusClass = v.status === 'available' ? 'status-available' : 
-                                  v.status === 'on_mission' ? 'status-busy' : 'status-maintenance';
-                const statusText = v.status === 'available' ? '✅ Disponible' : 
-                                 v.status === 'on_mission' ? '🚨 En intervention' : '🔧 Maintenance';
-                const typeIcon = v.vehicle_type === 'ambulance' ? '🚑' : 
-                               v.vehicle_type === 'fire_truck' ? '🚒' : '🚓';
-                
-                const vehicleName = v.identifier || `Véhicule ${v.id}`;
-                const vehicleType = v.vehicle_type === 'ambulance' ? 'Ambulance' : 
-                                   v.vehicle_type === 'fire_truck' ? 'Camion de pompiers' : 'Voiture de police';
-                
-                vehiclesHtml += `
-                    <div class="vehicle-card">
-                        <div class="vehicle-header">
-                            <span class="vehicle-name">${typeIcon} ${vehicleName}</span>
-                            <span class="vehicle-status ${statusClass}">${statusText}</span>
-                        </div>
-                        <div class="vehicle-details">
-                            <div class="detail-row">
-                                <span class="detail-label">Type:</span>
-                                <span>${vehicleType}</span>
-                            </div>
-                            <div class="detail-row">
-                                <span class="detail-label">Station:</span>
-                                <span>📍 ${v.station || 'Non assigné'}</span>
-                            </div>
-                            <div class="detail-row">
-                                <span class="detail-label">Équipage:</span>
-                                <span>👥 ${v.crew_size} personnes</span>
-                            </div>
-                        </div>
-                    </div>
-                `;
-            });
-            vehiclesDiv.innerHTML = vehiclesHtml;
-        }
+        renderEmergencyVehicles(vehicles);
         
         // Charger les interventions
         const interventionsResponse = await fetch(`${GATEWAY_URL}/api/emergency/interventions`);
@@ -509,54 +489,7 @@ async function loadEmergencyData() {
         
         console.log('Interventions reçues:', interventions);
         
-        if (interventions.length === 0) {
-            interventionsDiv.innerHTML = '<p>Aucune intervention active</p>';
-        } else {
-            let interventionsHtml = '';
-            interventions.forEach(i => {
-                const priorityClass = i.priority === 'critical' ? 'priority-critical' : 
-                                     i.priority === 'high' ? 'priority-high' : 'priority-medium';
-                const priorityText = i.priority === 'critical' ? '🔴 Critique' : 
-                                    i.priority === 'high' ? '🟠 Haute' : '🟡 Moyenne';
-                const statusClass = i.status === 'in_progress' ? 'status-active' : 
-                                   i.status === 'pending' ? 'status-pending' : 'status-available';
-                const statusText = i.status === 'in_progress' ? '🚨 En cours' : 
-                                  i.status === 'pending' ? '⏳ En attente' : '✅ Terminée';
-                
-                const typeText = i.intervention_type === 'medical' ? '🏥 Médical' :
-                                i.intervention_type === 'fire' ? '🔥 Incendie' :
-                                i.intervention_type === 'accident' ? '🚗 Accident' : '🚔 Crime';
-                
-                interventionsHtml += `
-                    <div class="intervention-card">
-                        <div class="intervention-header">
-                            <span class="intervention-title">${typeText}</span>
-                            <span class="intervention-priority ${priorityClass}">${priorityText}</span>
-                        </div>
-                        <div class="intervention-status-row">
-                            <span class="${statusClass}">${statusText}</span>
-                        </div>
-                        <div class="intervention-details">
-                            <div class="detail-row">
-                                <span class="detail-label">📍 Adresse:</span>
-                                <span>${i.address || 'Non spécifiée'}</span>
-                            </div>
-                            <div class="detail-row">
-                                <span class="detail-label">📝 Description:</span>
-                                <span>${i.description || 'Aucune description'}</span>
-                            </div>
-                            ${i.assigned_vehicle_id ? `
-                            <div class="detail-row">
-                                <span class="detail-label">🚗 Véhicule:</span>
-                                <span>ID ${i.assigned_vehicle_id}</span>
-                            </div>
-                            ` : '<div class="detail-row"><span class="detail-label">🚗 Véhicule:</span><span>⚠️ Non assigné</span></div>'}
-                        </div>
-                    </div>
-                `;
-            });
-            interventionsDiv.innerHTML = interventionsHtml;
-        }
+        renderEmergencyInterventions(interventions);
         
     } catch (error) {
         vehiclesDiv.innerHTML = `<p class="error">❌ Erreur: ${error.message}</p>`;
@@ -564,6 +497,107 @@ async function loadEmergencyData() {
     }
 }
 
+// Affichage des véhicules d'urgence (données issues du fetch ou du flux temps réel)
+function renderEmergencyVehicles(vehicles) {
+    const vehiclesDiv = document.getElementById('emergency-vehicles');
+    
+    if (vehicles.length === 0) {
+        vehiclesDiv.innerHTML = '<p>Aucun véhicule</p>';
+    } else {
+        let vehiclesHtml = '';
+        vehicles.forEach(v => {
+            const statusClass = v.status === 'available' ? 'status-available' : 
+                              v.status === 'on_mission' ? 'status-busy' : 'status-maintenance';
+            const statusText = v.status === 'available' ? '✅ Disponible' : 
+                             v.status === 'on_mission' ? '🚨 En intervention' : '🔧 Maintenance';
+            const typeIcon = v.vehicle_type === 'ambulance' ? '🚑' : 
+                           v.vehicle_type === 'fire_truck' ? '🚒' : '🚓';
+            
+            const vehicleName = v.identifier || `Véhicule ${v.id}`;
+            const vehicleType = v.vehicle_type === 'ambulance' ? 'Ambulance' : 
+                               v.vehicle_type === 'fire_truck' ? 'Camion de pompiers' : 'Voiture de police';
+            
+            vehiclesHtml += `
+                <div class="vehicle-card">
+                    <div class="vehicle-header">
+                        <span class="vehicle-name">${typeIcon} ${vehicleName}</span>
+                        <span class="vehicle-status ${statusClass}">${statusText}</span>
+                    </div>
+                    <div class="vehicle-details">
+                        <div class="detail-row">
+                            <span class="detail-label">Type:</span>
+                            <span>${vehicleType}</span>
+                        </div>
+                        <div class="detail-row">
+                            <span class="detail-label">Station:</span>
+                            <span>📍 ${v.station || 'Non assigné'}</span>
+                        </div>
+                        <div class="detail-row">
+                            <span class="detail-label">Équipage:</span>
+                            <span>👥 ${v.crew_size} personnes</span>
+                        </div>
+                    </div>
+                </div>
+            `;
+        });
+        vehiclesDiv.innerHTML = vehiclesHtml;
+    }
+}
+
+// Affichage des interventions actives
+function renderEmergencyInterventions(interventions) {
+    const interventionsDiv = document.getElementById('emergency-interventions');
+    
+    if (interventions.length === 0) {
+        interventionsDiv.innerHTML = '<p>Aucune intervention active</p>';
+    } else {
+        let interventionsHtml = '';
+        interventions.forEach(i => {
+            const priorityClass = i.priority === 'critical' ? 'priority-critical' : 
+                                 i.priority === 'high' ? 'priority-high' : 'priority-medium';
+            const priorityText = i.priority === 'critical' ? '🔴 Critique' : 
+                                i.priority === 'high' ? '🟠 Haute' : '🟡 Moyenne';
+            const statusClass = i.status === 'in_progress' ? 'status-active' : 
+                               i.status === 'pending' ? 'status-pending' : 'status-available';
+            const statusText = i.status === 'in_progress' ? '🚨 En cours' : 
+                              i.status === 'pending' ? '⏳ En attente' : '✅ Terminée';
+            
+            const typeText = i.intervention_type === 'medical' ? '🏥 Médical' :
+                            i.intervention_type === 'fire' ? '🔥 Incendie' :
+                            i.intervention_type === 'accident' ? '🚗 Accident' : '🚔 Crime';
+            
+            interventionsHtml += `
+                <div class="intervention-card">
+                    <div class="intervention-header">
+                        <span class="intervention-title">${typeText}</span>
+                        <span class="intervention-priority ${priorityClass}">${priorityText}</span>
+                    </div>
+                    <div class="intervention-status-row">
+                        <span class="${statusClass}">${statusText}</span>
+                    </div>
+                    <div class="intervention-details">
+                        <div class="detail-row">
+                            <span class="detail-label">📍 Adresse:</span>
+                            <span>${i.address || 'Non spécifiée'}</span>
+                        </div>
+                        <div class="detail-row">
+                            <span class="detail-label">📝 Description:</span>
+                            <span>${i.description || 'Aucune description'}</span>
+                        </div>
+                        ${i.assigned_vehicle_id ? `
+                        <div class="detail-row">
+                            <span class="detail-label">🚗 Véhicule:</span>
+                            <span>ID ${i.assigned_vehicle_id}</span>
+                        </div>
+                        ` : '<div class="detail-row"><span class="detail-label">🚗 Véhicule:</span><span>⚠️ Non assigné</span></div>'}
+                    </div>
+                </div>
+            `;
+        });
+        interventionsDiv.innerHTML = interventionsHtml;
+    }
+}
+
 // ============================================
 // ORCHESTRATION - PLANIFICATEUR DE TRAJET
 // ============================================
@@ -643,26 +677,125 @@ function getTransportIcon(mode) {
     return icons[mode] || '🚗';
 }
 
-// ===== INITIALISATION AU CHARGEMENT =====
-document.addEventListener('DOMContentLoaded', () => {
-    // Charger le Dashboard Ville par défaut
-    loadCityDashboard();
-    
-    // Mettre à jour le statut de connexion
+// ===== FLUX TEMPS RÉEL (SSE) =====
+// La Gateway pousse les changements du dashboard et de la flotte d'urgence;
+// le polling toutes les 30 secondes ne sert plus que de repli.
+let eventSource = null;
+let streamConnected = false;
+let pollingTimer = null;
+let dashboardState = null;
+const fleetState = { ready: false, vehicles: {}, interventions: {} };
+
+function setConnectionStatus(text) {
     const connectionStatus = document.getElementById('connection-status');
     if (connectionStatus) {
         const statusText = connectionStatus.querySelector('.status-text');
         if (statusText) {
-            statusText.textContent = 'Connecté';
+            statusText.textContent = text;
         }
     }
-});
+}
+
+// Repli: recharger le dashboard toutes les 30 secondes
+function startPolling() {
+    if (pollingTimer) return;
+    pollingTimer = setInterval(() => {
+        // Recharger seulement si on est sur le dashboard
+        const dashboardSection = document.getElementById('dashboard');
+        if (dashboardSection && dashboardSection.classList.contains('active')) {
+            loadCityDashboard();
+        }
+    }, 30000);
+}
+
+function stopPolling() {
+    if (pollingTimer) {
+        clearInterval(pollingTimer);
+        pollingTimer = null;
+    }
+}
 
-// Recharger le dashboard toutes les 30 secondes
-setInterval(() => {
-    // Recharger seulement si on est sur le dashboard
-    const dashboardSection = document.getElementById('dashboard');
-    if (dashboardSection && dashboardSection.classList.contains('active')) {
-        loadCityDashboard();
+function isSectionActive(id) {
+    const section = document.getElementById(id);
+    return section && section.classList.contains('active');
+}
+
+// Réafficher la flotte si l'onglet Urgences est ouvert
+function renderFleet() {
+    if (!isSectionActive('emergency')) return;
+    renderEmergencyVehicles(Object.values(fleetState.vehicles));
+    renderEmergencyInterventions(Object.values(fleetState.interventions));
+}
+
+function connectEventStream() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
     }
-}, 30000);
+    
+    eventSource = new EventSource(`${GATEWAY_URL}/api/stream/events`);
+    
+    eventSource.addEventListener('open', () => {
+        streamConnected = true;
+        stopPolling();
+        setConnectionStatus('Connecté (temps réel)');
+    });
+    
+    // EventSource se reconnecte automatiquement; en attendant, repli sur le polling
+    eventSource.addEventListener('error', () => {
+        streamConnected = false;
+        startPolling();
+        setConnectionStatus('Reconnexion...');
+    });
+    
+    // Dashboard: état complet à la connexion, puis sections modifiées
+    eventSource.addEventListener('dashboard', (event) => {
+        const payload = JSON.parse(event.data);
+        dashboardState = Object.assign(dashboardState || {}, payload.changes, { snapshot: payload.snapshot });
+        if (isSectionActive('dashboard')) {
+            renderCityDashboard(dashboardState);
+        }
+    });
+    
+    // Flotte: état complet à la connexion
+    eventSource.addEventListener('fleet', (event) => {
+        const payload = JSON.parse(event.data);
+        fleetState.vehicles = {};
+        fleetState.interventions = {};
+        payload.vehicles.forEach(v => { fleetState.vehicles[v.id] = v; });
+        payload.interventions.forEach(i => { fleetState.interventions[i.id] = i; });
+        fleetState.ready = true;
+        renderFleet();
+    });
+    
+    eventSource.addEventListener('vehicle_status', (event) => {
+        const payload = JSON.parse(event.data);
+        fleetState.vehicles[payload.vehicle.id] = payload.vehicle;
+        console.log('Statut véhicule:', payload.vehicle.identifier, payload.previous_status, '→', payload.vehicle.status);
+        renderFleet();
+    });
+    
+    eventSource.addEventListener('intervention', (event) => {
+        const payload = JSON.parse(event.data);
+        fleetState.interventions[payload.intervention.id] = payload.intervention;
+        renderFleet();
+    });
+    
+    eventSource.addEventListener('intervention_closed', (event) => {
+        const payload = JSON.parse(event.data);
+        delete fleetState.interventions[payload.id];
+        renderFleet();
+    });
+}
+
+// ===== INITIALISATION AU CHARGEMENT =====
+document.addEventListener('DOMContentLoaded', () => {
+    // Charger le Dashboard Ville par défaut
+    loadCityDashboard();
+    
+    // Mettre à jour le statut de connexion
+    setConnectionStatus('Connecté');
+    
+    // S'abonner aux mises à jour poussées par la Gateway
+    connectEventStream();
+});